@@ -3,6 +3,14 @@ from flask_migrate import Migrate
 import os
 from datetime import datetime, timedelta
 from .extensions import db, mail, csrf
+from .subscription_cache import subscription_cache, get_subscription_snapshot
+from .audit import audit_writer
+from .draft_store import draft_store
+from .pdf_cache import pdf_cache
+from .pdf_service import pdf_renderer
+from .sequences import invoice_numbers, patient_numbers
+from .slots import slot_occupancy
+from .mail_queue import mail_queue
 from . import models
 from .routes.auth import auth_bp
 from .routes.dashboard import dashboard_bp
@@ -16,8 +24,17 @@ from clinic.commands.debug import clinic_debug
 from clinic.routes.templates import templates_bp
 from clinic.routes.symptom_templates import  symptom_templates_bp
 from flask import request
-from clinic.models import Clinic
-from clinic.utils import is_clinic_active
+from clinic.utils import is_clinic_active, effective_subscription_status, load_request_identity
+from clinic.commands.subscriptions import expire_subscriptions
+from clinic.commands.audit_log import audit_log_cli
+from clinic.commands.pdf_benchmark import pdf_benchmark
+from clinic.commands.pdf_cache import pdf_cache_cli
+from clinic.commands.print_run import print_prescriptions
+from clinic.commands.follow_ups import schedule_follow_ups
+from clinic.commands.mail_queue import mail_worker, queue_reminders
+from clinic.commands.patient_search import rebuild_patient_search
+from clinic.commands.phones import normalize_phones
+from clinic.commands.patient_summary import rebuild_patient_summary
 from clinic.subscription_plans import PLANS
 # from clinic.routes.payments import payments_bp
 
@@ -26,7 +43,7 @@ load_dotenv()
 # $env:FLASK_APP="app.py"
 # Ye command har new terminal mein ek baar chalani hoti hai
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__, instance_relative_config=True)
     # ✅ REQUIRED FOR RENDER / PROXIES
     from werkzeug.middleware.proxy_fix import ProxyFix
@@ -100,10 +117,24 @@ def create_app():
     os.makedirs(app.config["DOC_UPLOAD_FOLDER"], exist_ok=True)
     os.makedirs(app.config["RECORD_UPLOAD_FOLDER"], exist_ok=True)
 
+    # ---------------- TEST OVERRIDES ----------------
+    # tests/ apna DB URI + TESTING yahan dete hain (extensions init se pehle)
+    if test_config:
+        app.config.update(test_config)
+
     # ---------------- INIT EXTENSIONS ----------------
     db.init_app(app)
     mail.init_app(app)
     csrf.init_app(app)
+    subscription_cache.init_app(app)
+    audit_writer.init_app(app)
+    draft_store.init_app(app)
+    pdf_cache.init_app(app)
+    pdf_renderer.init_app(app)
+    patient_numbers.init_app(app)
+    invoice_numbers.init_app(app)
+    slot_occupancy.init_app(app)
+    mail_queue.init_app(app)
     Migrate(app, db)
 
     # ---------------- BLUEPRINTS ----------------
@@ -115,6 +146,17 @@ def create_app():
     app.register_blueprint(billing_bp)
     app.register_blueprint(settings_bp)
     app.cli.add_command(clinic_debug)
+    app.cli.add_command(expire_subscriptions)
+    app.cli.add_command(audit_log_cli)
+    app.cli.add_command(pdf_benchmark)
+    app.cli.add_command(pdf_cache_cli)
+    app.cli.add_command(print_prescriptions)
+    app.cli.add_command(schedule_follow_ups)
+    app.cli.add_command(mail_worker)
+    app.cli.add_command(queue_reminders)
+    app.cli.add_command(rebuild_patient_search)
+    app.cli.add_command(normalize_phones)
+    app.cli.add_command(rebuild_patient_summary)
     app.register_blueprint(templates_bp)
     app.register_blueprint( symptom_templates_bp)
     # app.register_blueprint(payments_bp)
@@ -167,6 +209,13 @@ def create_app():
         log_error(e)
         return render_template("errors/500.html"), 500
     
+    # ---------- REQUEST IDENTITY (LOAD ONCE) ----------
+    @app.before_request
+    def load_identity():
+        if request.path.startswith("/static"):
+            return
+        load_request_identity()
+
     # ---------- TRIAL / SUBSCRIPTION ----------
     @app.before_request
     def enforce_subscription():
@@ -183,18 +232,14 @@ def create_app():
         if not clinic_id:
             return
 
-        clinic = Clinic.query.get(clinic_id)
+        # cached snapshot → common case me zero DB round trips
+        clinic = get_subscription_snapshot(clinic_id)
         if not clinic:
             return
 
-        # ---------- AUTO EXPIRE TRIAL ----------
-        if (
-            clinic.subscription_status == "trial"
-            and clinic.trial_ends_at
-            and clinic.trial_ends_at < datetime.utcnow()
-        ):
-            clinic.subscription_status = "expired"
-            db.session.commit()
+        # NOTE: request path read-only hai.
+        # Expired trials / lapsed plans ko DB me mark karna
+        # `flask expire-subscriptions` (cron) ka kaam hai.
 
         # ---------- ALLOW SETTINGS PAGE ONLY ----------
         if (
@@ -224,7 +269,7 @@ def create_app():
         if not clinic_id:
             return {}
 
-        clinic = Clinic.query.get(clinic_id)
+        clinic = get_subscription_snapshot(clinic_id)
         if not clinic:
             return {}
 
@@ -237,7 +282,7 @@ def create_app():
             expired = delta.total_seconds() <= 0
 
         return {
-            "subscription_status": clinic.subscription_status,
+            "subscription_status": effective_subscription_status(clinic),
             "trial_days_left": days_left,
             "trial_expired": expired,
         }
@@ -0,0 +1,434 @@
+import atexit
+import base64
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy import insert
+
+from clinic.extensions import db
+from clinic.models import AuditLog
+
+"""
+AUDIT LOG WRITER
+
+log_action() ab caller ka db.session commit NAHI karta.
+Rows memory queue me jaati hain aur background thread unhe
+multi-row INSERT me likhta hai (batch size ya time, jo pehle ho).
+
+Security-critical events (login / password / finalization) turant
+ek alag connection pe likhe jaate hain — queue me nahi rukte.
+
+Audit row chupchaap nahi khoti:
+- queue full → caller thread me seedha INSERT (slow, par row safe)
+- INSERT fail (DB down / lock) → rows spool file (JSON lines) me;
+  `flask audit-log status` dikhata hai, `flask audit-log replay` wapas
+  table me daalta hai
+- spool bhi na likh paaye → ERROR log + `lost` counter
+"""
+
+logger = logging.getLogger(__name__)
+
+# In actions ko kabhi buffer nahi karte
+SYNC_ACTIONS = {
+    "LOGIN_FAILED",
+    "LOGIN_SUCCESS",
+    "LOGOUT",
+    "SIGNUP",
+    "PASSWORD_RESET_LINK_SENT",
+    "PASSWORD_RESET_SUCCESS",
+    "PRESCRIPTION_FINALIZED",
+    "PRESCRIPTION_EDIT_BLOCKED",
+}
+
+
+class AuditWriter:
+    """
+    Config:
+        AUDIT_ASYNC           default True (TESTING me False)
+        AUDIT_BATCH_SIZE      rows per INSERT, default 200
+        AUDIT_FLUSH_INTERVAL  seconds, default 2.0
+        AUDIT_QUEUE_MAX       queue full → sync INSERT, default 10000
+        AUDIT_SPOOL_PATH      failed inserts yahan (JSON lines),
+                              default instance/audit_spool.jsonl
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.batch_size = 200
+        self.flush_interval = 2.0
+        self._queue = None
+        self.spool_path = None
+        # is process ke counters (status / debug ke liye)
+        self.stats = {"overflow_sync": 0, "spooled": 0, "lost": 0}
+        self._spool_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.setdefault("AUDIT_ASYNC", not app.testing)
+        self.batch_size = app.config.setdefault("AUDIT_BATCH_SIZE", 200)
+        self.flush_interval = app.config.setdefault("AUDIT_FLUSH_INTERVAL", 2.0)
+        self._queue = queue.Queue(maxsize=app.config.setdefault("AUDIT_QUEUE_MAX", 10000))
+        self.spool_path = app.config.setdefault(
+            "AUDIT_SPOOL_PATH", os.path.join(app.instance_path, "audit_spool.jsonl")
+        )
+
+        app.extensions["audit_writer"] = self
+
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)   # flush-on-shutdown
+            self._atexit_registered = True
+
+    # -----------------------------
+    # PUBLIC
+    # -----------------------------
+    def write(self, row, sync=False):
+        if sync or not self.enabled or self._queue is None:
+            self._insert([row])
+            return
+
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # drop nahi — is request ko thoda wait karna padega
+            self.stats["overflow_sync"] += 1
+            logger.warning("audit queue full, writing %s synchronously", row.get("action"))
+            self._insert([row])
+
+    def flush(self):
+        """
+        Queue me jo bhi pada hai abhi likh do (caller thread me).
+        """
+        if self._queue is None:
+            return
+
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return
+            self._insert(batch)
+
+    def spooled_count(self):
+        """
+        Spool file me kitni rows DB tak nahi pahunchi (sab processes ki).
+        """
+        if not self.spool_path or not os.path.exists(self.spool_path):
+            return 0
+        with open(self.spool_path, encoding="utf-8") as fh:
+            return sum(1 for line in fh if line.strip())
+
+    def replay_spool(self):
+        """
+        Spool ki rows table me likho, phir spool khaali. Returns rows written.
+        Fail ho to spool waisa hi rehta hai (exception caller tak).
+        """
+        if not self.spool_path or not os.path.exists(self.spool_path):
+            return 0
+
+        with self._spool_lock:
+            pending = self.spool_path + ".replay"
+            os.replace(self.spool_path, pending)
+            try:
+                with open(pending, encoding="utf-8") as fh:
+                    rows = [_load_row(line) for line in fh if line.strip()]
+                if rows:
+                    with db.engine.begin() as conn:
+                        for i in range(0, len(rows), self.batch_size):
+                            conn.execute(insert(AuditLog.__table__).values(rows[i:i + self.batch_size]))
+            except Exception:
+                # wapas spool me (beech me aayi nayi rows ke saath)
+                with open(pending, "a", encoding="utf-8") as out:
+                    if os.path.exists(self.spool_path):
+                        with open(self.spool_path, encoding="utf-8") as newer:
+                            out.write(newer.read())
+                os.replace(pending, self.spool_path)
+                raise
+            os.remove(pending)
+            return len(rows)
+
+    def shutdown(self, timeout=5):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout)
+        self.flush()
+
+    # -----------------------------
+    # INTERNALS
+    # -----------------------------
+    def _ensure_thread(self):
+        # gunicorn fork ke baad parent ka thread child me nahi hota
+        if self._thread is not None and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="audit-writer",
+                daemon=True
+            )
+            self._thread.start()
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            # batch full hone ka ya interval khatam hone ka wait
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._insert(batch)
+
+    def _insert(self, rows):
+        # clinic ke bina row table me jaa hi nahi sakti (NOT NULL)
+        rows = [r for r in rows if r.get("clinic_id")]
+        if not rows or self.app is None:
+            return
+
+        try:
+            with self.app.app_context():
+                # Alag connection → caller ki session / transaction untouched
+                with db.engine.begin() as conn:
+                    conn.execute(insert(AuditLog.__table__).values(rows))
+        except Exception:
+            # audit fail hone se koi feature nahi rukna chahiye — par row spool me
+            logger.warning("audit insert failed, spooling %d rows", len(rows), exc_info=True)
+            self._spool(rows)
+
+    def _spool(self, rows):
+        try:
+            with self._spool_lock, open(self.spool_path, "a", encoding="utf-8") as fh:
+                for row in rows:
+                    fh.write(json.dumps(_dump_row(row)) + "\n")
+            self.stats["spooled"] += len(rows)
+        except Exception:
+            self.stats["lost"] += len(rows)
+            logger.error(
+                "audit rows lost (%d): %s", len(rows),
+                [(r.get("clinic_id"), r.get("action"), str(r.get("created_at"))) for r in rows],
+                exc_info=True
+            )
+
+
+def _dump_row(row):
+    row = dict(row)
+    if isinstance(row.get("created_at"), datetime):
+        row["created_at"] = row["created_at"].isoformat()
+    return row
+
+
+def _load_row(line):
+    row = json.loads(line)
+    if row.get("created_at"):
+        row["created_at"] = datetime.fromisoformat(row["created_at"])
+    return row
+
+
+audit_writer = AuditWriter()
+
+
+# =====================================================
+# MONTHLY PARTITIONS
+# =====================================================
+"""
+audit_log month-wise todte hain taaki inserts / reads flat rahein:
+
+- PostgreSQL: audit_log = RANGE partitioned parent (created_at),
+  har mahine ka partition audit_log_yYYYYmMM (+ audit_log_default).
+- SQLite: audit_log = hot table (current month). Band ho chuke mahine
+  `flask audit-log maintain` se audit_log_yYYYYmMM tables me move hote hain.
+
+Purane partitions `flask audit-log archive` se .jsonl.gz me jaate hain.
+
+Partitions / month tables raw DDL se bante hain (models me nahi) →
+migrations/env.py is_audit_partition() se inhe autogenerate se bahar
+rakhta hai.
+"""
+
+PARTITION_PREFIX = "audit_log_y"
+DEFAULT_PARTITION = "audit_log_default"
+
+
+def month_start(d):
+    return datetime(d.year, d.month, 1)
+
+
+def add_months(d, n):
+    month = d.month - 1 + n
+    return datetime(d.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{PARTITION_PREFIX}{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name):
+    """
+    audit_log_y2026m09 → datetime(2026, 9, 1); other names → None
+    """
+    if not name.startswith(PARTITION_PREFIX):
+        return None
+    try:
+        year, month = name[len(PARTITION_PREFIX):].split("m")
+        return datetime(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+
+def is_audit_partition(name, type_):
+    """
+    PG partitions / SQLite month tables (+ default partition) aur unke indexes.
+    """
+    if type_ == "table":
+        return name == DEFAULT_PARTITION or partition_month(name) is not None
+    if type_ == "index":
+        return name.startswith(f"idx_{PARTITION_PREFIX}")
+    return False
+
+
+def month_table(name, metadata=None):
+    """
+    Core Table with audit_log's columns (SQLite month tables / archive reads).
+    """
+    return sa.Table(
+        name,
+        metadata if metadata is not None else sa.MetaData(),
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("clinic_id", sa.Integer, nullable=False),
+        sa.Column("user_id", sa.Integer),
+        sa.Column("action", sa.String(100), nullable=False),
+        sa.Column("ip_address", sa.String(45)),
+        sa.Column("user_agent", sa.String(255)),
+        sa.Column("created_at", sa.DateTime),
+        sa.Index(f"idx_{name}_clinic_created", "clinic_id", "created_at"),
+    )
+
+
+def list_partitions(conn):
+    """
+    [(month, table_name)] newest first.
+    PG → attached partitions, SQLite → month tables.
+    """
+    if conn.dialect.name == "postgresql":
+        names = conn.execute(sa.text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'audit_log'"
+        )).scalars().all()
+    else:
+        names = sa.inspect(conn).get_table_names()
+
+    parts = [(partition_month(n), n) for n in names]
+    return sorted((p for p in parts if p[0]), reverse=True)
+
+
+def audit_tables_newest_first(conn):
+    """
+    Tables to read (in order) for a newest-first scan.
+    PG parent table khud partitions prune karta hai; SQLite me hot table
+    ke baad month tables (sab hot table se purane) padhne padte hain.
+    """
+    tables = [AuditLog.__table__]
+    if conn.dialect.name != "postgresql":
+        tables += [month_table(name) for _, name in list_partitions(conn)]
+    return tables
+
+
+# =====================================================
+# KEYSET BROWSING
+# =====================================================
+def _encode_cursor(created_at, row_id):
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        return None
+
+
+def browse_audit_log(clinic_id, cursor=None, limit=50, action=None):
+    """
+    Newest-first audit rows for one clinic using (created_at, id) keyset.
+    Page 1 aur page 500 dono same cost: OFFSET / COUNT nahi hota.
+
+    Returns (rows, next_cursor) — next_cursor None on the last page.
+    """
+    after = _decode_cursor(cursor) if cursor else None
+    rows = []
+
+    with db.engine.connect() as conn:
+        for table in audit_tables_newest_first(conn):
+            c = table.c
+            query = (
+                sa.select(c.id, c.user_id, c.action, c.ip_address, c.user_agent, c.created_at)
+                .where(c.clinic_id == clinic_id)
+                .order_by(c.created_at.desc(), c.id.desc())
+                .limit(limit + 1 - len(rows))
+            )
+
+            if action:
+                query = query.where(c.action == action)
+
+            if after:
+                created_at, row_id = after
+                query = query.where(sa.or_(
+                    c.created_at < created_at,
+                    sa.and_(c.created_at == created_at, c.id < row_id)
+                ))
+
+            rows += conn.execute(query).all()
+            if len(rows) > limit:
+                break
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_cursor(last.created_at, last.id)
+
+    return rows, next_cursor
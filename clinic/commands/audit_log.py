@@ -0,0 +1,260 @@
+import click
+import gzip
+import json
+import os
+from datetime import datetime
+from flask import current_app
+from flask.cli import with_appcontext
+import sqlalchemy as sa
+from clinic.extensions import db
+from clinic.models import AuditLog
+from clinic.audit import (
+    DEFAULT_PARTITION,
+    audit_writer,
+    add_months,
+    list_partitions,
+    month_start,
+    month_table,
+    partition_name,
+)
+
+"""
+audit_log partition maintenance (cron, roz ya hafte me ek baar):
+
+    flask audit-log maintain                  # next months ke partitions / SQLite rotation
+    flask audit-log archive --keep-months 12  # purane mahine → .jsonl.gz, phir drop
+    flask audit-log status                    # spool me atki rows (DB insert fail hua tha)
+    flask audit-log replay                    # spool → audit_log
+
+PostgreSQL: cron chhoot jaaye aur aage wale partitions khatam ho jaayein to
+us mahine ki rows audit_log_default me jaati hain. Aisi range pe seedha
+CREATE TABLE ... PARTITION OF fail hota hai ("updated partition constraint
+for default partition would be violated"). maintain ye khud sambhalta hai,
+ek transaction me: default DETACH → naya partition → default se us mahine
+ki rows move → default wapas ATTACH. Default me jitne purane mahine pade
+hain unke partitions bhi ban jaate hain. Is beech audit_log pe
+ACCESS EXCLUSIVE lock rehta hai (writes ruk ke wait karte hain) → raat me
+chalao. Manual recovery bhi yahi steps hain (_create_pg_partition).
+"""
+
+
+@click.group("audit-log")
+def audit_log_cli():
+    """Audit log partitions, retention and archival."""
+
+
+# -----------------------------
+# MAINTAIN
+# -----------------------------
+@audit_log_cli.command("maintain")
+@click.option("--months-ahead", default=3, show_default=True,
+              help="PostgreSQL: future partitions to pre-create.")
+@with_appcontext
+def maintain(months_ahead):
+    now = month_start(datetime.utcnow())
+
+    if db.engine.dialect.name == "postgresql":
+        with db.engine.connect() as conn:
+            existing = {name for _, name in list_partitions(conn)}
+            # default me atke mahine (cron chhoota tha) → unke partitions bhi,
+            # taaki archive unhe dekh sake
+            stranded = conn.execute(sa.text(
+                f"SELECT DISTINCT date_trunc('month', created_at) FROM {DEFAULT_PARTITION}"
+            )).scalars().all()
+
+        last = add_months(now, months_ahead)
+        months = {month_start(m) for m in stranded}
+        months.update(add_months(now, i) for i in range(months_ahead + 1))
+
+        moved = 0
+        for month in sorted(months):
+            if partition_name(month) in existing:
+                continue
+            # ek mahina = ek transaction
+            with db.engine.begin() as conn:
+                moved += _create_pg_partition(conn, month)
+
+        click.echo(f"Partitions ready up to {last:%Y-%m} ({moved} row(s) moved out of {DEFAULT_PARTITION})")
+        return
+
+    # SQLite: band mahine hot table se month tables me
+    hot = AuditLog.__table__
+    oldest, top_id = db.session.query(db.func.min(hot.c.created_at), db.func.max(hot.c.id)).one()
+    db.session.remove()
+
+    if oldest is None:
+        click.echo("Nothing to rotate")
+        return
+
+    month = month_start(oldest)
+    moved = 0
+
+    while month < now:
+        end = add_months(month, 1)
+        in_month = sa.and_(hot.c.created_at >= month, hot.c.created_at < end)
+
+        # ek mahina = ek transaction
+        with db.engine.begin() as conn:
+            table = month_table(partition_name(month))
+            table.create(conn, checkfirst=True)
+
+            result = conn.execute(
+                table.insert().from_select(
+                    [c.name for c in table.columns],
+                    sa.select(*(hot.c[c.name] for c in table.columns)).where(in_month)
+                )
+            )
+            conn.execute(hot.delete().where(in_month))
+            moved += result.rowcount or 0
+
+        month = end
+
+    _keep_sqlite_sequence(top_id)
+    click.echo(f"Rotated {moved} row(s) into monthly tables")
+
+
+# -----------------------------
+# ARCHIVE (RETENTION)
+# -----------------------------
+@audit_log_cli.command("archive")
+@click.option("--keep-months", default=12, show_default=True,
+              help="Months to keep online (current month included).")
+@click.option("--dest", default=None,
+              help="Archive folder (default: instance/audit_archive).")
+@click.option("--dry-run", is_flag=True)
+@with_appcontext
+def archive(keep_months, dest, dry_run):
+    dest = dest or os.path.join(current_app.instance_path, "audit_archive")
+    cutoff = add_months(month_start(datetime.utcnow()), -(keep_months - 1))
+
+    with db.engine.connect() as conn:
+        old = [(m, name) for m, name in list_partitions(conn) if m < cutoff]
+
+    if not old:
+        click.echo("Nothing to archive")
+        return
+
+    os.makedirs(dest, exist_ok=True)
+
+    for month, name in sorted(old):
+        if dry_run:
+            click.echo(f"would archive {name}")
+            continue
+
+        path = os.path.join(dest, f"{name}.jsonl.gz")
+        count = _dump_table(name, path)
+        _drop_partition(name)
+        click.echo(f"{name}: {count} row(s) → {path}")
+
+
+# -----------------------------
+# SPOOL (FAILED INSERTS)
+# -----------------------------
+@audit_log_cli.command("status")
+@with_appcontext
+def status():
+    count = audit_writer.spooled_count()
+    click.echo(f"{count} audit row(s) waiting in {audit_writer.spool_path}")
+    if count:
+        raise SystemExit(1)   # cron / monitoring ko pata chale
+
+
+@audit_log_cli.command("replay")
+@with_appcontext
+def replay():
+    count = audit_writer.replay_spool()
+    click.echo(f"Replayed {count} audit row(s)")
+
+
+def _create_pg_partition(conn, start):
+    """
+    start ke mahine ka partition. Us range ki rows default partition me
+    pehle se hon to: DETACH default → CREATE → rows move → ATTACH default.
+    Returns moved rows. Caller ka transaction (PG DDL transactional hai →
+    beech me fail = kuch nahi badla).
+    """
+    name = partition_name(start)
+    end = add_months(start, 1)
+    bounds = f"FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    in_month = "created_at >= :start AND created_at < :end"
+    params = {"start": start, "end": end}
+
+    stranded = conn.execute(sa.text(
+        f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_month} LIMIT 1"
+    ), params).scalar()
+
+    if not stranded:
+        conn.execute(sa.text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF audit_log FOR VALUES {bounds}"))
+        return 0
+
+    columns = ", ".join(c.name for c in AuditLog.__table__.columns)
+    conn.execute(sa.text(f"ALTER TABLE audit_log DETACH PARTITION {DEFAULT_PARTITION}"))
+    conn.execute(sa.text(f"CREATE TABLE {name} PARTITION OF audit_log FOR VALUES {bounds}"))
+    moved = conn.execute(sa.text(
+        f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {DEFAULT_PARTITION} WHERE {in_month}"
+    ), params).rowcount
+    conn.execute(sa.text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_month}"), params)
+    conn.execute(sa.text(f"ALTER TABLE audit_log ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    return moved or 0
+
+
+def _keep_sqlite_sequence(top_id):
+    """
+    Hot table khaali hone ke baad naye ids moved ids ke upar hi rahein.
+    AUTOINCREMENT (migration a481629bffcf) sqlite_sequence khud rakhta hai;
+    ye bas ensure karta hai ki seq kabhi top_id se neeche na ho.
+    """
+    if not top_id:
+        return
+
+    with db.engine.begin() as conn:
+        ddl = conn.execute(sa.text(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'audit_log'"
+        )).scalar() or ""
+        if "AUTOINCREMENT" not in ddl.upper():
+            click.echo("Warning: audit_log has no AUTOINCREMENT, ids can repeat — run flask db upgrade")
+            return
+
+        seq = conn.execute(sa.text(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'audit_log'"
+        )).scalar()
+        if seq is None:
+            conn.execute(sa.text(
+                "INSERT INTO sqlite_sequence (name, seq) VALUES ('audit_log', :top)"
+            ), {"top": top_id})
+        elif seq < top_id:
+            conn.execute(sa.text(
+                "UPDATE sqlite_sequence SET seq = :top WHERE name = 'audit_log'"
+            ), {"top": top_id})
+
+
+def _dump_table(name, path):
+    """
+    Stream rows into gzip JSONL. tmp file + rename → half file kabhi nahi bachta.
+    """
+    table = month_table(name)
+    tmp = path + ".tmp"
+    count = 0
+
+    with db.engine.connect() as conn, gzip.open(tmp, "wt", encoding="utf-8") as out:
+        result = conn.execution_options(stream_results=True, yield_per=5000).execute(
+            sa.select(table).order_by(table.c.created_at, table.c.id)
+        )
+        for row in result.mappings():
+            record = dict(row)
+            if record["created_at"] is not None:
+                record["created_at"] = record["created_at"].isoformat()
+            out.write(json.dumps(record) + "\n")
+            count += 1
+
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return count
+
+
+def _drop_partition(name):
+    with db.engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(sa.text(f"ALTER TABLE audit_log DETACH PARTITION {name}"))
+        conn.execute(sa.text(f"DROP TABLE {name}"))
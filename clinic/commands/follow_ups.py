@@ -0,0 +1,145 @@
+import click
+from datetime import datetime, time, timedelta
+from flask.cli import with_appcontext
+from sqlalchemy import and_, exists, func, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from clinic.extensions import db
+from clinic.models import Appointment, Clinic, Patient
+
+"""
+Follow-up scheduler — nightly batch job.
+
+Consult me doctor follow_up_date set karta hai; ye job us date ke liye
+"Queue" appointment bana deta hai (reception ko haath se add nahi karna).
+Har clinic ke liye ek INSERT ... SELECT (idx_appt_clinic_follow_up).
+
+Idempotent:
+- naya appointment follow_up_of_id = source appointment (unique)
+- patient ka us din pehle se appointment ho (manually book kiya) → skip
+
+    0 21 * * *  flask schedule-follow-ups          # kal ke follow-ups
+"""
+
+# clinic ne opening time set nahi kiya to
+DEFAULT_FOLLOW_UP_TIME = time(9, 0)
+
+INSERT_COLUMNS = (
+    "clinic_id", "patient_id", "type", "date", "time", "status",
+    "symptoms", "diagnosis", "advice", "lab_tests",
+    "is_deleted", "prescription_locked", "draft_revision",
+    "created_at", "follow_up_of_id",
+)
+
+
+def _due_follow_ups(clinic_id, start, end, now):
+    """
+    SELECT jo INSERT_COLUMNS order me nayi rows deta hai.
+    """
+    src = aliased(Appointment)
+    newer = aliased(Appointment)
+    made = aliased(Appointment)
+    booked = aliased(Appointment)
+
+    def live(appt):
+        return and_(appt.is_deleted == False, appt.status != "Cancelled")
+
+    return (
+        select(
+            src.clinic_id,
+            src.patient_id,
+            literal("Follow-up"),
+            src.follow_up_date,
+            func.coalesce(Clinic.opens_at, literal(DEFAULT_FOLLOW_UP_TIME, db.Time), type_=db.Time),
+            literal("Queue"),
+            literal(""),
+            literal(""),
+            literal(""),
+            literal(""),
+            literal(False),
+            literal(False),
+            literal(0),
+            literal(now, db.DateTime),
+            src.id,
+        )
+        .join(Patient, Patient.id == src.patient_id)
+        .join(Clinic, Clinic.id == src.clinic_id)
+        .where(
+            src.clinic_id == clinic_id,
+            src.follow_up_date >= start,
+            src.follow_up_date <= end,
+            live(src),
+            Patient.is_deleted == False,
+            # pehle hi bana chuke (rerun)
+            ~exists().where(made.follow_up_of_id == src.id),
+            # patient ka us din already appointment hai
+            ~exists().where(
+                booked.clinic_id == src.clinic_id,
+                booked.patient_id == src.patient_id,
+                booked.date == src.follow_up_date,
+                live(booked)
+            ),
+            # same patient + same date ke kai visits → sirf latest se ek
+            ~exists().where(
+                newer.clinic_id == src.clinic_id,
+                newer.patient_id == src.patient_id,
+                newer.follow_up_date == src.follow_up_date,
+                newer.id > src.id,
+                live(newer)
+            ),
+        )
+    )
+
+
+@click.command("schedule-follow-ups")
+@click.option("--date", "run_date", default=None,
+              help="YYYY-MM-DD to run as, default today.")
+@click.option("--days-ahead", default=1, show_default=True,
+              help="Schedule follow-ups due from --date up to this many days later.")
+@click.option("--dry-run", is_flag=True,
+              help="Only print how many appointments would be created.")
+@with_appcontext
+def schedule_follow_ups(run_date, days_ahead, dry_run):
+    try:
+        start = datetime.strptime(run_date, "%Y-%m-%d").date() if run_date else datetime.now().date()
+    except ValueError:
+        raise click.BadParameter("Use YYYY-MM-DD", param_hint="--date")
+
+    end = start + timedelta(days=max(days_ahead, 0))
+    now = datetime.utcnow()
+
+    clinic_ids = [row.id for row in db.session.query(Clinic.id).order_by(Clinic.id)]
+
+    total = 0
+    clinics = 0
+
+    # clinic-wise chhote transactions
+    for clinic_id in clinic_ids:
+        due = _due_follow_ups(clinic_id, start, end, now)
+
+        if dry_run:
+            count = db.session.execute(
+                select(func.count()).select_from(due.subquery())
+            ).scalar()
+        else:
+            try:
+                result = db.session.execute(
+                    insert(Appointment).from_select(INSERT_COLUMNS, due)
+                )
+                db.session.commit()
+                count = result.rowcount
+            except IntegrityError:
+                # saath me doosra run chal raha tha (follow_up_of_id unique) → agli baar
+                db.session.rollback()
+                click.echo(f"Clinic {clinic_id}: skipped, concurrent run", err=True)
+                continue
+
+        if count:
+            clinics += 1
+            total += count
+
+    verb = "would be created" if dry_run else "created"
+    click.echo(
+        f"{total} follow-up appointment(s) {verb} for {start} to {end} "
+        f"across {clinics} clinic(s)"
+    )
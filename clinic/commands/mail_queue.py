@@ -0,0 +1,132 @@
+import logging
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import exists, insert
+from clinic.extensions import db
+from clinic.mail_queue import mail_queue
+from clinic.models import Appointment, Clinic, OutboundMessage, Patient
+
+"""
+Mail queue worker + reminder batch.
+
+    flask mail-worker                 # hamesha chalta rahe (systemd / supervisor)
+    flask mail-worker --once          # queue khaali hone tak, phir exit (cron)
+    0 18 * * *  flask queue-reminders # kal ke appointments ke reminders
+"""
+
+logger = logging.getLogger(__name__)
+
+
+@click.command("mail-worker")
+@click.option("--once", is_flag=True, help="Drain the queue and exit.")
+@click.option("--interval", default=5.0, show_default=True,
+              help="Seconds to sleep when the queue is empty.")
+@with_appcontext
+def mail_worker(once, interval):
+    totals = {"sent": 0, "retried": 0, "deferred": 0}
+
+    try:
+        while True:
+            try:
+                stats = mail_queue.dispatch_batch()
+            except Exception:
+                # ek kharab batch se worker band nahi hona chahiye; claimed rows
+                # lease khatam hone pe dobara aati hain
+                logger.exception("mail batch failed")
+                db.session.rollback()
+                time.sleep(interval)
+                continue
+            for key in totals:
+                totals[key] += stats[key]
+
+            # sab deferred (rate limit) → turant dobara claim nahi
+            if stats["claimed"] and stats["claimed"] > stats["deferred"]:
+                continue
+            if once:
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+    click.echo(
+        f"Sent {totals['sent']}, retry scheduled {totals['retried']}, "
+        f"deferred {totals['deferred']}"
+    )
+
+
+@click.command("queue-reminders")
+@click.option("--date", "run_date", default=None,
+              help="Appointment date YYYY-MM-DD, default tomorrow.")
+@click.option("--chunk-size", default=500, show_default=True,
+              help="Messages inserted per statement.")
+@with_appcontext
+def queue_reminders(run_date, chunk_size):
+    try:
+        day = (
+            datetime.strptime(run_date, "%Y-%m-%d").date() if run_date
+            else datetime.now().date() + timedelta(days=1)
+        )
+    except ValueError:
+        raise click.BadParameter("Use YYYY-MM-DD", param_hint="--date")
+
+    # dedupe_key = "<kind>:<appointment id>" → rerun pe dobara queue nahi
+    rows = (
+        db.session.query(
+            Appointment.id, Appointment.clinic_id, Appointment.time, Appointment.type,
+            Appointment.follow_up_of_id, Patient.name, Patient.email, Clinic.name
+        )
+        .join(Patient, Patient.id == Appointment.patient_id)
+        .join(Clinic, Clinic.id == Appointment.clinic_id)
+        .filter(
+            Appointment.date == day,
+            Appointment.is_deleted == False,
+            Appointment.status == "Queue",
+            Patient.is_deleted == False,
+            Patient.email != None,
+            Patient.email != "",
+            ~exists().where(
+                OutboundMessage.dedupe_key.in_((
+                    "appointment_reminder:" + db.cast(Appointment.id, db.String),
+                    "follow_up_reminder:" + db.cast(Appointment.id, db.String),
+                ))
+            )
+        )
+        .order_by(Appointment.id)
+        .all()
+    )
+
+    now = datetime.utcnow()
+    messages = []
+    for appt_id, clinic_id, appt_time, visit_type, follow_up_of_id, patient_name, email, clinic_name in rows:
+        kind = (
+            "follow_up_reminder" if follow_up_of_id or visit_type == "Follow-up"
+            else "appointment_reminder"
+        )
+        what = "follow-up visit" if kind == "follow_up_reminder" else "appointment"
+
+        messages.append({
+            "clinic_id": clinic_id,
+            "kind": kind,
+            "recipient": email,
+            "subject": f"Reminder: your {what} at {clinic_name}",
+            "body": (
+                f"Dear {patient_name},\n\n"
+                f"This is a reminder of your {what} at {clinic_name} on "
+                f"{day.strftime('%d-%m-%Y')} at {appt_time.strftime('%I:%M %p')}.\n\n"
+                "Please contact the clinic if you need to reschedule."
+            ),
+            "dedupe_key": f"{kind}:{appt_id}",
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+        })
+
+    for start in range(0, len(messages), chunk_size):
+        db.session.execute(insert(OutboundMessage), messages[start:start + chunk_size])
+        db.session.commit()
+
+    click.echo(f"Queued {len(messages)} reminder(s) for {day}")
@@ -0,0 +1,26 @@
+import click
+from flask.cli import with_appcontext
+from clinic.extensions import db
+from clinic.patient_search import rebuild_search_index
+
+"""
+SQLite patient search tables (FTS5) ko patient table se dobara banao.
+Core bulk UPDATE / seed scripts model events skip karte hain — unke baad chalao:
+
+    flask rebuild-patient-search
+
+PostgreSQL pe kuch nahi karna (pg_trgm GIN index khud update hota hai).
+"""
+
+
+@click.command("rebuild-patient-search")
+@with_appcontext
+def rebuild_patient_search():
+    if db.engine.dialect.name != "sqlite":
+        click.echo("PostgreSQL keeps the pg_trgm indexes up to date, nothing to rebuild")
+        return
+
+    with db.engine.begin() as conn:
+        total = rebuild_search_index(conn)
+
+    click.echo(f"Indexed {total} patient(s)")
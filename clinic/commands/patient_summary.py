@@ -0,0 +1,51 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select
+from clinic.extensions import db
+from clinic.models import Patient
+from clinic.patient_summary import count_drifted, refresh_summaries
+
+"""
+patient_summary rows ko appointment / invoice / payment se dobara banao.
+Model events har ORM write pe khud refresh karte hain; ye drift repair ke
+liye hai (Core bulk writes, seed scripts, manual SQL, pehla deploy):
+
+    flask rebuild-patient-summary
+    flask rebuild-patient-summary --dry-run      sirf drift count
+
+Chhote chunks, har chunk ka apna transaction → beech me ruk jaaye to
+dobara chalao (idempotent). Sirf drifted chunks likhe jaate hain.
+"""
+
+
+@click.command("rebuild-patient-summary")
+@click.option("--chunk-size", default=1000, show_default=True,
+              help="Patients checked and refreshed per transaction.")
+@click.option("--dry-run", is_flag=True,
+              help="Only count the summaries that are missing or out of date.")
+@with_appcontext
+def rebuild_patient_summary(chunk_size, dry_run):
+    scanned = 0
+    drifted = 0
+    last_id = 0
+    while True:
+        with db.engine.begin() as conn:
+            ids = conn.execute(
+                select(Patient.id)
+                .where(Patient.id > last_id)
+                .order_by(Patient.id)
+                .limit(chunk_size)
+            ).scalars().all()
+            if not ids:
+                break
+
+            stale = count_drifted(conn, ids)
+            if stale and not dry_run:
+                refresh_summaries(conn, ids)
+
+        scanned += len(ids)
+        drifted += stale
+        last_id = ids[-1]
+
+    verb = "would be rebuilt" if dry_run else "rebuilt"
+    click.echo(f"{drifted} of {scanned} patient summary row(s) {verb}")
@@ -0,0 +1,305 @@
+import time
+from datetime import date
+from io import BytesIO
+
+import click
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.pdfgen import canvas
+
+from clinic.pdf_layout import letterhead, text_width, wrap
+from clinic.pdf_render import render_prescription
+
+"""
+PDF layout benchmark — DB nahi chahiye, synthetic prescription render hota hai.
+
+    flask pdf-benchmark --docs 200 --medicines 40
+    flask pdf-benchmark --docs 200 --medicines 40 --baseline
+
+Output: pages/sec + docs/sec + bytes/doc. --baseline purana (pdf_layout se
+pehle wala) renderer chalata hai → before/after same machine, same data.
+"""
+
+
+def _sample_prescription(medicines):
+    return {
+        "letterhead": {
+            "clinic_id": 1,
+            "name": "Sharma Clinic",
+            "subtitle": "General Physician",
+            "address": "12 MG Road, Jaipur - 302001 | Ph: 9876543210",
+        },
+        "visit": {
+            "type": "Walk-in",
+            "bp": "120/80",
+            "pulse": "72",
+            "spo2": "98",
+            "temperature": "98.6",
+            "weight": "70",
+            "symptoms": "fever, cold, cough, headache",
+            "diagnosis": "viral fever",
+            "lab_tests": "CBC\nLFT\nKFT",
+            "advice": "rest, fluids, steam inhalation twice a day",
+            "follow_up_date": date(2026, 11, 1),
+        },
+        "patient": {"name": "Ravi Kumar", "age": 40, "gender": "M", "patient_no": "P-0001"},
+        "items": [
+            {
+                "medicine_name": f"Medicine {i}",
+                "dose": "1-0-1",
+                "duration_days": 5,
+                "instructions": "after food",
+            }
+            for i in range(medicines)
+        ],
+        "doctor_name": "Dr. Sharma",
+        "date_str": "18-10-2026",
+    }
+
+
+def _render_legacy(data):
+    """
+    --baseline: e3a1e2e se pehle wala render_prescription, jaisa tha waisa
+    (inline setFont + check_space, compression 0). Sirf comparison ke liye.
+    """
+    visit = data["visit"]
+    patient = data["patient"]
+    items = data["items"]
+    doctor_name = data["doctor_name"]
+    date_str = data["date_str"]
+
+    # ---------------- PDF SETUP ----------------
+    buffer = BytesIO()
+    # invariant → same data = same bytes (cache / ETag stable)
+    pdf = canvas.Canvas(buffer, pagesize=A4, invariant=True)
+
+    width, height = A4
+
+    LEFT = 2 * cm
+    RIGHT = width - 2 * cm
+    TOP = height - 2 * cm
+    BOTTOM = 2 * cm
+
+    y = TOP
+    pdf.setFont("Helvetica", 11)
+
+    def new_page():
+        nonlocal y
+        pdf.setFont("Helvetica", 9)
+        pdf.drawRightString(RIGHT, BOTTOM - 10, f"Page {pdf.getPageNumber()}")
+        pdf.showPage()
+        pdf.setFont("Helvetica", 11)
+        y = TOP
+
+    def check_space(space=80):
+        nonlocal y
+        if y < BOTTOM + space:
+            new_page()
+
+    # ---------------- CLINIC HEADER ----------------
+    pdf.setFont("Helvetica-Bold", 18)
+    pdf.drawCentredString(width / 2, y, "YOUR CLINIC NAME")
+    y -= 22
+
+    pdf.setFont("Helvetica", 11)
+    pdf.drawCentredString(width / 2, y, "General Physician | Reg No: XXXXX")
+    y -= 16
+
+    pdf.drawCentredString(
+        width / 2,
+        y,
+        "Address Line 1, City - Pincode | Ph: 9XXXXXXXXX"
+    )
+    y -= 20
+
+    pdf.line(LEFT, y, RIGHT, y)
+    y -= 25
+
+    pdf.setFont("Helvetica-Bold", 11)
+    pdf.drawString(LEFT, y, f"Doctor: {doctor_name}")
+    pdf.drawRightString(RIGHT, y, f"Date: {date_str}")
+    y -= 25
+
+    # ---------------- PATIENT DETAILS ----------------
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(LEFT, y, "Patient Details")
+    y -= 14
+
+    pdf.setFont("Helvetica", 11)
+    pdf.drawString(LEFT, y, f"Name: {patient['name']}")
+    pdf.drawString(10 * cm, y, f"Age/Gender: {patient['age']} / {patient['gender']}")
+    y -= 14
+
+    pdf.drawString(LEFT, y, f"Patient ID: {patient['patient_no']}")
+    pdf.drawRightString(RIGHT, y, f"Visit Type: {visit['type']}")
+    y -= 20
+
+    # ---------------- VITALS ----------------
+    vitals = [
+        ("BP", visit["bp"]),
+        ("Pulse", visit["pulse"]),
+        ("SpO2", visit["spo2"]),
+        ("Temperature", visit["temperature"]),
+        ("Weight", visit["weight"]),
+    ]
+
+    if any(v for _, v in vitals):
+        check_space()
+        pdf.setFont("Helvetica-Bold", 12)
+        pdf.drawString(LEFT, y, "Vitals")
+        y -= 16
+
+        pdf.setFont("Helvetica", 11)
+        for label, value in vitals:
+            if value:
+                pdf.drawString(LEFT + 5, y, f"{label}: {value}")
+                y -= 14
+        y -= 10
+
+    # ---------------- SYMPTOMS ----------------
+    if visit["symptoms"]:
+        check_space()
+        pdf.setFont("Helvetica-Bold", 12)
+        pdf.drawString(LEFT, y, "Symptoms")
+        y -= 16
+
+        pdf.setFont("Helvetica", 11)
+        for s in visit["symptoms"].split(","):
+            pdf.drawString(LEFT + 5, y, f"- {s.strip()}")
+            y -= 14
+        y -= 10
+
+    # ---------------- DIAGNOSIS ----------------
+    if visit["diagnosis"]:
+        check_space()
+        pdf.setFont("Helvetica-Bold", 12)
+        pdf.drawString(LEFT, y, "Diagnosis")
+        y -= 16
+
+        pdf.setFont("Helvetica", 11)
+        for d in visit["diagnosis"].split(","):
+            pdf.drawString(LEFT + 5, y, f"- {d.strip()}")
+            y -= 14
+        y -= 10
+
+    # ---------------- LAB TESTS ----------------
+    if visit["lab_tests"]:
+        check_space()
+        pdf.setFont("Helvetica-Bold", 12)
+        pdf.drawString(LEFT, y, "Lab Tests")
+        y -= 16
+
+        pdf.setFont("Helvetica", 11)
+        for line in visit["lab_tests"].split("\n"):
+            pdf.drawString(LEFT + 5, y, f"- {line.strip()}")
+            y -= 14
+        y -= 10
+
+    # ---------------- RX ----------------
+    check_space()
+    pdf.setFont("Helvetica-Bold", 16)
+    pdf.drawString(LEFT, y, "℞")
+    y -= 18
+
+    # ---------------- MEDICINES ----------------
+    check_space()
+    pdf.setFont("Helvetica-Bold", 11)
+    pdf.drawString(LEFT, y, "Medicine")
+    pdf.drawString(8.5 * cm, y, "Dose")
+    pdf.drawString(11.5 * cm, y, "Duration")
+    pdf.drawString(14 * cm, y, "Instructions")
+    y -= 10
+
+    pdf.line(LEFT, y, RIGHT, y)
+    y -= 10
+
+    pdf.setFont("Helvetica", 11)
+
+    if items:
+        for item in items:
+            check_space()
+            pdf.drawString(LEFT, y, item["medicine_name"])
+            pdf.drawString(8.5 * cm, y, item["dose"] or "-")
+            pdf.drawString(11.5 * cm, y, f"{item['duration_days'] or '-'} days")
+            pdf.drawString(14 * cm, y, item["instructions"] or "-")
+            y -= 14
+    else:
+        pdf.drawString(LEFT, y, "No medicines prescribed")
+        y -= 14
+
+    y -= 10
+
+    # ---------------- ADVICE ----------------
+    if visit["advice"]:
+        check_space()
+        pdf.setFont("Helvetica-Bold", 12)
+        pdf.drawString(LEFT, y, "Advice")
+        y -= 14
+
+        pdf.setFont("Helvetica", 11)
+        for idx, a in enumerate(visit["advice"].split(","), start=1):
+            pdf.drawString(LEFT + 5, y, f"{idx}. {a.strip()}")
+            y -= 14
+        y -= 10
+
+    # ---------------- FOLLOW UP ----------------
+    if visit["follow_up_date"]:
+        check_space()
+        pdf.setFont("Helvetica-Bold", 11)
+        pdf.drawString(LEFT, y, "Follow-up On:")
+        pdf.setFont("Helvetica", 11)
+        pdf.drawString(LEFT + 80, y, visit["follow_up_date"].strftime("%d-%m-%Y"))
+        y -= 20
+
+    # ---------------- FOOTER ----------------
+    check_space(60)
+    pdf.line(LEFT, y, RIGHT, y)
+    y -= 12
+
+    pdf.setFont("Helvetica", 9)
+    pdf.drawString(
+        LEFT,
+        y,
+        "This is a computer-generated prescription and is valid without a physical signature."
+    )
+
+    pdf.drawRightString(
+        RIGHT,
+        y,
+        "Powered by Clinic Management System"
+    )
+
+    # ---------------- FINALIZE ----------------
+    pdf.setPageCompression(0)
+    pdf.save()
+    return buffer.getvalue()
+
+
+@click.command("pdf-benchmark")
+@click.option("--docs", default=200, show_default=True, help="Prescriptions to render.")
+@click.option("--medicines", default=40, show_default=True, help="Medicines per prescription.")
+@click.option("--baseline", is_flag=True, help="Render with the pre-pdf_layout renderer.")
+def pdf_benchmark(docs, medicines, baseline):
+    data = _sample_prescription(medicines)
+    render = _render_legacy if baseline else render_prescription
+
+    # cold caches → pehla run bhi fair
+    for cached in (text_width, wrap, letterhead):
+        cached.cache_clear()
+
+    pages = 0
+    size = 0
+    started = time.perf_counter()
+
+    for _ in range(docs):
+        pdf_bytes = render(data)
+        pages += pdf_bytes.count(b"/Type /Page\n")
+        size = len(pdf_bytes)
+
+    elapsed = time.perf_counter() - started
+
+    click.echo(
+        f"{'baseline' if baseline else 'current'}: {docs} docs, {pages} pages in {elapsed:.2f}s → "
+        f"{pages / elapsed:.1f} pages/sec, {docs / elapsed:.1f} docs/sec "
+        f"({size} bytes/doc)"
+    )
@@ -0,0 +1,48 @@
+import click
+from flask.cli import with_appcontext
+from clinic.pdf_cache import pdf_cache
+
+"""
+Rendered PDF cache (instance/pdf_cache) ka size / age bound (cron, roz):
+
+    flask pdf-cache prune                          # config wale limits
+    flask pdf-cache prune --max-mb 200 --max-age-days 30
+    flask pdf-cache status
+
+Hati hui file agli download pe dobara render ho jaati hai.
+"""
+
+
+@click.group("pdf-cache")
+def pdf_cache_cli():
+    """Rendered prescription PDF cache maintenance."""
+
+
+@pdf_cache_cli.command("prune")
+@click.option("--max-mb", type=int, default=None,
+              help="Size bound in MB (default: PDF_CACHE_MAX_BYTES, 0 = no limit).")
+@click.option("--max-age-days", type=int, default=None,
+              help="Drop files unused for this many days (default: PDF_CACHE_MAX_AGE_DAYS).")
+@with_appcontext
+def prune(max_mb, max_age_days):
+    max_bytes = None if max_mb is None else max_mb * 1024 * 1024
+    result = pdf_cache.prune(max_bytes=max_bytes, max_age_days=max_age_days)
+    click.echo(
+        f"Removed {result['removed']} file(s), freed {_mb(result['freed'])}; "
+        f"{result['kept']} file(s), {_mb(result['kept_bytes'])} left"
+    )
+
+
+@pdf_cache_cli.command("status")
+@with_appcontext
+def status():
+    count, size = pdf_cache.usage()
+    click.echo(
+        f"{count} file(s), {_mb(size)} in {pdf_cache.directory} "
+        f"(limit {_mb(pdf_cache.max_bytes) if pdf_cache.max_bytes else 'none'}, "
+        f"max age {pdf_cache.max_age_days or 'none'} days)"
+    )
+
+
+def _mb(size):
+    return f"{size / (1024 * 1024):.1f} MB"
@@ -0,0 +1,62 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, update
+from clinic.extensions import db
+from clinic.models import Patient
+from clinic.phones import normalize_phone, reversed_digits
+
+"""
+Purane patients ke phone E.164 me + phone_rev bharo (naye rows model
+validator khud karta hai). Chhote chunks, har chunk ka apna commit →
+lambe locks nahi, beech me ruk jaaye to dobara chalao (idempotent).
+
+    flask normalize-phones
+    flask normalize-phones --chunk-size 500 --dry-run
+"""
+
+
+@click.command("normalize-phones")
+@click.option("--chunk-size", default=1000, show_default=True,
+              help="Patients read and updated per transaction.")
+@click.option("--dry-run", is_flag=True,
+              help="Only count the rows that would change.")
+@with_appcontext
+def normalize_phones(chunk_size, dry_run):
+    table = Patient.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("pid"))
+        .values(phone=bindparam("new_phone"), phone_rev=bindparam("new_rev"))
+    )
+
+    scanned = 0
+    changed = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            table.select()
+            .with_only_columns(table.c.id, table.c.phone, table.c.phone_rev)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+
+        updates = []
+        for pid, phone, phone_rev in rows:
+            new_phone = normalize_phone(phone)
+            new_rev = reversed_digits(new_phone)
+            if (new_phone, new_rev) != (phone, phone_rev):
+                updates.append({"pid": pid, "new_phone": new_phone, "new_rev": new_rev})
+
+        if updates and not dry_run:
+            db.session.execute(stmt, updates)
+        db.session.commit()
+
+        scanned += len(rows)
+        changed += len(updates)
+        last_id = rows[-1].id
+
+    verb = "would be updated" if dry_run else "updated"
+    click.echo(f"{changed} of {scanned} patient phone(s) {verb}")
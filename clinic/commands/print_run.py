@@ -0,0 +1,33 @@
+import click
+from flask.cli import with_appcontext
+
+from clinic.pdf_render import render_prescription_batch
+from clinic.print_run import load_print_run, parse_run_dates
+
+"""
+Day-end print run from the shell (same PDF as /prescriptions/print-run):
+
+    flask print-prescriptions --clinic-id 3 --start 2026-10-18 --out day.pdf
+"""
+
+
+@click.command("print-prescriptions")
+@click.option("--clinic-id", type=int, required=True)
+@click.option("--start", default=None, help="YYYY-MM-DD, default today.")
+@click.option("--end", default=None, help="YYYY-MM-DD, default same as --start.")
+@click.option("--out", type=click.Path(dir_okay=False, writable=True), required=True,
+              help="Output PDF file.")
+@with_appcontext
+def print_prescriptions(clinic_id, start, end, out):
+    try:
+        start_date, end_date = parse_run_dates(start, end)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    items = load_print_run(clinic_id, start_date, end_date)
+    if not items:
+        click.echo("No finalized prescriptions for the selected dates")
+        return
+
+    pages = render_prescription_batch(items, out)
+    click.echo(f"Wrote {len(items)} prescription(s), {pages} page(s) to {out}")
@@ -0,0 +1,92 @@
+import click
+from datetime import datetime
+from flask.cli import with_appcontext
+from sqlalchemy import and_, or_, update
+from clinic.extensions import db
+from clinic.models import Clinic, Subscription
+from clinic.subscription_cache import subscription_cache
+
+"""
+Trial / paid subscription expiry — batch job.
+
+Request path sirf read karta hai (is_clinic_active dates dekhta hai).
+DB me status = "expired" yahi job likhta hai. Cron / scheduler se chalao:
+
+    */15 * * * *  flask expire-subscriptions
+"""
+
+
+def _lapsed_clinic_filter(now):
+    return or_(
+        # trial khatam
+        and_(
+            Clinic.subscription_status == "trial",
+            or_(Clinic.trial_ends_at == None, Clinic.trial_ends_at < now)
+        ),
+        # paid plan ki validity khatam
+        and_(
+            Clinic.subscription_status == "active",
+            Clinic.subscription_ends_at != None,
+            Clinic.subscription_ends_at < now
+        ),
+    )
+
+
+@click.command("expire-subscriptions")
+@click.option("--chunk-size", default=500, show_default=True,
+              help="Clinics updated per transaction.")
+@click.option("--dry-run", is_flag=True,
+              help="Only print how many clinics would expire.")
+@with_appcontext
+def expire_subscriptions(chunk_size, dry_run):
+    now = datetime.utcnow()
+    lapsed = _lapsed_clinic_filter(now)
+
+    if dry_run:
+        count = db.session.query(db.func.count(Clinic.id)).filter(lapsed).scalar()
+        click.echo(f"{count} clinic(s) would be expired")
+        return
+
+    total = 0
+    last_id = 0
+
+    # Keyset chunks → chhote transactions, clinic table pe lamba lock nahi
+    while True:
+        ids = [
+            row.id for row in
+            db.session.query(Clinic.id)
+            .filter(lapsed, Clinic.id > last_id)
+            .order_by(Clinic.id)
+            .limit(chunk_size)
+        ]
+        if not ids:
+            break
+
+        last_id = ids[-1]
+
+        result = db.session.execute(
+            update(Clinic)
+            .where(Clinic.id.in_(ids), lapsed)   # re-check: beech me renew ho gaya ho to skip
+            .values(subscription_status="expired")
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        # Core UPDATE ORM events fire nahi karta → cache khud saaf karo
+        subscription_cache.invalidate(*ids)
+        total += result.rowcount
+
+    # Subscription history rows bhi mark karo
+    result = db.session.execute(
+        update(Subscription)
+        .where(
+            Subscription.status == "active",
+            Subscription.ends_at != None,
+            Subscription.ends_at < now
+        )
+        .values(status="expired")
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+    click.echo(f"Expired {total} clinic(s), {result.rowcount} subscription record(s)")
@@ -0,0 +1,420 @@
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session, object_session
+
+from clinic.extensions import db
+from clinic.models import Appointment
+from clinic.patient_summary import refresh_summaries
+
+"""
+CONSULTATION DRAFT STORE (WRITE-BEHIND)
+
+Autosave ab appointment row ko har keystroke pe nahi likhta. Latest draft
+per appointment yahan rehta hai:
+
+- in-process dict  → hot path, DB round trip nahi
+- SQLite journal   → crash safe + same machine ke sab workers ek hi draft
+  dekhte hain (revision pe compare-and-set)
+
+Appointment table me draft tab jaata hai jab:
+- background flusher chale (DRAFT_FLUSH_INTERVAL)
+- consult POST / finalize_prescription / complete (apply() → caller ka commit)
+
+Flusher raw Core UPDATE likhta hai → ORM after_flush / after_commit hooks
+nahi chalte. Isliye:
+- patient_summary: flush usi transaction me likhe gaye appointments ke
+  patients ki summary refresh karta hai (diagnosis draft field hai, aur
+  status route se Completed hua appointment unlocked reh sakta hai)
+- live_events / slots: unke WATCHED_FIELDS (status, date, time, type,
+  is_deleted) DRAFT_FIELDS me nahi hain → flush se board / occupancy pe
+  koi asar nahi. follow_up_date sirf consult + follow-up scheduler padhte
+  hain, dono DB se. Naya draft field in hooks ka watched field ho to
+  flush path me uska fan-out bhi jodna padega.
+
+Flusher lazy hai → pehle save() pe shuru hota hai (har process / gunicorn
+worker me alag). `flask db upgrade`, mail-worker, audit-log maintain jaise
+CLI commands draft nahi likhte → na thread, na exit pe flush. Crash se
+pehle ke journal entries kisi bhi worker ke pehle autosave ke baad wale
+flush me DB me chale jaate hain (flush poora journal padhta hai); tab tak
+consult / finalize unhe apply() se lagate hain.
+"""
+
+logger = logging.getLogger(__name__)
+
+DRAFT_FIELDS = [
+    "symptoms", "diagnosis", "advice", "lab_tests",
+    "bp", "pulse", "spo2", "temperature", "weight",
+    "follow_up_date"
+]
+
+Draft = namedtuple("Draft", ("appointment_id", "clinic_id", "revision", "fields"))
+
+
+def parse_draft_value(field, value):
+    """
+    Raises ValueError for an invalid follow_up_date.
+    """
+    if field == "follow_up_date":
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+    return value
+
+
+def draft_values(appt):
+    values = {f: getattr(appt, f) for f in DRAFT_FIELDS}
+    if values["follow_up_date"]:
+        values["follow_up_date"] = values["follow_up_date"].strftime("%Y-%m-%d")
+    return values
+
+
+class DraftStore:
+    """
+    Config:
+        DRAFT_STORE_PATH       sqlite journal (default instance folder)
+        DRAFT_FLUSH_ASYNC      background flusher (pehle save pe), default True (TESTING me False)
+        DRAFT_FLUSH_INTERVAL   seconds, default 30
+        DRAFT_IDLE_SECONDS     flushed + idle drafts itne baad journal se hatao, default 3600
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.path = None
+        self.enabled = False
+        self.flush_interval = 30
+        self.idle_seconds = 3600
+        self._memory = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._writer_pid = None
+        self._stop = threading.Event()
+        self._atexit_registered = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.path = app.config.setdefault(
+            "DRAFT_STORE_PATH",
+            os.path.join(app.instance_path, "consult_drafts.db")
+        )
+        self.enabled = app.config.setdefault("DRAFT_FLUSH_ASYNC", not app.testing)
+        self.flush_interval = app.config.setdefault("DRAFT_FLUSH_INTERVAL", 30)
+        self.idle_seconds = app.config.setdefault("DRAFT_IDLE_SECONDS", 3600)
+
+        app.extensions["draft_store"] = self
+
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)   # band hone se pehle DB me likh do
+            # parent ka lock / thread child me kaam ke nahi
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+            self._atexit_registered = True
+
+    # -----------------------------
+    # JOURNAL
+    # -----------------------------
+    def _conn(self):
+        # fork ke baad parent ka sqlite connection use nahi karna
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS drafts ("
+                " appointment_id INTEGER PRIMARY KEY,"
+                " clinic_id INTEGER NOT NULL,"
+                " revision INTEGER NOT NULL,"
+                " flushed_revision INTEGER NOT NULL,"
+                " fields TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _read(self, appointment_id):
+        row = self._conn().execute(
+            "SELECT clinic_id, revision, fields FROM drafts WHERE appointment_id = ?",
+            (appointment_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return Draft(appointment_id, row[0], row[1], json.loads(row[2]))
+
+    # -----------------------------
+    # PUBLIC
+    # -----------------------------
+    def get(self, appointment_id, fresh=False):
+        """
+        Latest draft or None. fresh=True → memory skip karke journal padho
+        (dusre worker ne save kiya ho sakta hai).
+        """
+        if not fresh:
+            draft = self._memory.get(appointment_id)
+            if draft is not None:
+                return draft
+
+        draft = self._read(appointment_id)
+        with self._lock:
+            if draft is None:
+                self._memory.pop(appointment_id, None)
+            else:
+                self._memory[appointment_id] = draft
+        return draft
+
+    def seed(self, appt):
+        """
+        Appointment row se draft shuru karo (pehla autosave).
+        Journal me pehle se ho to wahi return hota hai.
+        """
+        revision = appt.draft_revision or 0
+        self._conn().execute(
+            "INSERT OR IGNORE INTO drafts"
+            " (appointment_id, clinic_id, revision, flushed_revision, fields, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (appt.id, appt.clinic_id, revision, revision,
+             json.dumps(draft_values(appt)), time.time())
+        )
+        return self.get(appt.id, fresh=True)
+
+    def save(self, draft, changes):
+        """
+        Compare-and-set on draft.revision.
+        Returns the new Draft, or None if someone else saved first.
+        """
+        fields = dict(draft.fields, **changes)
+        revision = draft.revision + 1
+
+        cur = self._conn().execute(
+            "UPDATE drafts SET revision = ?, fields = ?, updated_at = ?"
+            " WHERE appointment_id = ? AND revision = ?",
+            (revision, json.dumps(fields), time.time(),
+             draft.appointment_id, draft.revision)
+        )
+
+        if cur.rowcount == 0:
+            with self._lock:
+                self._memory.pop(draft.appointment_id, None)
+            return None
+
+        saved = Draft(draft.appointment_id, draft.clinic_id, revision, fields)
+        with self._lock:
+            self._memory[draft.appointment_id] = saved
+
+        self._writer_pid = os.getpid()
+
+        if self.enabled:
+            self._ensure_thread()
+        return saved
+
+    def apply(self, appt, drop=True):
+        """
+        Pending draft ko appt (ORM object) pe laga do — caller ka commit hi
+        DB write hai. Commit ke baad journal entry hat jaati hai (drop=True)
+        ya flushed mark hoti hai.
+
+        Returns True if appt attributes changed.
+        """
+        draft = self.get(appt.id, fresh=True)
+        if draft is None or draft.clinic_id != appt.clinic_id:
+            return False
+
+        session = object_session(appt)
+        if session is not None:
+            session.info.setdefault(_PENDING_KEY, {})[appt.id] = (draft.revision, drop)
+
+        # DB pehle se aage hai (consult POST / flusher) → kuch nahi lagana
+        if draft.revision <= (appt.draft_revision or 0):
+            return False
+
+        for field, value in draft.fields.items():
+            try:
+                setattr(appt, field, parse_draft_value(field, value))
+            except (TypeError, ValueError):
+                continue
+
+        appt.draft_revision = draft.revision
+        return True
+
+    def flush(self):
+        """
+        Sab unflushed drafts appointment table me likho (ek transaction).
+        Locked / deleted / DB-me-naya appointments ke drafts drop ho jaate hain.
+        """
+        if self.app is None:
+            return
+
+        rows = self._conn().execute(
+            "SELECT appointment_id, clinic_id, revision, fields FROM drafts"
+            " WHERE revision > flushed_revision"
+        ).fetchall()
+
+        written, stale = [], []
+
+        if rows:
+            try:
+                with self.app.app_context():
+                    with db.engine.begin() as conn:
+                        for appointment_id, clinic_id, revision, raw in rows:
+                            values = {}
+                            for field, value in json.loads(raw).items():
+                                try:
+                                    values[field] = parse_draft_value(field, value)
+                                except (TypeError, ValueError):
+                                    continue
+
+                            result = conn.execute(
+                                update(Appointment.__table__)
+                                .where(
+                                    Appointment.id == appointment_id,
+                                    Appointment.clinic_id == clinic_id,
+                                    db.func.coalesce(Appointment.prescription_locked, False) == False,
+                                    db.func.coalesce(Appointment.draft_revision, 0) <= revision
+                                )
+                                .values(draft_revision=revision, **values)
+                            )
+                            (written if result.rowcount else stale).append((appointment_id, revision))
+
+                        if written:
+                            patient_ids = conn.execute(
+                                select(Appointment.patient_id)
+                                .where(Appointment.id.in_([i for i, _ in written]))
+                            ).scalars().all()
+                            refresh_summaries(conn, patient_ids)
+            except Exception:
+                # journal me safe hai, agle round me phir try
+                logger.warning("draft flush failed (%d drafts)", len(rows), exc_info=True)
+                return
+
+        self._mark_flushed(written)
+        self._drop(stale)
+        self._evict_idle()
+
+    def shutdown(self, timeout=5):
+        # is process ne draft nahi likha (CLI commands) → DB ko haath nahi
+        if self._writer_pid != os.getpid():
+            return
+
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout)
+        try:
+            self.flush()
+        except Exception:
+            logger.warning("draft flush on shutdown failed", exc_info=True)
+
+    # -----------------------------
+    # INTERNALS
+    # -----------------------------
+    def _mark_flushed(self, items):
+        if items:
+            self._conn().executemany(
+                "UPDATE drafts SET flushed_revision = MAX(flushed_revision, ?)"
+                " WHERE appointment_id = ?",
+                [(revision, appointment_id) for appointment_id, revision in items]
+            )
+
+    def _drop(self, items):
+        if not items:
+            return
+
+        # beech me aaya naya autosave (revision > flushed) bacha rehna chahiye
+        self._conn().executemany(
+            "DELETE FROM drafts WHERE appointment_id = ? AND revision <= ?",
+            items
+        )
+        with self._lock:
+            for appointment_id, _ in items:
+                self._memory.pop(appointment_id, None)
+
+    def _evict_idle(self):
+        cutoff = time.time() - self.idle_seconds
+        conn = self._conn()
+        ids = [
+            row[0] for row in conn.execute(
+                "SELECT appointment_id FROM drafts"
+                " WHERE revision = flushed_revision AND updated_at < ?",
+                (cutoff,)
+            )
+        ]
+        if not ids:
+            return
+
+        conn.executemany(
+            "DELETE FROM drafts WHERE appointment_id = ? AND revision = flushed_revision",
+            [(i,) for i in ids]
+        )
+        with self._lock:
+            for appointment_id in ids:
+                self._memory.pop(appointment_id, None)
+
+    def _reset_after_fork(self):
+        # parent ka lock fork ke waqt pakda ho sakta tha
+        # thread child ke pehle save() pe
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _ensure_thread(self):
+        # gunicorn fork ke baad parent ka thread child me nahi hota
+        if self._thread is not None and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="draft-flusher",
+                daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.warning("draft flusher error", exc_info=True)
+
+
+draft_store = DraftStore()
+
+
+# -----------------------------
+# COMMIT HOOKS
+# -----------------------------
+_PENDING_KEY = "draft_store_pending"
+
+
+@event.listens_for(Session, "after_commit")
+def _settle_applied_drafts(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    try:
+        draft_store._drop([(i, rev) for i, (rev, drop) in pending.items() if drop])
+        draft_store._mark_flushed([(i, rev) for i, (rev, drop) in pending.items() if not drop])
+    except Exception:
+        # flusher stale drafts khud drop kar dega (DB revision aage hai)
+        logger.warning("draft journal cleanup failed", exc_info=True)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
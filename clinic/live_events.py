@@ -0,0 +1,126 @@
+import json
+import queue
+import threading
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from clinic.models import Appointment
+
+"""
+LIVE QUEUE BOARD EVENTS
+
+Appointment ka status / date / delete commit hote hi ek chhota event
+in-process broker pe publish hota hai. /appointments/stream (SSE) wale
+subscribers sirf apni clinic ke events paate hain.
+
+Broker sirf is worker ka hai — dusre gunicorn workers ke commits SSE
+stream ke local polling fallback se pakde jaate hain.
+"""
+
+WATCHED_FIELDS = ("status", "date", "is_deleted")
+
+
+class EventBroker:
+    """
+    clinic_id → set of subscriber queues.
+    Slow subscriber ki queue full ho to event drop (poll resync kar lega).
+    """
+
+    def __init__(self, maxsize=200):
+        self.maxsize = maxsize
+        self._subs = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, clinic_id):
+        q = queue.Queue(maxsize=self.maxsize)
+        with self._lock:
+            self._subs.setdefault(clinic_id, set()).add(q)
+        return q
+
+    def unsubscribe(self, clinic_id, q):
+        with self._lock:
+            subs = self._subs.get(clinic_id)
+            if subs:
+                subs.discard(q)
+                if not subs:
+                    del self._subs[clinic_id]
+
+    def publish(self, clinic_id, payload):
+        with self._lock:
+            subs = list(self._subs.get(clinic_id, ()))
+
+        for q in subs:
+            try:
+                q.put_nowait(payload)
+            except queue.Full:
+                pass
+
+
+broker = EventBroker()
+
+
+def format_sse(payload, event_name="status"):
+    return f"event: {event_name}\ndata: {json.dumps(payload)}\n\n"
+
+
+# -----------------------------
+# COMMIT HOOKS
+# -----------------------------
+_PENDING_KEY = "live_events_pending"
+
+
+def _history_old(state, field):
+    hist = state.attrs[field].history
+    return hist.deleted[0] if hist.deleted else getattr(state.obj(), field)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_appointment_changes(session, flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, {})
+
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Appointment):
+            continue
+
+        state = inspect(obj)
+        is_new = obj in session.new
+        if not is_new and not any(state.attrs[f].history.has_changes() for f in WATCHED_FIELDS):
+            continue
+
+        # ek transaction me kai flush → pehla "old" hi sahi hai
+        first = pending.get(obj.id)
+        if first:
+            old_status, old_date = first["old_status"], first["old_date"]
+        elif is_new or _history_old(state, "is_deleted"):
+            old_status, old_date = None, None
+        else:
+            old_status = _history_old(state, "status")
+            old_date = _history_old(state, "date")
+            old_date = old_date.isoformat() if old_date else None
+
+        pending[obj.id] = {
+            "clinic_id": obj.clinic_id,
+            "id": obj.id,
+            "old_status": old_status,
+            "old_date": old_date,
+            "status": None if obj.is_deleted else obj.status,
+            "date": obj.date.isoformat() if obj.date else None,
+        }
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    for payload in pending.values():
+        if (payload["old_status"], payload["old_date"]) == (payload["status"], payload["date"]):
+            continue
+        broker.publish(payload["clinic_id"], payload)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
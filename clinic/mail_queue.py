@@ -0,0 +1,226 @@
+import logging
+import smtplib
+import socket
+from datetime import datetime, timedelta
+
+from flask_mail import Message
+from sqlalchemy import func, select, update
+
+from clinic.extensions import db, mail
+from clinic.models import OutboundMessage
+
+"""
+OUTBOUND MAIL QUEUE
+
+Request path ab SMTP se baat nahi karta: enqueue() sirf ek outbound_message
+row add karta hai (caller ke commit ke saath). `flask mail-worker` rows
+uthata hai aur ek SMTP connection pe poora batch bhejta hai.
+
+- claim: status = "sending" + lease (next_attempt_at); worker crash ho to
+  lease khatam hone pe message phir se pending jaisa dikhta hai
+- retry: attempts badhte hain, backoff = base * 2^(attempts-1), max ke baad "failed"
+- per-clinic rate limit: pichle 60 sec me bheje gaye mails (clinic_id, sent_at)
+- SMTP connection hi toot jaaye / login fail ho (auth, HELO) → baaki batch
+  bina attempt gine baad me, error log
+"""
+
+logger = logging.getLogger(__name__)
+
+# ye errors message ki nahi, connection ki galti hain
+CONNECTION_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    ConnectionError,
+    TimeoutError,
+    socket.gaierror,
+)
+
+
+# security mails clinic ke reminder volume ke peeche nahi rukte
+RATE_LIMIT_EXEMPT = {"password_reset"}
+
+
+class MailQueue:
+    """
+    Config:
+        MAIL_QUEUE_BATCH_SIZE         messages per SMTP connection, default 50
+        MAIL_QUEUE_MAX_ATTEMPTS       iske baad status = failed, default 5
+        MAIL_QUEUE_RETRY_BASE         seconds, default 60
+        MAIL_QUEUE_CLINIC_PER_MINUTE  per clinic send limit, default 30
+        MAIL_QUEUE_LEASE              seconds, claimed message ek worker ke paas, default 300
+    """
+
+    def __init__(self, app=None):
+        self.batch_size = 50
+        self.max_attempts = 5
+        self.retry_base = 60
+        self.clinic_per_minute = 30
+        self.lease = 300
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.batch_size = app.config.setdefault("MAIL_QUEUE_BATCH_SIZE", 50)
+        self.max_attempts = app.config.setdefault("MAIL_QUEUE_MAX_ATTEMPTS", 5)
+        self.retry_base = app.config.setdefault("MAIL_QUEUE_RETRY_BASE", 60)
+        self.clinic_per_minute = app.config.setdefault("MAIL_QUEUE_CLINIC_PER_MINUTE", 30)
+        self.lease = app.config.setdefault("MAIL_QUEUE_LEASE", 300)
+
+        app.extensions["mail_queue"] = self
+
+    # -----------------------------
+    # PUBLIC
+    # -----------------------------
+    def enqueue(self, recipient, subject, body, kind, clinic_id=None, dedupe_key=None):
+        """
+        Sirf db.session.add — commit caller karega (usi transaction me).
+        """
+        message = OutboundMessage(
+            clinic_id=clinic_id,
+            kind=kind,
+            recipient=recipient,
+            subject=subject,
+            body=body,
+            dedupe_key=dedupe_key,
+            status="pending",
+            attempts=0,
+            next_attempt_at=datetime.utcnow()
+        )
+        db.session.add(message)
+        return message
+
+    def dispatch_batch(self):
+        """
+        Ek batch claim + send. Returns {"claimed", "sent", "retried", "deferred"}.
+        """
+        now = datetime.utcnow()
+        batch = self._claim(now)
+        stats = {"claimed": len(batch), "sent": 0, "retried": 0, "deferred": 0}
+        if not batch:
+            return stats
+
+        to_send = []
+        limited = [m for m in batch if m.clinic_id is not None and m.kind not in RATE_LIMIT_EXEMPT]
+        allowance = self._allowance({m.clinic_id for m in limited}, now)
+
+        for message in batch:
+            if message.clinic_id is not None and message.kind not in RATE_LIMIT_EXEMPT:
+                if allowance[message.clinic_id] <= 0:
+                    # limit poori → agle minute (attempt nahi gina)
+                    message.status = "pending"
+                    message.next_attempt_at = now + timedelta(seconds=60)
+                    stats["deferred"] += 1
+                    continue
+                allowance[message.clinic_id] -= 1
+            to_send.append(message)
+
+        try:
+            if to_send:
+                with mail.connect() as conn:
+                    for message in to_send:
+                        try:
+                            conn.send(Message(
+                                subject=message.subject,
+                                recipients=[message.recipient],
+                                body=message.body
+                            ))
+                        except CONNECTION_ERRORS:
+                            raise
+                        except Exception as e:
+                            self._retry(message, e, now)
+                            stats["retried"] += 1
+                            continue
+
+                        message.status = "sent"
+                        message.sent_at = datetime.utcnow()
+                        message.last_error = None
+                        stats["sent"] += 1
+
+        except CONNECTION_ERRORS + (smtplib.SMTPException,) as e:
+            # SMTP down / connection toota / login (auth, HELO) fail → jo bache
+            # hain wo baad me. Per-message SMTP errors andar hi retry ho jaate
+            # hain, yahan sirf connect / login level wale aate hain.
+            logger.error("SMTP connection failed, releasing batch: %s", e)
+            for message in to_send:
+                if message.status == "sending":
+                    message.status = "pending"
+                    message.next_attempt_at = now + timedelta(seconds=self.retry_base)
+                    message.last_error = f"connection: {e}"[:500]
+                    stats["deferred"] += 1
+
+        db.session.commit()
+        return stats
+
+    # -----------------------------
+    # INTERNALS
+    # -----------------------------
+    def _claim(self, now):
+        due = (
+            OutboundMessage.status.in_(("pending", "sending")),
+            OutboundMessage.next_attempt_at <= now,
+        )
+
+        ids = db.session.execute(
+            select(OutboundMessage.id)
+            .where(*due)
+            .order_by(OutboundMessage.next_attempt_at, OutboundMessage.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)   # PostgreSQL: workers ek dusre ki rows skip
+        ).scalars().all()
+
+        if not ids:
+            db.session.commit()
+            return []
+
+        # condition dobara → SQLite pe bhi do workers same row nahi paate
+        claimed = db.session.execute(
+            update(OutboundMessage)
+            .where(OutboundMessage.id.in_(ids), *due)
+            .values(status="sending", next_attempt_at=now + timedelta(seconds=self.lease))
+            .returning(OutboundMessage.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        db.session.commit()
+
+        if not claimed:
+            return []
+
+        return (
+            OutboundMessage.query
+            .filter(OutboundMessage.id.in_(claimed))
+            .order_by(OutboundMessage.id)
+            .all()
+        )
+
+    def _allowance(self, clinic_ids, now):
+        if not clinic_ids:
+            return {}
+
+        sent = dict(
+            db.session.query(OutboundMessage.clinic_id, func.count(OutboundMessage.id))
+            .filter(
+                OutboundMessage.clinic_id.in_(clinic_ids),
+                OutboundMessage.kind.notin_(RATE_LIMIT_EXEMPT),
+                OutboundMessage.sent_at >= now - timedelta(seconds=60)
+            )
+            .group_by(OutboundMessage.clinic_id)
+            .all()
+        )
+        return {cid: self.clinic_per_minute - sent.get(cid, 0) for cid in clinic_ids}
+
+    def _retry(self, message, error, now):
+        message.attempts += 1
+        message.last_error = str(error)[:500]
+
+        # galat address retry se theek nahi hoga
+        if isinstance(error, smtplib.SMTPRecipientsRefused) or message.attempts >= self.max_attempts:
+            message.status = "failed"
+            return
+
+        message.status = "pending"
+        message.next_attempt_at = now + timedelta(
+            seconds=self.retry_base * 2 ** (message.attempts - 1)
+        )
+
+
+mail_queue = MailQueue()
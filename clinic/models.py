@@ -1,5 +1,7 @@
 from .extensions import db
+from .phones import normalize_phone, reversed_digits
 from datetime import datetime
+from sqlalchemy.orm import validates
 from werkzeug.security import generate_password_hash, check_password_hash
 
 """
@@ -40,6 +42,15 @@ class Clinic(db.Model):
     trial_started_at = db.Column(db.DateTime)
     trial_ends_at = db.Column(db.DateTime)
     subscription_ends_at = db.Column(db.DateTime)  
+
+    # True → invoice numbers bina gap ke (GST serial); billing desks ek dusre ka wait karte hain
+    gapless_invoice_numbers = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+
+    # APPOINTMENT SLOTS (slot_minutes NULL = slots off, koi capacity check nahi)
+    opens_at = db.Column(db.Time)
+    closes_at = db.Column(db.Time)
+    slot_minutes = db.Column(db.Integer)
+    slot_capacity = db.Column(db.Integer, nullable=False, default=1, server_default="1")
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -112,6 +123,8 @@ class Patient(db.Model):
 
     __table_args__ = (
     db.UniqueConstraint("clinic_id", "patient_no"),
+    # caller lookup: last digits ulte → prefix range (clinic/phones.py)
+    db.Index("idx_patient_clinic_phone_rev", "clinic_id", "phone_rev"),
     )
 
     
@@ -120,7 +133,9 @@ class Patient(db.Model):
     name = db.Column(db.String(100), nullable=False)
     age = db.Column(db.Integer)
     gender = db.Column(db.String(20))
-    phone = db.Column(db.String(20), index=True)
+    phone = db.Column(db.String(20), index=True)   # E.164
+    phone_rev = db.Column(db.String(20))           # phone ke digits ulte
+    email = db.Column(db.String(120))   # optional → appointment reminders
     # 🔴 SOFT DELETE
     is_deleted = db.Column(db.Boolean, default=False, index=True)
     disease = db.Column(db.String(120), nullable=False)
@@ -140,14 +155,25 @@ class Patient(db.Model):
     appointments = db.relationship("Appointment", backref="patient", lazy=True)
     records = db.relationship("MedicalRecord", backref="patient", lazy=True)
     invoices = db.relationship("Invoice", backref="patient", lazy=True)
-    
+    # visits / dues (clinic/patient_summary.py maintain karta hai) — lists pe joinedload
+    summary = db.relationship("PatientSummary", uselist=False, viewonly=True)
+
+    @validates("phone")
+    def _normalize_phone(self, key, value):
+        value = normalize_phone(value)
+        self.phone_rev = reversed_digits(value)
+        return value
+
 # =========================
 # APPOINTMENT / CONSULTATION
 # =========================
 class Appointment(db.Model):
     __table_args__ = (
-        db.Index("idx_appt_clinic_date", "clinic_id", "date"),
+        # board: din ke appointments time order me (keyset pagination)
+        db.Index("idx_appt_clinic_date", "clinic_id", "date", "time"),
+        db.Index("idx_appt_clinic_patient_date", "clinic_id", "patient_id", "date", "time"),
         db.Index("idx_appt_clinic_status", "clinic_id", "status"),
+        db.Index("idx_appt_clinic_follow_up", "clinic_id", "follow_up_date"),
     )
 
     id = db.Column(db.Integer, primary_key=True)
@@ -181,8 +207,13 @@ class Appointment(db.Model):
     weight = db.Column(db.String(20))
 
     follow_up_date = db.Column(db.Date)
+    # `flask schedule-follow-ups` ne kis appointment ke follow_up_date se banaya (rerun pe duplicate nahi)
+    follow_up_of_id = db.Column(db.Integer, db.ForeignKey("appointment.id"), unique=True)
     prescription_locked = db.Column(db.Boolean, default=False)
 
+    # autosave draft version (har meaningful save pe +1)
+    draft_revision = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     prescription_obj = db.relationship(
     "Prescription",
@@ -215,6 +246,13 @@ class MedicalRecord(db.Model):
 # INVOICE
 # =========================
 class Invoice(db.Model):
+    __table_args__ = (
+        # billing list: newest pehle, keyset (created_at, id)
+        db.Index("idx_invoice_clinic_created", "clinic_id", "created_at", "id"),
+        # patient summary: ek patient ke open invoices
+        db.Index("idx_invoice_clinic_patient", "clinic_id", "patient_id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     clinic_id = db.Column(
         db.Integer,
@@ -234,7 +272,8 @@ class Invoice(db.Model):
     status = db.Column(db.String(20), default="Unpaid")
     is_locked = db.Column(db.Boolean, default=False)
 
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # billing keyset key → NULL nahi ho sakta
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     due_date = db.Column(db.Date)
 
     items = db.relationship("InvoiceItem", backref="invoice", lazy=True)
@@ -272,6 +311,54 @@ class InvoiceSequence(db.Model):
     last_number = db.Column(db.Integer, default=0)
 
 
+# =========================
+# PATIENT SUMMARY (READ MODEL)
+# =========================
+class PatientSummary(db.Model):
+    # appointment / invoice / payment flush pe refresh hota hai
+    # (clinic/patient_summary.py) — seedha mat likho.
+    # Drift ho to: flask rebuild-patient-summary
+    patient_id = db.Column(
+        db.Integer,
+        db.ForeignKey("patient.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    clinic_id = db.Column(
+        db.Integer,
+        db.ForeignKey("clinic.id"),
+        nullable=False,
+        index=True
+    )
+
+    # Completed, non-deleted appointments
+    visits_total = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    last_visit_date = db.Column(db.Date)
+    last_diagnosis = db.Column(db.Text)
+
+    # non-deleted invoices jo Paid nahi hain
+    open_invoice_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    balance_due = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# =========================
+# PATIENT NUMBER SEQUENCE
+# =========================
+class PatientSequence(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+
+    clinic_id = db.Column(
+        db.Integer,
+        db.ForeignKey("clinic.id"),
+        nullable=False,
+        unique=True
+    )
+
+    # ab tak diya gaya (ya kisi worker ne block me reserve kiya) sabse bada patient_no
+    last_number = db.Column(db.Integer, nullable=False, default=0)
+
+
 # =========================
 # PAYMENTS
 # =========================
@@ -283,7 +370,7 @@ class Payment(db.Model):
         nullable=False,
         index=True
     )
-    invoice_id = db.Column(db.Integer, db.ForeignKey("invoice.id"), nullable=False)
+    invoice_id = db.Column(db.Integer, db.ForeignKey("invoice.id"), nullable=False, index=True)
     amount = db.Column(db.Float, nullable=False)
 
     method = db.Column(db.String(50), default="Cash")
@@ -295,6 +382,14 @@ class Payment(db.Model):
 # =========================
 class AuditLog(db.Model):
     __tablename__ = "audit_log"
+    # PostgreSQL: table is RANGE partitioned by month on created_at
+    # (physical PK = id + created_at). See clinic/audit.py.
+    __table_args__ = (
+        db.Index("idx_audit_clinic_created", "clinic_id", "created_at"),
+        # SQLite: rotation hot table khaali karta hai → bina AUTOINCREMENT
+        # ke ids 1 se dobara milte (month tables me wahi ids pehle se)
+        {"sqlite_autoincrement": True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     clinic_id = db.Column(
@@ -471,3 +566,44 @@ class Subscription(db.Model):
     ends_at = db.Column(db.DateTime)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# -------------------------------
+# OUTBOUND MAIL QUEUE
+# -------------------------------
+class OutboundMessage(db.Model):
+    __tablename__ = "outbound_message"
+    __table_args__ = (
+        db.Index("idx_outbound_status_next", "status", "next_attempt_at"),
+        db.Index("idx_outbound_clinic_sent", "clinic_id", "sent_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # password reset jaise mails clinic ke bina bhi ho sakte hain
+    clinic_id = db.Column(
+        db.Integer,
+        db.ForeignKey("clinic.id"),
+        nullable=True
+    )
+
+    kind = db.Column(db.String(30), nullable=False)
+    # password_reset | appointment_reminder | follow_up_reminder
+
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+
+    # same reminder dobara queue na ho (eg "appointment_reminder:42")
+    dedupe_key = db.Column(db.String(100), unique=True)
+
+    status = db.Column(db.String(20), nullable=False, default="pending")
+    # pending | sending | sent | failed
+
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # pending → kab bhejna hai; sending → worker ki lease kab khatam
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
@@ -0,0 +1,250 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime, time
+
+from sqlalchemy import func, literal, tuple_
+
+from clinic.extensions import db
+
+"""
+KEYSET (CURSOR) PAGINATION
+
+.paginate() har page pe COUNT(*) + OFFSET chalata hai — OFFSET 10000 matlab
+10000 rows padh ke phenkna, aur deep pages linearly slow. Yahan agla page
+"pichle page ki last row ke baad" se shuru hota hai:
+
+    WHERE (created_at, id) < (:last_created_at, :last_id)
+    ORDER BY created_at DESC, id DESC LIMIT 21
+
+→ index range scan, page 500 bhi page 1 jitna sasta.
+
+    invoices = invoice_pages.page(query, cursor=request.args.get("cursor"))
+    url_for(..., **invoices.next_args)
+
+Cursor opaque hai (base64 JSON): boundary row ki key values, direction aur
+position (sirf "41–60" dikhane ke liye). Keys unique honi chahiye (last key
+id / patient_no), sab ek hi direction me, aur NOT NULL — (NULL, id) < (...)
+kabhi true nahi, aisi rows page 1 ke baad gayab ho jaati hain.
+
+Total (count=):
+    "estimate"  default — ESTIMATE_CAP tak exact (LIMIT wala count),
+                usse zyada PostgreSQL planner estimate / SQLite pe "1,000+"
+    "exact"     poora COUNT(*)
+    int         caller ke paas pehle se hai (board tabs ka grouped count)
+"""
+
+# itni rows tak estimate bhi exact count hai
+ESTIMATE_CAP = 1000
+
+
+def count_mode(args):
+    """
+    ?count=exact → poora COUNT, warna estimate.
+    """
+    return "exact" if args.get("count") == "exact" else "estimate"
+
+
+# -----------------------------
+# CURSOR ENCODING
+# -----------------------------
+def _dump_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, time):
+        return {"t": value.isoformat()}
+    return value
+
+
+def _load_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "t" in value:
+            return time.fromisoformat(value["t"])
+        raise ValueError("unknown cursor value")
+    return value
+
+
+def encode_cursor(values, direction, position):
+    payload = {"k": [_dump_value(v) for v in values], "d": direction, "p": position}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, key_count):
+    """
+    (values, direction, position) ya None — kharab / purana cursor → pehla page.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [_load_value(v) for v in payload["k"]]
+        direction = payload["d"]
+        position = int(payload["p"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None
+
+    if len(values) != key_count or direction not in ("next", "prev"):
+        return None
+    return values, direction, max(position, 0)
+
+
+# -----------------------------
+# COUNTS
+# -----------------------------
+def estimate_count(query, cap=ESTIMATE_CAP):
+    """
+    (count, is_estimate). cap tak exact; usse zyada PostgreSQL pe planner
+    ka row estimate, baaki pe cap + 1 ("1,000+").
+    """
+    limited = query.order_by(None).with_entities(literal(1)).limit(cap + 1).subquery()
+    count = db.session.query(func.count()).select_from(limited).scalar()
+    if count <= cap:
+        return count, False
+
+    if db.engine.dialect.name == "postgresql":
+        compiled = query.order_by(None).statement.compile(dialect=db.engine.dialect)
+        plan = db.session.connection().exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return max(int(plan[0]["Plan"]["Plan Rows"]), count), True
+
+    return count, True
+
+
+# -----------------------------
+# PAGE
+# -----------------------------
+class KeysetPage:
+    """
+    paginate()-jaisa page: items, has_prev / has_next, first / last (1-based
+    position), total + total_label. Links: url_for(..., **page.next_args).
+    """
+
+    def __init__(self, items, per_page, offset, param,
+                 prev_cursor, next_cursor, total, total_is_estimate):
+        self.items = items
+        self.per_page = per_page
+        self.offset = offset
+        self.param = param
+        self.prev_cursor = prev_cursor
+        self.next_cursor = next_cursor
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+
+    def __iter__(self):
+        return iter(self.items)
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def prev_args(self):
+        return {self.param: self.prev_cursor}
+
+    @property
+    def next_args(self):
+        return {self.param: self.next_cursor}
+
+    @property
+    def first(self):
+        return self.offset + 1 if self.items else 0
+
+    @property
+    def last(self):
+        return self.offset + len(self.items)
+
+    @property
+    def total_label(self):
+        if not self.total_is_estimate:
+            return f"{self.total:,}"
+        if self.total > ESTIMATE_CAP + 1:
+            return f"~{self.total:,}"
+        return f"{ESTIMATE_CAP:,}+"
+
+
+class KeysetPaginator:
+    """
+    KeysetPaginator((Invoice.created_at, Invoice.id), descending=True)
+    """
+
+    def __init__(self, keys, descending=False, per_page=20, param="cursor"):
+        self.keys = tuple(keys)
+        self.descending = descending
+        self.per_page = per_page
+        self.param = param
+
+    def page(self, query, cursor=None, per_page=None, count="estimate", param=None):
+        per_page = per_page or self.per_page
+        param = param or self.param
+        decoded = decode_cursor(cursor, len(self.keys))
+
+        backwards = decoded is not None and decoded[1] == "prev"
+        rows = self._fetch(query, decoded, per_page + 1, backwards)
+
+        more = len(rows) > per_page
+        rows = rows[:per_page]
+        if backwards:
+            rows.reverse()
+
+        if decoded is None:
+            offset, has_prev, has_next = 0, False, more
+        elif backwards:
+            offset, has_prev, has_next = max(decoded[2] - len(rows), 0), more, True
+            if not more:
+                offset = 0   # pehla page aa gaya
+        else:
+            offset, has_prev, has_next = decoded[2] + 1, bool(rows), more
+
+        prev_cursor = next_cursor = None
+        if rows and has_prev:
+            prev_cursor = encode_cursor(self._values(rows[0]), "prev", offset)
+        if rows and has_next:
+            next_cursor = encode_cursor(self._values(rows[-1]), "next", offset + len(rows) - 1)
+
+        if count == "exact":
+            total, is_estimate = query.order_by(None).count(), False
+        elif count == "estimate":
+            total, is_estimate = estimate_count(query)
+        else:
+            total, is_estimate = count, False
+
+        return KeysetPage(
+            rows, per_page, offset, param,
+            prev_cursor, next_cursor, total, is_estimate
+        )
+
+    # -----------------------------
+    # INTERNALS
+    # -----------------------------
+    def _fetch(self, query, decoded, limit, backwards):
+        # peeche jaate waqt order ulta, phir rows reverse
+        descending = self.descending != backwards
+        query = query.order_by(None).order_by(
+            *(key.desc() if descending else key.asc() for key in self.keys)
+        )
+
+        if decoded is not None:
+            boundary = tuple_(*self.keys)
+            # typed binds → Date / Time SQLite pe column jaise hi string bante hain
+            values = tuple_(*(literal(v, key.type) for key, v in zip(self.keys, decoded[0])))
+            query = query.filter(boundary < values if descending else boundary > values)
+
+        return query.limit(limit).all()
+
+    def _values(self, row):
+        return [getattr(row, key.key) for key in self.keys]
@@ -0,0 +1,93 @@
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
+
+from clinic.extensions import db
+from clinic.models import Appointment, Patient, Prescription
+from clinic.pagination import KeysetPaginator
+
+"""
+PATIENT PROFILE READ MODEL
+
+Profile page ke liye sab kuch fixed queries me (visits kitne bhi hon):
+1. patient + patient_summary (joinedload, ek PK join)
+2. medical records          (selectinload, ek IN query)
+3. visits ka ek page         (keyset, idx_appt_clinic_patient_date)
+4. visits count              (estimate_count: ESTIMATE_CAP tak exact,
+                                 LIMIT wala count → hazaron visits pe bhi bounded)
+5. latest finalized prescriptions + appointment (ek joined query)
+
+Template me koi lazy relationship nahi chalta (pehle har prescription pe
+p.appointment ki alag query thi). Baaki visits /patient/<id>/visits se
+page-by-page aate hain (JSON partial, board jaisa).
+"""
+
+VISITS_PER_PAGE = 10
+
+# profile pe sirf latest; poori list Visit History me
+PROFILE_PRESCRIPTIONS = 10
+
+# newest visit pehle
+visit_pages = KeysetPaginator(
+    (Appointment.date, Appointment.time, Appointment.id),
+    descending=True, per_page=VISITS_PER_PAGE, param="visits"
+)
+
+
+class PatientProfile:
+    """
+    patient (records loaded), visits (KeysetPage), prescriptions (appointment
+    loaded), more_prescriptions.
+    """
+
+    def __init__(self, patient, visits, prescriptions, more_prescriptions):
+        self.patient = patient
+        self.visits = visits
+        self.prescriptions = prescriptions
+        self.more_prescriptions = more_prescriptions
+
+
+def visit_query(clinic_id, patient_id):
+    return Appointment.query.filter(
+        Appointment.clinic_id == clinic_id,
+        Appointment.patient_id == patient_id,
+        Appointment.is_deleted == False
+    )
+
+
+def load_visit_page(clinic_id, patient_id, cursor=None, count="estimate"):
+    return visit_pages.page(visit_query(clinic_id, patient_id), cursor, count=count)
+
+
+def load_patient_profile(clinic_id, patient_id, visits_cursor=None, count="estimate"):
+    """
+    PatientProfile ya 404 (deleted / dusre clinic ka patient).
+    """
+    patient = (
+        Patient.query
+        .options(joinedload(Patient.summary), selectinload(Patient.records))
+        .filter_by(id=patient_id, clinic_id=clinic_id, is_deleted=False)
+        .first_or_404()
+    )
+
+    visits = load_visit_page(clinic_id, patient.id, visits_cursor, count)
+
+    prescriptions = (
+        db.session.query(Prescription)
+        .join(Prescription.appointment)
+        .options(contains_eager(Prescription.appointment))
+        .filter(
+            Appointment.clinic_id == clinic_id,
+            Appointment.patient_id == patient.id,
+            Appointment.is_deleted == False,
+            Prescription.finalized == True
+        )
+        .order_by(Appointment.date.desc(), Appointment.time.desc(), Appointment.id.desc())
+        .limit(PROFILE_PRESCRIPTIONS + 1)
+        .all()
+    )
+
+    return PatientProfile(
+        patient,
+        visits,
+        prescriptions[:PROFILE_PRESCRIPTIONS],
+        len(prescriptions) > PROFILE_PRESCRIPTIONS
+    )
@@ -0,0 +1,444 @@
+import math
+import re
+
+from flask_sqlalchemy.pagination import Pagination
+from sqlalchemy import DDL, and_, bindparam, case, event, false, func, inspect, literal_column, or_, select, text
+
+from clinic.extensions import db
+from clinic.models import Patient
+from clinic.phones import NATIONAL_NUMBER_MAX, digits_only, normalize_phone, prefix_range
+
+"""
+PATIENT SEARCH
+
+Leading-wildcard ILIKE ('%q%') koi index use nahi karta → har keystroke pe
+clinic ke saare patients scan. Ab:
+
+PostgreSQL  pg_trgm GIN index (lower(name)) → LIKE '%q%' aur fuzzy
+            (word similarity) index se
+SQLite      do FTS5 shadow tables, Patient model events se sync:
+            patient_fts   word prefix (name)
+            patient_trgm  trigram tokenizer → fuzzy / typo match
+Phone       dono pe phone_rev btree range (clinic/phones.py) — last digits
+            ya poora number
+
+search_patient_ids() ranked ids deta hai (picker, typo fallback);
+board / billing / patient list patient_match_clause() se filter karte hain
+(uncapped subquery, koi matching patient chhootta nahi).
+"""
+
+# ranked search (patient list ka typo fallback) me itne results tak
+SEARCH_MAX_RESULTS = 500
+
+# typeahead (patient picker) — default / max results per request
+LOOKUP_DEFAULT_RESULTS = 20
+LOOKUP_MAX_RESULTS = 50
+
+# fuzzy: query ke kitne trigrams naam me hone chahiye
+FUZZY_MIN_SIMILARITY = 0.5
+
+# fuzzy: itne candidates (per result, max) tak score karo
+FUZZY_CANDIDATES_PER_RESULT = 10
+FUZZY_MAX_CANDIDATES = 1000
+
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS patient_fts USING fts5("
+    "clinic, name, tokenize='unicode61 remove_diacritics 2', prefix='1 2 3')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS patient_trgm USING fts5("
+    "clinic, name, tokenize='trigram')",
+    # trigram → kitne patients (fuzzy ke liye rare trigrams chunne)
+    "CREATE VIRTUAL TABLE IF NOT EXISTS patient_trgm_vocab USING fts5vocab("
+    "patient_trgm, 'row')",
+)
+
+POSTGRES_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_patient_name_trgm "
+    "ON patient USING gin (lower(name) gin_trgm_ops)",
+    # 1-2 letter queries (trigram se chhote) → prefix btree
+    "CREATE INDEX IF NOT EXISTS idx_patient_clinic_lower_name "
+    "ON patient (clinic_id, lower(name) text_pattern_ops)",
+)
+
+# raw DDL wale objects → Alembic metadata me nahi; migrations/env.py inhe
+# autogenerate compare se bahar rakhta hai (warna drop_table generate hota)
+SEARCH_TABLE_PREFIXES = ("patient_fts", "patient_trgm")
+SEARCH_INDEXES = ("idx_patient_name_trgm", "idx_patient_clinic_lower_name")
+
+
+def is_search_object(name, type_):
+    """
+    FTS5 tables + unki shadow tables (patient_fts_data, ...) / pg_trgm indexes.
+    """
+    if type_ == "table":
+        return name.startswith(SEARCH_TABLE_PREFIXES)
+    if type_ == "index":
+        return name in SEARCH_INDEXES
+    return False
+
+
+# db.create_all() (local / tests) pe bhi ban jaaye; existing DBs → migration
+for _stmt in SQLITE_DDL:
+    event.listen(Patient.__table__, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
+for _stmt in POSTGRES_DDL:
+    event.listen(Patient.__table__, "after_create", DDL(_stmt).execute_if(dialect="postgresql"))
+
+
+def _trigrams(value):
+    value = " ".join(value.lower().split())
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+# -----------------------------
+# SQLITE SHADOW TABLES (SYNC)
+# -----------------------------
+def index_patients(conn, rows):
+    """
+    rows: (id, clinic_id, name, is_deleted). Deleted → index se bahar.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+
+    ids = [r[0] for r in rows]
+    for table in ("patient_fts", "patient_trgm"):
+        conn.execute(
+            text(f"DELETE FROM {table} WHERE rowid IN :ids")
+            .bindparams(bindparam("ids", expanding=True)),
+            {"ids": ids}
+        )
+
+    live = [r for r in rows if not r[3]]
+    if not live:
+        return
+
+    conn.execute(
+        text(
+            "INSERT INTO patient_fts (rowid, clinic, name) VALUES (:id, :clinic, :name)"
+        ),
+        [
+            {"id": pid, "clinic": f"c{clinic_id}", "name": name or ""}
+            for pid, clinic_id, name, _ in live
+        ]
+    )
+    conn.execute(
+        text("INSERT INTO patient_trgm (rowid, clinic, name) VALUES (:id, :clinic, :name)"),
+        [
+            {"id": pid, "clinic": f"#{clinic_id}#", "name": (name or "").lower()}
+            for pid, clinic_id, name, _ in live
+        ]
+    )
+
+
+def rebuild_search_index(conn, chunk_size=2000):
+    """
+    SQLite shadow tables dobara (Core bulk updates model events skip karte hain).
+    PostgreSQL pe kuch nahi — GIN index PG khud maintain karta hai.
+    Returns indexed row count.
+    """
+    if conn.dialect.name != "sqlite":
+        return 0
+
+    for stmt in SQLITE_DDL:
+        conn.execute(text(stmt))
+    conn.execute(text("DELETE FROM patient_fts"))
+    conn.execute(text("DELETE FROM patient_trgm"))
+
+    table = Patient.__table__
+    total = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            table.select()
+            .with_only_columns(table.c.id, table.c.clinic_id, table.c.name, table.c.is_deleted)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        index_patients(conn, rows)
+        last_id = rows[-1][0]
+        total += sum(1 for r in rows if not r[3])
+
+    return total
+
+
+SEARCH_FIELDS = ("clinic_id", "name", "is_deleted")
+
+
+@event.listens_for(Patient, "after_insert")
+@event.listens_for(Patient, "after_update")
+def _sync_patient(mapper, connection, target):
+    if connection.dialect.name != "sqlite":
+        return
+
+    # last_visit jaise updates pe FTS row mat chhedo
+    state = inspect(target)
+    if not any(state.attrs[f].history.has_changes() for f in SEARCH_FIELDS):
+        return
+
+    index_patients(connection, [
+        (target.id, target.clinic_id, target.name, target.is_deleted)
+    ])
+
+
+@event.listens_for(Patient, "after_delete")
+def _unindex_patient(mapper, connection, target):
+    if connection.dialect.name == "sqlite":
+        index_patients(connection, [(target.id, target.clinic_id, target.name, True)])
+
+
+# -----------------------------
+# SEARCH
+# -----------------------------
+def search_patient_ids(clinic_id, q, limit=20):
+    """
+    Best match pehle: name / word prefix, phone suffix, phir fuzzy.
+    """
+    q = (q or "").strip()
+    if not q:
+        return []
+
+    if db.engine.dialect.name == "sqlite":
+        return _search_sqlite(clinic_id, q, limit)
+    return _search_postgres(clinic_id, q, limit)
+
+
+def phone_lookup_clause(q):
+    """
+    phone_rev range clause, None agar query me 3 se kam digits.
+    10+ digits = poora number → normalize ("09812...", "+91 98..." sab same);
+    warna last digits jaise ke taise.
+    """
+    digits = digits_only(q)
+    if len(digits) < 3:
+        return None
+    if len(digits) >= NATIONAL_NUMBER_MAX:
+        digits = digits_only(normalize_phone(q))
+
+    lo, hi = prefix_range(digits[::-1])
+    clause = Patient.phone_rev >= lo
+    return clause if hi is None else and_(clause, Patient.phone_rev < hi)
+
+
+def _fts_ids(conn, match, limit):
+    # ORDER BY rowid → FTS5 LIMIT pe ruk jaata hai (bm25 sab matches score karta)
+    return conn.execute(
+        text(
+            "SELECT rowid FROM patient_fts WHERE patient_fts MATCH :m "
+            "ORDER BY rowid DESC LIMIT :n"
+        ),
+        {"m": match, "n": limit}
+    ).scalars().all()
+
+
+def _phone_ids(clinic_id, phone, limit):
+    return [
+        row.id for row in
+        db.session.query(Patient.id)
+        .filter(Patient.clinic_id == clinic_id, Patient.is_deleted == False, phone)
+        .order_by(Patient.id.desc())
+        .limit(limit)
+    ]
+
+
+def _search_sqlite(clinic_id, q, limit):
+    """
+    Rank tiers: naam isi se shuru → kisi word ka prefix → phone suffix
+    (har tier me naye patients pehle). Kuch na mile to fuzzy.
+    """
+    conn = db.session.connection()
+    clinic = f'clinic : "c{clinic_id}"'
+    words = re.findall(r"\w+", q.lower())
+    phone = phone_lookup_clause(q)
+
+    tiers = []
+    if words:
+        rest = "".join(f' AND "{w}"*' for w in words[1:])
+        for match in (
+            f'{clinic} AND name : (^ "{words[0]}"*{rest})',
+            f'{clinic} AND name : (' + " AND ".join(f'"{w}"*' for w in words) + ")",
+        ):
+            tiers.append(lambda n, match=match: _fts_ids(conn, match, n))
+    if phone is not None:
+        tiers.append(lambda n: _phone_ids(clinic_id, phone, n))
+
+    ids = []
+    seen = set()
+    for tier in tiers:
+        for pid in tier(limit + len(ids)):
+            if pid not in seen:
+                seen.add(pid)
+                ids.append(pid)
+        if len(ids) >= limit:
+            return ids[:limit]
+
+    if ids:
+        return ids
+
+    return _fuzzy_sqlite(conn, clinic_id, q, limit)
+
+
+def _fuzzy_sqlite(conn, clinic_id, q, limit):
+    """
+    Typo ("rmesh", "ramesj") → shared trigrams / query trigrams (pg_trgm jaisa).
+
+    Similarity >= FUZZY_MIN_SIMILARITY wala naam query ke kam se kam `need`
+    trigrams rakhta hai, to sabse rare (n - need + 1) me se ek zaroor → sirf
+    unka OR candidates deta hai (common "esh", "ram" ki lambi lists nahi).
+    """
+    wanted = {g for g in _trigrams(q) if '"' not in g}
+    if not wanted:
+        return []
+
+    need = math.ceil(len(wanted) * FUZZY_MIN_SIMILARITY)
+    counts = dict(conn.execute(
+        text("SELECT term, doc FROM patient_trgm_vocab WHERE term IN :terms")
+        .bindparams(bindparam("terms", expanding=True)),
+        {"terms": sorted(wanted)}
+    ).all())
+    rare = sorted(wanted, key=lambda g: (counts.get(g, 0), g))[:len(wanted) - need + 1]
+    rare = [g for g in rare if counts.get(g)]
+    if not rare:
+        return []
+
+    candidates = conn.execute(
+        text(
+            "SELECT rowid, name FROM patient_trgm WHERE patient_trgm MATCH :m "
+            "ORDER BY rowid DESC LIMIT :n"
+        ),
+        {
+            "m": f'clinic : "#{clinic_id}#" AND name : (' + " OR ".join(f'"{g}"' for g in rare) + ")",
+            "n": min(limit * FUZZY_CANDIDATES_PER_RESULT, FUZZY_MAX_CANDIDATES),
+        }
+    ).all()
+
+    scored = []
+    for pid, name in candidates:
+        similarity = len(wanted & _trigrams(name)) / len(wanted)
+        if similarity >= FUZZY_MIN_SIMILARITY:
+            scored.append((-similarity, -pid))
+
+    return [-pid for _, pid in sorted(scored)[:limit]]
+
+
+def _search_postgres(clinic_id, q, limit):
+    ql = " ".join(q.lower().split())
+    phone = phone_lookup_clause(q)
+    name = func.lower(Patient.name)
+
+    matches = [name.contains(ql, autoescape=True)]
+    if len(ql) >= 3:
+        matches.append(name.op("%>")(ql))   # word_similarity (pg_trgm) → fuzzy
+    if phone is not None:
+        matches.append(phone)
+
+    rank = case(
+        (name.startswith(ql, autoescape=True), 0),
+        (name.contains(" " + ql, autoescape=True), 1),
+        else_=2
+    )
+
+    return [
+        row.id for row in
+        db.session.query(Patient.id)
+        .filter(
+            Patient.clinic_id == clinic_id,
+            Patient.is_deleted == False,
+            or_(*matches)
+        )
+        .order_by(rank, func.word_similarity(ql, name).desc(), Patient.patient_no.desc())
+        .limit(limit)
+    ]
+
+
+# -----------------------------
+# LIST PAGE HELPERS
+# -----------------------------
+def patient_match_clause(clinic_id, q, phone=True):
+    """
+    Board / billing / patient list filter: naam ka word prefix ya substring
+    (phone=True pe phone suffix bhi). Uncapped subquery — ranked search ki
+    tarah top N pe nahi katta, har matching patient aata hai. Fuzzy (typo)
+    match sirf ranked search (picker, list fallback) me.
+
+    Billing phone=False deta hai — wahan 3+ digits aksar invoice number hain.
+    """
+    q = " ".join((q or "").split())
+    words = re.findall(r"\w+", q.lower())
+    phone_clause = phone_lookup_clause(q) if phone else None
+
+    matches = []
+    if db.engine.dialect.name == "sqlite":
+        clinic = f'clinic : "c{clinic_id}"'
+        if words:
+            prefix = f'{clinic} AND name : (' + " AND ".join(f'"{w}"*' for w in words) + ")"
+            matches.append(Patient.id.in_(
+                select(literal_column("rowid"))
+                .select_from(text("patient_fts"))
+                .where(text("patient_fts MATCH :fts_prefix").bindparams(fts_prefix=prefix))
+            ))
+        needle = q.lower().replace('"', "")
+        if len(needle) >= 3:
+            # trigram tokenizer: phrase = substring (ILIKE '%q%' jaisa, index se)
+            substring = f'clinic : "#{clinic_id}#" AND name : "{needle}"'
+            matches.append(Patient.id.in_(
+                select(literal_column("rowid"))
+                .select_from(text("patient_trgm"))
+                .where(text("patient_trgm MATCH :fts_substring").bindparams(fts_substring=substring))
+            ))
+    elif q:
+        matches.append(func.lower(Patient.name).contains(q.lower(), autoescape=True))
+
+    if phone_clause is not None:
+        matches.append(phone_clause)
+
+    return or_(*matches) if matches else false()
+
+
+class RankedPagination(Pagination):
+    """
+    Search results rank order me paginate: query (clinic / date filters) se
+    bache ids Python me slice → 500 ids ka CASE ORDER BY nahi.
+
+        RankedPagination(query=query, ids=ranked_ids, page=page, per_page=20)
+    """
+
+    def _ranked_ids(self):
+        if not hasattr(self, "_ranked"):
+            query, ids = self._query_args["query"], self._query_args["ids"]
+            keep = {
+                row.id for row in
+                query.with_entities(Patient.id).filter(Patient.id.in_(ids))
+            } if ids else set()
+            self._ranked = [pid for pid in ids if pid in keep]
+        return self._ranked
+
+    def _query_items(self):
+        page_ids = self._ranked_ids()[self._query_offset:self._query_offset + self.per_page]
+        if not page_ids:
+            return []
+        rows = {p.id: p for p in self._query_args["query"].filter(Patient.id.in_(page_ids))}
+        return [rows[pid] for pid in page_ids if pid in rows]
+
+    def _query_count(self):
+        return len(self._ranked_ids())
+
+    # KeysetPage jaisa interface (patients.html dono ke liye ek pager)
+    total_is_estimate = False
+
+    @property
+    def total_label(self):
+        # ranked search SEARCH_MAX_RESULTS pe katta hai → "500+" (chupa cut-off nahi)
+        if self.total >= SEARCH_MAX_RESULTS:
+            return f"{SEARCH_MAX_RESULTS:,}+"
+        return f"{self.total:,}"
+
+    @property
+    def prev_args(self):
+        return {"page": self.prev_num}
+
+    @property
+    def next_args(self):
+        return {"page": self.next_num}
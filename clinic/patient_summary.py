@@ -0,0 +1,210 @@
+from datetime import datetime
+
+from sqlalchemy import Numeric, and_, cast, event, exists, func, inspect, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from clinic.models import Appointment, Invoice, Patient, PatientSummary, Payment
+
+"""
+PATIENT SUMMARY
+
+patient_summary me har patient ki ek row: visits_total, last_visit_date,
+last_diagnosis, open_invoice_count, balance_due. Lists / profile yahi
+padhte hain (patient pe ek PK join) — appointment / invoice / payment pe
+aggregate nahi.
+
+Maintenance ORM events se, usi transaction me:
+- after_flush → is flush me jin patients ke appointment / invoice / payment
+  badle (ya jo patient naya bana) sirf unki row refresh
+- refresh = ek UPDATE ... SET col = (correlated subquery); subqueries
+  per-patient indexes pe (idx_appt_clinic_patient_date,
+  idx_invoice_clinic_patient, payment.invoice_id)
+- rollback → summary UPDATE bhi rollback
+
++1 / -1 delta ke bajaye touched patient ka refresh: status badle, soft
+delete ho, payment hate ya latest visit cancel ho (MAX peeche jaaye) —
+sab ek hi raaste se sahi.
+
+Core bulk writes events skip karte hain. Draft flush sirf unlocked
+(Completed nahi) appointments likhta hai aur follow-ups Queue me bante
+hain → summary pe asar nahi. Baaki drift (seed scripts, manual SQL):
+
+    flask rebuild-patient-summary
+"""
+
+VISIT_STATUS = "Completed"
+PAID_STATUS = "Paid"
+
+# in fields ke badalne pe hi refresh
+WATCHED_FIELDS = {
+    Appointment: ("patient_id", "status", "date", "time", "diagnosis", "is_deleted"),
+    Invoice: ("patient_id", "total_amount", "status", "is_deleted"),
+    Payment: ("invoice_id", "amount"),
+}
+
+
+def summary_values(clinic_id, patient_id):
+    """
+    patient_summary columns → scalar subqueries, (clinic_id, patient_id)
+    columns pe correlated (UPDATE me summary ke, SELECT me patient ke).
+    """
+    visit = and_(
+        Appointment.clinic_id == clinic_id,
+        Appointment.patient_id == patient_id,
+        Appointment.is_deleted == False,
+        Appointment.status == VISIT_STATUS
+    )
+    open_invoice = and_(
+        Invoice.clinic_id == clinic_id,
+        Invoice.patient_id == patient_id,
+        Invoice.is_deleted == False,
+        Invoice.status != PAID_STATUS
+    )
+    paid = (
+        select(func.coalesce(func.sum(Payment.amount), 0))
+        .where(Payment.invoice_id == Invoice.id)
+        .correlate(Invoice)
+        .scalar_subquery()
+    )
+    balance = func.coalesce(func.sum(func.coalesce(Invoice.total_amount, 0) - paid), 0)
+
+    return dict(
+        visits_total=(
+            select(func.count()).select_from(Appointment).where(visit).scalar_subquery()
+        ),
+        last_visit_date=select(func.max(Appointment.date)).where(visit).scalar_subquery(),
+        last_diagnosis=(
+            select(Appointment.diagnosis)
+            .where(visit, func.coalesce(Appointment.diagnosis, "") != "")
+            .order_by(Appointment.date.desc(), Appointment.time.desc(), Appointment.id.desc())
+            .limit(1)
+            .scalar_subquery()
+        ),
+        open_invoice_count=(
+            select(func.count()).select_from(Invoice).where(open_invoice).scalar_subquery()
+        ),
+        # Float paise ka jod → 2 decimals pe round (rebuild drift check bhi yahi compare karta hai)
+        balance_due=(
+            select(func.round(cast(balance, Numeric), 2)).where(open_invoice).scalar_subquery()
+        ),
+    )
+
+
+# -----------------------------
+# REFRESH
+# -----------------------------
+def refresh_summaries(conn, patient_ids):
+    """
+    In patients ki summary rows data se dobara bharo (missing rows banti hain).
+    Caller ke connection / transaction me chalta hai.
+    """
+    ids = sorted(set(patient_ids))
+    if not ids:
+        return 0
+
+    _ensure_rows(conn, ids)
+
+    table = PatientSummary.__table__
+    result = conn.execute(
+        update(table)
+        .where(table.c.patient_id.in_(ids))
+        .values(
+            updated_at=datetime.utcnow(),
+            **summary_values(table.c.clinic_id, table.c.patient_id)
+        )
+    )
+    return result.rowcount
+
+
+def count_drifted(conn, patient_ids):
+    """
+    Kitne patients ki summary row missing hai ya data se alag hai.
+    """
+    table = PatientSummary.__table__
+    values = summary_values(Patient.clinic_id, Patient.id)
+
+    return conn.execute(
+        select(func.count())
+        .select_from(Patient)
+        .outerjoin(table, table.c.patient_id == Patient.id)
+        .where(
+            Patient.id.in_(list(patient_ids)),
+            or_(
+                table.c.patient_id.is_(None),
+                *(table.c[name].is_distinct_from(value) for name, value in values.items())
+            )
+        )
+    ).scalar()
+
+
+def _ensure_rows(conn, ids):
+    table = PatientSummary.__table__
+    missing = conn.execute(
+        select(Patient.id, Patient.clinic_id)
+        .where(
+            Patient.id.in_(ids),
+            ~exists().where(table.c.patient_id == Patient.id)
+        )
+    ).all()
+    if not missing:
+        return
+
+    # savepoint → dusre transaction ne row pehle bana di to bas UPDATE
+    try:
+        with conn.begin_nested():
+            conn.execute(
+                insert(table),
+                [{"patient_id": pid, "clinic_id": cid} for pid, cid in missing]
+            )
+    except IntegrityError:
+        pass
+
+
+# -----------------------------
+# ORM EVENTS
+# -----------------------------
+def _keys(obj, field):
+    """
+    field ki current value + flush se pehle wali (re-parent hua ho to dono).
+    """
+    hist = inspect(obj).attrs[field].history
+    values = {getattr(obj, field)}
+    values.update(hist.deleted)
+    values.discard(None)
+    return values
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_touched_summaries(session, flush_context):
+    patient_ids, invoice_ids = set(), set()
+
+    for obj in session.new:
+        if isinstance(obj, Patient):
+            patient_ids.add(obj.id)
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        fields = WATCHED_FIELDS.get(type(obj))
+        if fields is None:
+            continue
+
+        if obj in session.dirty and not any(
+            inspect(obj).attrs[f].history.has_changes() for f in fields
+        ):
+            continue
+
+        if isinstance(obj, Payment):
+            invoice_ids |= _keys(obj, "invoice_id")
+        else:
+            patient_ids |= _keys(obj, "patient_id")
+
+    if not patient_ids and not invoice_ids:
+        return
+
+    conn = session.connection()
+    if invoice_ids:
+        patient_ids.update(conn.execute(
+            select(Invoice.patient_id).where(Invoice.id.in_(invoice_ids))
+        ).scalars())
+
+    refresh_summaries(conn, patient_ids)
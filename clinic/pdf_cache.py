@@ -0,0 +1,267 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from clinic.pdf_layout import LAYOUT_VERSION
+
+"""
+RENDERED PDF CACHE (FINALIZED PRESCRIPTIONS)
+
+Finalize ke baad prescription (mode=full) kabhi nahi badalta, isliye PDF ek
+baar render karke disk pe rakhte hain. Key = prescription id + finalized_at
+(+ LAYOUT_VERSION) ka hash → wahi strong ETag bhi hai (browser / pharmacy reprint = 304).
+
+Files immutable hain: same key ka content kabhi overwrite nahi hota.
+
+Size / age bound (LRU): cache hit file ka mtime touch karta hai → mtime =
+last use. prune() pehle PDF_CACHE_MAX_AGE_DAYS se purani files hatata hai,
+phir total PDF_CACHE_MAX_BYTES se upar ho to sabse purani se. put() har
+PDF_CACHE_PRUNE_INTERVAL me ek baar prune prerender thread pe chala deta
+hai; cron se bhi:
+
+    flask pdf-cache prune
+    flask pdf-cache status
+
+Evict hui file agli download pe dobara render hoti hai (sirf cost, data
+loss nahi). Abhi abhi use hui files (PRUNE_GRACE) nahi hatayi jaati →
+path() aur send_file ke beech file gayab nahi hoti.
+"""
+
+logger = logging.getLogger(__name__)
+
+# itni der pehle tak use hui file prune nahi hoti (seconds)
+PRUNE_GRACE = 600
+
+
+def prescription_pdf_key(prescription):
+    """
+    Cache key / ETag for a finalized prescription, None if not finalized.
+    """
+    if prescription is None or not prescription.finalized or not prescription.finalized_at:
+        return None
+
+    raw = (
+        f"prescription:{prescription.id}:{prescription.finalized_at.isoformat()}"
+        f":layout{LAYOUT_VERSION}"
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class PdfCache:
+    """
+    Config:
+        PDF_CACHE_DIR             default instance/pdf_cache
+        PDF_PRERENDER_ASYNC       finalize pe background render, default True (TESTING me False)
+        PDF_CACHE_MAX_BYTES       total size bound, default 1 GB (0 → no limit)
+        PDF_CACHE_MAX_AGE_DAYS    itne din use na hui file hatao, default 180 (0 → no limit)
+        PDF_CACHE_PRUNE_INTERVAL  put() se auto prune, seconds, default 3600 (0 → sirf CLI)
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.directory = None
+        self.prerender_async = False
+        self.max_bytes = 0
+        self.max_age_days = 0
+        self.prune_interval = 0
+        self._last_prune = None
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.directory = app.config.setdefault(
+            "PDF_CACHE_DIR",
+            os.path.join(app.instance_path, "pdf_cache")
+        )
+        self.prerender_async = app.config.setdefault("PDF_PRERENDER_ASYNC", not app.testing)
+        self.max_bytes = app.config.setdefault("PDF_CACHE_MAX_BYTES", 1024 ** 3)
+        self.max_age_days = app.config.setdefault("PDF_CACHE_MAX_AGE_DAYS", 180)
+        self.prune_interval = app.config.setdefault("PDF_CACHE_PRUNE_INTERVAL", 3600)
+        os.makedirs(self.directory, exist_ok=True)
+
+        app.extensions["pdf_cache"] = self
+
+    # -----------------------------
+    # PUBLIC
+    # -----------------------------
+    def path(self, key):
+        """
+        Cached file path, or None on miss. Hit → mtime touch (LRU).
+        """
+        path = self._path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put(self, key, data):
+        """
+        Atomic write (tmp file + rename) → reader ko kabhi aadhi file nahi milti.
+        """
+        path = self._path_for(key)
+        if os.path.exists(path):
+            return path
+
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        self._maybe_prune()
+        return path
+
+    def prerender(self, key, render, *args):
+        """
+        render(*args) → PDF bytes, app context me chalta hai.
+        Async mode me request ko wait nahi karna padta.
+        """
+        if key is None or self.path(key):
+            return
+
+        if not self.prerender_async:
+            self._render_job(key, render, args)
+            return
+
+        self._get_executor().submit(self._render_job, key, render, args)
+
+    def usage(self):
+        """
+        (files, bytes) — cached PDFs only.
+        """
+        count = size = 0
+        for entry in self._entries():
+            if not entry.name.endswith(".pdf"):
+                continue
+            try:
+                size += entry.stat().st_size
+                count += 1
+            except OSError:
+                continue
+        return count, size
+
+    def prune(self, max_bytes=None, max_age_days=None, now=None):
+        """
+        Age + size bound lagao. Returns dict(removed, freed, kept, kept_bytes).
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        now = time.time() if now is None else now
+
+        files, removed, freed = [], 0, 0
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            age = now - stat.st_mtime
+
+            # crash se bachi .tmp files
+            if entry.name.endswith(".tmp"):
+                if age > PRUNE_GRACE and self._remove(entry.path):
+                    removed, freed = removed + 1, freed + stat.st_size
+                continue
+
+            if max_age_days and age > max_age_days * 86400:
+                if self._remove(entry.path):
+                    removed, freed = removed + 1, freed + stat.st_size
+                continue
+
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        kept, total = len(files), sum(size for _, size, _ in files)
+        if max_bytes and total > max_bytes:
+            # least recently used pehle
+            for mtime, size, path in sorted(files):
+                if total <= max_bytes:
+                    break
+                if now - mtime < PRUNE_GRACE:
+                    continue
+                if self._remove(path):
+                    removed, freed = removed + 1, freed + size
+                    kept, total = kept - 1, total - size
+
+        return dict(removed=removed, freed=freed, kept=kept, kept_bytes=total)
+
+    # -----------------------------
+    # INTERNALS
+    # -----------------------------
+    def _entries(self):
+        try:
+            with os.scandir(self.directory) as entries:
+                return [e for e in entries if e.is_file() and e.name.endswith((".pdf", ".tmp"))]
+        except FileNotFoundError:
+            return []
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False   # dusre worker ne pehle hata di
+
+    def _maybe_prune(self):
+        if not self.prune_interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            if self._last_prune is not None and now - self._last_prune < self.prune_interval:
+                return
+            self._last_prune = now
+
+        if self.prerender_async:
+            self._get_executor().submit(self._prune_job)
+        else:
+            self._prune_job()
+
+    def _prune_job(self):
+        try:
+            result = self.prune()
+            if result["removed"]:
+                logger.info("pdf cache pruned %s", result)
+        except Exception:
+            logger.warning("pdf cache prune failed", exc_info=True)
+
+    def _path_for(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def _get_executor(self):
+        # gunicorn fork ke baad parent ka executor thread child me nahi hota
+        if self._executor is not None and self._pid == os.getpid():
+            return self._executor
+
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1,
+                    thread_name_prefix="pdf-prerender"
+                )
+        return self._executor
+
+    def _render_job(self, key, render, args):
+        try:
+            with self.app.app_context():
+                data = render(*args)
+                if data:
+                    self.put(key, data)
+        except Exception:
+            # download time pe phir render ho jaayega
+            logger.warning("pdf prerender failed (%s)", key, exc_info=True)
+
+
+pdf_cache = PdfCache()
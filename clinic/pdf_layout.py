@@ -0,0 +1,228 @@
+from collections import namedtuple
+from functools import lru_cache
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.pdfbase import pdfmetrics
+
+"""
+PDF LAYOUT ENGINE
+
+Sab documents (prescription, lab request, invoice, day-end batch) isi
+se bante hain:
+
+- STYLES: font / size / leading ek jagah; setFont sirf style badalne pe
+- text_width / wrap: string metrics LRU cache me (same dawai / label
+  baar baar aate hain)
+- letterhead: clinic header ka layout (lines + height) per clinic ek baar
+  cache hota hai, har page pe wahi lines draw hoti hain
+- ensure(): page break engine khud karta hai, har section me haath se
+  check_space nahi
+"""
+
+# Layout badle to badhao → purane cached PDFs ki key badal jaati hai
+LAYOUT_VERSION = 3
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+LEFT = 2 * cm
+RIGHT = PAGE_WIDTH - 2 * cm
+TOP = PAGE_HEIGHT - 2 * cm
+BOTTOM = 2 * cm
+
+Style = namedtuple("Style", ("font", "size", "leading"))
+
+STYLES = {
+    "title": Style("Helvetica-Bold", 18, 22),
+    "subtitle": Style("Helvetica", 11, 16),
+    "heading": Style("Helvetica-Bold", 12, 16),
+    "label": Style("Helvetica-Bold", 11, 14),
+    "body": Style("Helvetica", 11, 14),
+    "symbol": Style("Helvetica-Bold", 16, 18),
+    "small": Style("Helvetica", 9, 12),
+}
+
+
+# -----------------------------
+# TEXT METRICS (CACHED)
+# -----------------------------
+@lru_cache(maxsize=8192)
+def text_width(text, font, size):
+    return pdfmetrics.stringWidth(text, font, size)
+
+
+@lru_cache(maxsize=4096)
+def wrap(text, style_name, max_width):
+    """
+    Greedy word wrap → tuple of lines that fit max_width.
+    """
+    style = STYLES[style_name]
+    words = text.split()
+    if not words:
+        return ("",)
+
+    lines = []
+    current = words[0]
+    space = text_width(" ", style.font, style.size)
+    current_width = text_width(current, style.font, style.size)
+
+    for word in words[1:]:
+        word_width = text_width(word, style.font, style.size)
+        if current_width + space + word_width <= max_width:
+            current += " " + word
+            current_width += space + word_width
+        else:
+            lines.append(current)
+            current, current_width = word, word_width
+
+    lines.append(current)
+    return tuple(lines)
+
+
+# -----------------------------
+# LETTERHEAD
+# -----------------------------
+Letterhead = namedtuple("Letterhead", ("lines", "height"))
+
+
+@lru_cache(maxsize=256)
+def letterhead(clinic_id, name, subtitle=None, address=None):
+    """
+    Clinic header ka precomputed layout (lines + total height).
+    Arguments hashable hain → har clinic ka spec ek hi baar banta hai.
+    """
+    lines = [("title", name or "Clinic")]
+    for style_name, text in (("subtitle", subtitle), ("subtitle", address)):
+        if text:
+            lines += [(style_name, part) for part in wrap(text, style_name, RIGHT - LEFT)]
+
+    height = sum(STYLES[s].leading for s, _ in lines) + 4
+    return Letterhead(tuple(lines), height)
+
+
+# -----------------------------
+# PAGE LAYOUT
+# -----------------------------
+class PageLayout:
+    """
+    Ek canvas pe ek ya zyada documents. y cursor upar se neeche chalta hai.
+    """
+
+    def __init__(self, pdf):
+        self.pdf = pdf
+        self.y = TOP
+        self.head = None
+        self._font = None
+        self._page_has_content = False
+        self._doc_pages = 0
+
+    # ---------- documents / pages ----------
+    def start_document(self, head=None):
+        """
+        Naya document naye page se (batch printing me same canvas).
+        """
+        if self._page_has_content:
+            self._close_page()
+        self.head = head
+        self._doc_pages = 1
+        self._begin_page()
+
+    def finish(self):
+        if self._page_has_content:
+            self._close_page()
+
+    def ensure(self, height):
+        if self.y - height < BOTTOM:
+            self._close_page(page_number=True)
+            self._doc_pages += 1
+            self._begin_page()
+
+    def _begin_page(self):
+        self.y = TOP
+        self._font = None
+        self._page_has_content = True
+        if self.head is not None:
+            self._draw_letterhead()
+
+    def _close_page(self, page_number=False):
+        if page_number or self._doc_pages > 1:
+            self.set_style("small")
+            self.pdf.drawRightString(RIGHT, BOTTOM - 10, f"Page {self._doc_pages}")
+        self.pdf.showPage()
+        self._font = None
+        self._page_has_content = False
+
+    def _draw_letterhead(self):
+        y = TOP
+        for style_name, text in self.head.lines:
+            self.set_style(style_name)
+            self.pdf.drawCentredString(PAGE_WIDTH / 2, y, text)
+            y -= STYLES[style_name].leading
+
+        self.y = TOP - self.head.height
+        self.rule(gap_after=25)
+
+    # ---------- drawing ----------
+    def set_style(self, style_name):
+        if self._font != style_name:
+            style = STYLES[style_name]
+            self.pdf.setFont(style.font, style.size)
+            self._font = style_name
+        return STYLES[style_name]
+
+    def text(self, x, text, style_name="body"):
+        self.set_style(style_name)
+        self.pdf.drawString(x, self.y, text)
+
+    def right(self, text, style_name="body", x=RIGHT):
+        self.set_style(style_name)
+        self.pdf.drawRightString(x, self.y, text)
+
+    def advance(self, dy):
+        self.y -= dy
+
+    def rule(self, gap_after=10):
+        self.pdf.line(LEFT, self.y, RIGHT, self.y)
+        self.y -= gap_after
+
+    def row(self, cells, style_name="body"):
+        """
+        cells: [(x, text)] on one line, then next line.
+        """
+        self.ensure(STYLES[style_name].leading)
+        style = self.set_style(style_name)
+        for x, text in cells:
+            self.pdf.drawString(x, self.y, text)
+        self.y -= style.leading
+
+    def paragraph(self, text, style_name="body", x=LEFT, prefix=""):
+        """
+        Wrapped text; continuation lines prefix ke neeche align.
+        """
+        style = STYLES[style_name]
+        indent = text_width(prefix, style.font, style.size)
+        lines = wrap(text, style_name, RIGHT - x - indent)
+
+        for i, line in enumerate(lines):
+            self.ensure(style.leading)
+            self.set_style(style_name)
+            if i == 0 and prefix:
+                self.pdf.drawString(x, self.y, prefix + line)
+            else:
+                self.pdf.drawString(x + indent, self.y, line)
+            self.y -= style.leading
+
+    def section(self, title, entries, numbered=False, bullet="- "):
+        """
+        Heading + bullet / numbered list. Heading kabhi page ke last line
+        pe akela nahi rehta.
+        """
+        heading = STYLES["heading"]
+        self.ensure(heading.leading + STYLES["body"].leading)
+        self.text(LEFT, title, "heading")
+        self.y -= heading.leading
+
+        for idx, entry in enumerate(entries, start=1):
+            prefix = f"{idx}. " if numbered else bullet
+            self.paragraph(entry, x=LEFT + 5, prefix=prefix)
+
+        self.y -= 10
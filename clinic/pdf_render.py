@@ -0,0 +1,285 @@
+import os
+import tempfile
+from io import BytesIO
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.pdfgen import canvas
+
+from clinic.pdf_layout import LEFT, RIGHT, STYLES, PageLayout, letterhead
+
+"""
+PDF RENDERERS
+
+Yahan sirf reportlab code hai — Flask / DB kuch nahi. Renderers plain
+dicts lete hain aur bytes lautaate hain, taaki pdf_service inhe alag
+process me chala sake (ORM objects pickle nahi hote).
+
+*_data() helpers request side pe ORM objects se ye dicts banate hain.
+draw_*() functions ek PageLayout pe document banate hain → ek PDF me
+kai documents (day-end batch) bhi.
+"""
+
+VISIT_FIELDS = (
+    "type", "bp", "pulse", "spo2", "temperature", "weight",
+    "symptoms", "diagnosis", "lab_tests", "advice", "follow_up_date",
+)
+
+
+def new_canvas(buffer):
+    # invariant → same data = same bytes (cache / ETag stable)
+    return canvas.Canvas(buffer, pagesize=A4, invariant=True)
+
+
+def letterhead_data(clinic, speciality=None):
+    """
+    Clinic letterhead fields (plain values, picklable).
+    """
+    if clinic is None:
+        return {"clinic_id": 0, "name": "Clinic", "subtitle": None, "address": None}
+
+    contact = " | ".join(
+        part for part in (clinic.address, f"Ph: {clinic.phone}" if clinic.phone else None)
+        if part
+    )
+    return {
+        "clinic_id": clinic.id,
+        "name": clinic.name,
+        "subtitle": speciality.strip().title() if speciality else None,
+        "address": contact or None,
+    }
+
+
+def _letterhead(data):
+    head = data.get("letterhead") or letterhead_data(None)
+    return letterhead(head["clinic_id"], head["name"], head["subtitle"], head["address"])
+
+
+# =====================================================
+# PRESCRIPTION / LAB REQUEST
+# =====================================================
+def prescription_data(appt, patient, prescription, doctor_name, date_str, head=None):
+    return {
+        "letterhead": head,
+        "visit": {f: getattr(appt, f) for f in VISIT_FIELDS},
+        "patient": {
+            "name": patient.name,
+            "age": patient.age,
+            "gender": patient.gender,
+            "patient_no": patient.patient_no,
+        },
+        "items": [
+            {
+                "medicine_name": item.medicine_name,
+                "dose": item.dose,
+                "duration_days": item.duration_days,
+                "instructions": item.instructions,
+            }
+            for item in (prescription.items if prescription else [])
+        ],
+        "doctor_name": doctor_name,
+        "date_str": date_str,
+    }
+
+
+def _split(text, sep):
+    return [part.strip() for part in text.split(sep)]
+
+
+def draw_prescription(layout, data, mode="full"):
+    """
+    mode="lab" → lab tests ke baad ruk jaata hai.
+    """
+    visit = data["visit"]
+    patient = data["patient"]
+    items = data["items"]
+
+    layout.start_document(_letterhead(data))
+
+    # ---------------- DOCTOR / DATE ----------------
+    layout.text(LEFT, f"Doctor: {data['doctor_name']}", "label")
+    layout.right(f"Date: {data['date_str']}", "label")
+    layout.advance(25)
+
+    # ---------------- PATIENT DETAILS ----------------
+    layout.text(LEFT, "Patient Details", "heading")
+    layout.advance(14)
+
+    layout.text(LEFT, f"Name: {patient['name']}")
+    layout.text(10 * cm, f"Age/Gender: {patient['age']} / {patient['gender']}")
+    layout.advance(14)
+
+    layout.text(LEFT, f"Patient ID: {patient['patient_no']}")
+    layout.right(f"Visit Type: {visit['type']}")
+    layout.advance(20)
+
+    # ---------------- VITALS ----------------
+    vitals = [
+        ("BP", visit["bp"]),
+        ("Pulse", visit["pulse"]),
+        ("SpO2", visit["spo2"]),
+        ("Temperature", visit["temperature"]),
+        ("Weight", visit["weight"]),
+    ]
+    vitals = [f"{label}: {value}" for label, value in vitals if value]
+
+    if vitals:
+        layout.section("Vitals", vitals, bullet="")
+
+    # ---------------- SYMPTOMS / DIAGNOSIS / LAB ----------------
+    if visit["symptoms"]:
+        layout.section("Symptoms", _split(visit["symptoms"], ","))
+
+    if visit["diagnosis"]:
+        layout.section("Diagnosis", _split(visit["diagnosis"], ","))
+
+    if visit["lab_tests"]:
+        layout.section("Lab Tests", _split(visit["lab_tests"], "\n"))
+
+    if mode == "lab":
+        return
+
+    # ---------------- RX ----------------
+    layout.ensure(STYLES["symbol"].leading + 3 * STYLES["body"].leading)
+    layout.text(LEFT, "℞", "symbol")
+    layout.advance(STYLES["symbol"].leading)
+
+    # ---------------- MEDICINES ----------------
+    columns = (LEFT, 8.5 * cm, 11.5 * cm, 14 * cm)
+
+    layout.text(LEFT, "Medicine", "label")
+    for x, title in zip(columns[1:], ("Dose", "Duration", "Instructions")):
+        layout.text(x, title, "label")
+    layout.advance(10)
+    layout.rule()
+
+    if items:
+        for item in items:
+            layout.row(zip(columns, (
+                item["medicine_name"],
+                item["dose"] or "-",
+                f"{item['duration_days'] or '-'} days",
+                item["instructions"] or "-",
+            )))
+    else:
+        layout.row([(LEFT, "No medicines prescribed")])
+
+    layout.advance(10)
+
+    # ---------------- ADVICE ----------------
+    if visit["advice"]:
+        layout.section("Advice", _split(visit["advice"], ","), numbered=True)
+
+    # ---------------- FOLLOW UP ----------------
+    if visit["follow_up_date"]:
+        layout.ensure(20)
+        layout.text(LEFT, "Follow-up On:", "label")
+        layout.text(LEFT + 80, visit["follow_up_date"].strftime("%d-%m-%Y"))
+        layout.advance(20)
+
+    # ---------------- FOOTER ----------------
+    layout.ensure(60)
+    layout.rule(gap_after=12)
+    layout.text(
+        LEFT,
+        "This is a computer-generated prescription and is valid without a physical signature.",
+        "small"
+    )
+    layout.right("Powered by Clinic Management System", "small")
+
+
+def render_prescription(data, mode="full"):
+    """
+    Returns PDF bytes.
+    """
+    buffer = BytesIO()
+    layout = PageLayout(new_canvas(buffer))
+    draw_prescription(layout, data, mode)
+    layout.finish()
+    layout.pdf.save()
+    return buffer.getvalue()
+
+
+def render_prescription_batch(items, out):
+    """
+    Day-end batch: sab prescriptions ek canvas pe.
+    out = file path / file object. Returns page count.
+    """
+    pdf = canvas.Canvas(out, pagesize=A4, invariant=True)
+    # sainkdon pages → compressed streams, memory kam
+    pdf.setPageCompression(1)
+
+    layout = PageLayout(pdf)
+    for data in items:
+        draw_prescription(layout, data, "full")
+    layout.finish()
+
+    pages = pdf.getPageNumber() - 1
+    pdf.save()
+    return pages
+
+
+def render_prescription_batch_file(items, directory=None):
+    """
+    Pool job: batch PDF ki file khud banata hai → (path, pages).
+    .part me likh ke rename → adhuri file kabhi .pdf naam se nahi dikhti;
+    fail hua to apni .part khud hatata hai. Caller (ya timeout ke baad
+    pdf_service ka on_abandoned) path ka maalik hai.
+    """
+    fd, part = tempfile.mkstemp(prefix="print_run_", suffix=".part", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            pages = render_prescription_batch(items, out)
+        path = part[:-len(".part")] + ".pdf"
+        os.replace(part, path)
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    return path, pages
+
+
+# =====================================================
+# INVOICE
+# =====================================================
+def invoice_data(inv, head=None):
+    return {
+        "letterhead": head,
+        "invoice_number": inv.invoice_number,
+        "patient_name": inv.patient.name,
+        "items": [(item.item_name, item.amount) for item in inv.items],
+        "total_amount": inv.total_amount,
+    }
+
+
+def draw_invoice(layout, data):
+    layout.start_document(_letterhead(data))
+
+    layout.text(LEFT, "Invoice", "heading")
+    layout.advance(25)
+
+    layout.text(LEFT, f"Invoice No: {data['invoice_number']}")
+    layout.advance(15)
+    layout.text(LEFT, f"Patient: {data['patient_name']}")
+    layout.advance(25)
+
+    for item_name, amount in data["items"]:
+        layout.ensure(STYLES["body"].leading)
+        layout.text(LEFT, item_name)
+        layout.right(f"₹{amount:.2f}")
+        layout.advance(15)
+
+    layout.advance(10)
+    layout.ensure(STYLES["heading"].leading)
+    layout.text(LEFT, "Total", "heading")
+    layout.right(f"₹{data['total_amount']:.2f}", "heading")
+    layout.advance(STYLES["heading"].leading)
+
+
+def render_invoice(data):
+    buffer = BytesIO()
+    layout = PageLayout(new_canvas(buffer))
+    draw_invoice(layout, data)
+    layout.finish()
+    layout.pdf.save()
+    return buffer.getvalue()
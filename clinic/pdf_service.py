@@ -0,0 +1,189 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+"""
+PDF RENDER SERVICE
+
+reportlab build CPU-bound hai; gunicorn worker thread pe chalane se wahi
+worker queue board / autosave serve nahi kar paata. Render ab ek chhote
+ProcessPoolExecutor me hota hai (har gunicorn worker ka apna pool):
+
+- bounded: PDF_RENDER_MAX_PENDING se zyada jobs → turant PdfRenderBusy
+- timeout: PDF_RENDER_TIMEOUT ke baad view ko PdfRenderTimeout
+- metrics: stats() + queue gehri hone pe warning log
+
+Renderers clinic.pdf_render me hain (plain dict in → bytes out).
+
+LIMITATION — request thread ab bhi wait karta hai:
+render() future.result(timeout=PDF_RENDER_TIMEOUT) pe block hota hai. CPU
+kaam pool process me hai (GIL free, doosre threads chalte hain), par jo
+thread PDF maang raha hai wo render khatam hone tak (ya timeout tak) busy
+rehta hai:
+- gunicorn sync worker (1 thread) → wo poora worker render bhar busy
+- gthread / threads > 1 → sirf ek thread; baaki requests chalti hain
+Isliye deploy gthread ke saath karo aur PDF_RENDER_TIMEOUT chhota rakho.
+Cache hit (clinic.pdf_cache) pe render hi nahi hota; finalize pe prerender
+cache pehle se bhar deta hai, to block sirf cold miss pe hota hai.
+202 + poll URL wala async download abhi nahi hai.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class PdfRenderError(Exception):
+    pass
+
+
+class PdfRenderBusy(PdfRenderError):
+    pass
+
+
+class PdfRenderTimeout(PdfRenderError):
+    pass
+
+
+class PdfRenderService:
+    """
+    Config:
+        PDF_RENDER_PROCESSES    pool size per worker, default 2 (0 → inline, TESTING default)
+        PDF_RENDER_TIMEOUT      seconds, default 20 — request thread itni der
+                                tak block ho sakta hai (module docstring dekho)
+        PDF_RENDER_MAX_PENDING  running + queued jobs, default 16
+        PDF_RENDER_BATCH_TIMEOUT  day-end print run (poora date range ek job),
+                                  seconds, default 120
+    """
+
+    def __init__(self, app=None):
+        self.processes = 0
+        self.timeout = 20
+        self.batch_timeout = 120
+        self.max_pending = 16
+        self._slots = None
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.processes = app.config.setdefault("PDF_RENDER_PROCESSES", 0 if app.testing else 2)
+        self.timeout = app.config.setdefault("PDF_RENDER_TIMEOUT", 20)
+        self.batch_timeout = app.config.setdefault("PDF_RENDER_BATCH_TIMEOUT", 120)
+        self.max_pending = app.config.setdefault("PDF_RENDER_MAX_PENDING", 16)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._stats = dict.fromkeys(
+            ("submitted", "completed", "failed", "timeouts", "rejected", "pending"), 0
+        )
+
+        app.extensions["pdf_render"] = self
+
+    # -----------------------------
+    # PUBLIC
+    # -----------------------------
+    def render(self, fn, *args, timeout=None, on_abandoned=None):
+        """
+        fn(*args) → bytes, pool process me. fn module-level hona chahiye
+        aur args picklable. Caller ka thread result (ya timeout) tak
+        block rehta hai.
+
+        timeout       default PDF_RENDER_TIMEOUT
+        on_abandoned  timeout ke baad job phir bhi poora ho to uske result
+                      ke saath call (jaise job ki banayi file hatana)
+        """
+        if not self.processes:
+            return fn(*args)
+
+        # poora pool + queue bhara hai → worker ko block mat karo
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            logger.warning("pdf render rejected, queue full %s", self.stats())
+            raise PdfRenderBusy()
+
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+
+        self._count("submitted")
+        self._count("pending")
+        future.add_done_callback(self._job_done)
+
+        depth = self.queue_depth()
+        if depth > self.processes:
+            logger.warning("pdf render queue depth %d %s", depth, self.stats())
+
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except FutureTimeout:
+            # job process me chalta rahega; slot done callback chhodega
+            self._count("timeouts")
+            if on_abandoned is not None:
+                future.add_done_callback(lambda f: self._abandoned(f, on_abandoned))
+            raise PdfRenderTimeout()
+        except BrokenProcessPool:
+            self._reset_pool()
+            raise PdfRenderError("render process crashed")
+
+    def queue_depth(self):
+        """
+        Jobs waiting for a free render process.
+        """
+        return max(0, self._stats.get("pending", 0) - self.processes)
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+        data["processes"] = self.processes
+        data["max_pending"] = self.max_pending
+        data["queue_depth"] = max(0, data.get("pending", 0) - self.processes)
+        return data
+
+    # -----------------------------
+    # INTERNALS
+    # -----------------------------
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] = self._stats.get(key, 0) + n
+
+    def _job_done(self, future):
+        self._count("pending", -1)
+        self._count("failed" if future.cancelled() or future.exception() else "completed")
+        self._slots.release()
+
+    def _abandoned(self, future, cleanup):
+        if future.cancelled() or future.exception() is not None:
+            return
+        try:
+            cleanup(future.result())
+        except Exception:
+            logger.warning("pdf render cleanup failed", exc_info=True)
+
+    def _get_pool(self):
+        # gunicorn fork ke baad parent ka pool child me kaam nahi karta
+        if self._pool is not None and self._pid == os.getpid():
+            return self._pool
+
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    # spawn → app threads (audit / draft flusher) fork nahi hote
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+        return self._pool
+
+    def _reset_pool(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+pdf_renderer = PdfRenderService()
@@ -0,0 +1,78 @@
+import re
+
+from flask import current_app, has_app_context
+
+"""
+PHONE NUMBERS
+
+Patient.phone E.164 me save hota hai ("+919812345678") — Patient model ka
+@validates("phone") yahi normalize_phone() chalata hai, to har form /
+walk-in / import ek hi format likhta hai.
+
+phone_rev = digits ulte ("876543218919"). Caller ke last 4-6 digits
+("5678") ulte karke phone_rev ka *prefix* ban jaate hain → btree range scan
+(idx_patient_clinic_phone_rev), '%5678' jaisa full scan nahi.
+"""
+
+# config: PHONE_DEFAULT_COUNTRY_CODE (bina "+" wale numbers ke liye)
+DEFAULT_COUNTRY_CODE = "91"
+
+# isse lambe (bina "+" ke) number me country code pehle se hai
+NATIONAL_NUMBER_MAX = 10
+
+
+def default_country_code():
+    if has_app_context():
+        return str(current_app.config.get("PHONE_DEFAULT_COUNTRY_CODE", DEFAULT_COUNTRY_CODE))
+    return DEFAULT_COUNTRY_CODE
+
+
+def digits_only(value):
+    return re.sub(r"\D", "", value or "")
+
+
+def normalize_phone(value, country_code=None):
+    """
+    "98123 45678", "098123-45678", "0091 9812345678" → "+919812345678".
+    Khaali → None. Jo E.164 me na bane (8-15 digits nahi) wo trim karke
+    waisa hi — data nahi khona.
+    """
+    if value is None:
+        return None
+    raw = value.strip()
+    if not raw:
+        return None
+
+    digits = digits_only(raw)
+    if raw.startswith("+"):
+        number = digits
+    elif digits.startswith("00"):
+        number = digits[2:]
+    elif digits.startswith("0"):
+        # trunk prefix (0 + STD / mobile)
+        number = (country_code or default_country_code()) + digits[1:]
+    elif len(digits) > NATIONAL_NUMBER_MAX:
+        number = digits
+    else:
+        number = (country_code or default_country_code()) + digits
+
+    if not 8 <= len(number) <= 15:
+        return raw
+    return "+" + number
+
+
+def reversed_digits(value):
+    rev = digits_only(value)[::-1]
+    return rev or None
+
+
+def prefix_range(prefix):
+    """
+    Digit strings jo prefix se shuru hote hain = [lo, hi) range.
+    hi None → upar koi limit nahi ("99" ke baad kuch nahi). Collation pe
+    depend nahi karta (LIKE 'p%' ko PG pe text_pattern_ops chahiye hota).
+    """
+    head = prefix.rstrip("9")
+    if not head:
+        return prefix, None
+    return prefix, head[:-1] + str(int(head[-1]) + 1)
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import contains_eager, joinedload
+
+from clinic.extensions import db
+from clinic.models import Appointment, Clinic, Patient, Prescription, User
+from clinic.pdf_render import prescription_data
+from clinic.utils import get_clinic_letterhead
+
+"""
+DAY-END PRINT RUN
+
+Date range ke sab finalized prescriptions ek hi PDF me:
+- Prescription + Appointment + Patient + items → ek joined query
+- letterhead / doctor clinic ke liye ek baar
+- render ek canvas pe (ek PDF, ek compression pass)
+
+Web (/prescriptions/print-run) aur CLI (flask print-prescriptions) dono
+yahi use karte hain.
+"""
+
+# Ek run me itne din se zyada nahi (galti se saal bhar ka print na ho)
+MAX_RUN_DAYS = 31
+
+
+def parse_run_dates(start, end):
+    """
+    "YYYY-MM-DD" strings → (start_date, end_date). Empty → today.
+    Raises ValueError for bad dates / ranges.
+    """
+    today = datetime.now().date()
+    start_date = datetime.strptime(start, "%Y-%m-%d").date() if start else today
+    end_date = datetime.strptime(end, "%Y-%m-%d").date() if end else start_date
+
+    if end_date < start_date:
+        raise ValueError("End date is before start date")
+
+    if end_date - start_date > timedelta(days=MAX_RUN_DAYS - 1):
+        raise ValueError(f"Print run can cover at most {MAX_RUN_DAYS} days")
+
+    return start_date, end_date
+
+
+def load_print_run(clinic_id, start_date, end_date):
+    """
+    Picklable prescription dicts (render_prescription_batch ke liye),
+    appointment date / time order me.
+    """
+    prescriptions = (
+        db.session.query(Prescription)
+        .join(Prescription.appointment)
+        .join(Appointment.patient)
+        .options(
+            contains_eager(Prescription.appointment)
+            .contains_eager(Appointment.patient),
+            joinedload(Prescription.items)
+        )
+        .filter(
+            Appointment.clinic_id == clinic_id,
+            Appointment.is_deleted == False,
+            Patient.is_deleted == False,
+            Appointment.date >= start_date,
+            Appointment.date <= end_date,
+            Prescription.finalized == True
+        )
+        .order_by(Appointment.date, Appointment.time, Appointment.id)
+        .all()
+    )
+
+    if not prescriptions:
+        return []
+
+    head = get_clinic_letterhead(clinic_id)
+
+    # one doctor = one clinic → clinic owner hi prescribing doctor hai
+    doctor = (
+        User.query
+        .join(Clinic, Clinic.owner_id == User.id)
+        .filter(Clinic.id == clinic_id)
+        .first()
+    )
+    doctor_name = (doctor.fullname or doctor.email) if doctor else "Doctor"
+
+    return [
+        prescription_data(
+            p.appointment,
+            p.appointment.patient,
+            p,
+            doctor_name,
+            (p.finalized_at or p.appointment.date).strftime("%d-%m-%Y"),
+            head
+        )
+        for p in prescriptions
+    ]
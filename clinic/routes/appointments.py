@@ -1,17 +1,26 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, send_file,jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, send_file,jsonify, Response, current_app, stream_with_context
 from ..extensions import db
-from ..models import User,Appointment, Patient,Prescription, PrescriptionItem,PrescriptionTemplateItem,PrescriptionTemplate
+from ..models import User,Clinic,Appointment, Patient,Prescription, PrescriptionItem,PrescriptionTemplateItem,PrescriptionTemplate
 from datetime import datetime
 from io import BytesIO
+import os
+import queue
+import time
 from clinic.routes.auth import login_required, role_required
-from clinic.utils import get_current_clinic_id, log_action
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import cm
-from reportlab.pdfgen import canvas
-from reportlab.platypus import Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
+from clinic.utils import get_clinic_letterhead, get_current_clinic, get_current_clinic_id, get_current_user, log_action
 from clinic.extensions import csrf
-from sqlalchemy import or_
+from clinic.live_events import broker, format_sse
+from clinic.draft_store import DRAFT_FIELDS, draft_store, parse_draft_value
+from clinic.pdf_cache import pdf_cache, prescription_pdf_key
+from clinic.pdf_render import prescription_data, render_prescription, render_prescription_batch_file
+from clinic.print_run import load_print_run, parse_run_dates
+from clinic.sequences import patient_numbers
+from clinic.pagination import KeysetPaginator
+from clinic.patient_search import patient_match_clause
+from clinic.slots import MAX_AVAILABILITY_DAYS, check_booking, free_slots, occupies_slot, slot_config
+from clinic.pdf_service import PdfRenderError, pdf_renderer
+from sqlalchemy import or_, func
+from sqlalchemy.orm import contains_eager
 
 appointments_bp = Blueprint("appointments_bp", __name__)
 
@@ -37,27 +46,37 @@ def get_secure_appointment(id):
 # ------------------------------------------------
 # APPOINTMENTS LIST
 # ------------------------------------------------
-@appointments_bp.route("/appointments")
-@login_required
-@role_required( "reception", "doctor")
-def appointments():
-    clinic_id = get_current_clinic_id()
-    page_queue = request.args.get("page_queue", 1, type=int)
-    page_inprogress = request.args.get("page_inprogress", 1, type=int)
-    page_completed = request.args.get("page_completed", 1, type=int)
-    page_cancelled = request.args.get("page_cancelled", 1, type=int)
+BOARD_TABS = {
+    "queue": "Queue",
+    "inprogress": "In Progress",
+    "completed": "Completed",
+    "cancelled": "Cancelled",
+}
+
+BOARD_PER_PAGE = 20
+
 
-    PER_PAGE = 20
+# din ka board time order me; idx_appt_clinic_date (clinic_id, date, time)
+board_pages = KeysetPaginator(
+    (Appointment.date, Appointment.time, Appointment.id), per_page=BOARD_PER_PAGE
+)
 
+
+def _board_args():
     tab = request.args.get("tab", "queue")
+    if tab not in BOARD_TABS:
+        tab = "queue"
+
     search = request.args.get("search", "").strip()
-    today = datetime.now().date()
-    date_filter = request.args.get("date")
 
     # default = today
-    if not date_filter:
-        date_filter = today.strftime("%Y-%m-%d")
+    date_filter = request.args.get("date") or datetime.now().date().strftime("%Y-%m-%d")
+    cursor = request.args.get(f"cursor_{tab}")
+
+    return tab, search, date_filter, cursor
 
+
+def _board_query(clinic_id, search, date_filter):
     base_query = (
     Appointment.query
     .join(Patient)
@@ -68,53 +87,219 @@ def appointments():
         )
     )
 
-
     if search:
-        base_query = base_query.filter(
-            or_(
-                Patient.name.ilike(f"%{search}%"),
-                Patient.phone.ilike(f"%{search}%")
-            )
-        )
-
+        base_query = base_query.filter(patient_match_clause(clinic_id, search))
 
     if date_filter:
         date_obj = datetime.strptime(date_filter, "%Y-%m-%d").date()
         base_query = base_query.filter(Appointment.date == date_obj)
 
-    queue = (
-        base_query
-        .filter(Appointment.status == "Queue")
-        .paginate(page=page_queue, per_page=PER_PAGE, error_out=False)
-    )
-    inprogress = (
-        base_query
-        .filter(Appointment.status == "In Progress")
-        .paginate(page=page_inprogress, per_page=PER_PAGE, error_out=False)
-    )
-    completed = (
+    return base_query
+
+
+def _board_counts(base_query):
+    """
+    Sab tabs ke counts ek hi GROUP BY query me.
+    """
+    rows = (
         base_query
-        .filter(Appointment.status == "Completed")
-        .paginate(page=page_completed, per_page=PER_PAGE, error_out=False)
+        .with_entities(Appointment.status, func.count(Appointment.id))
+        .group_by(Appointment.status)
+        .all()
     )
+    by_status = dict(rows)
+    return {tab: by_status.get(status, 0) for tab, status in BOARD_TABS.items()}
+
 
-    cancelled = (
+def _board_page(base_query, tab, cursor, total):
+    # Sirf active tab ki rows; patient join se hi load (N+1 nahi).
+    # total grouped count se aata hai → COUNT dobara nahi
+    return board_pages.page(
         base_query
-        .filter(Appointment.status == "Cancelled")
-        .paginate(page=page_cancelled, per_page=PER_PAGE, error_out=False)
+        .filter(Appointment.status == BOARD_TABS[tab])
+        .options(contains_eager(Appointment.patient)),
+        cursor=cursor,
+        count=total,
+        param=f"cursor_{tab}"
     )
 
+
+@appointments_bp.route("/appointments")
+@login_required
+@role_required( "reception", "doctor")
+def appointments():
+    clinic_id = get_current_clinic_id()
+    tab, search, date_filter, cursor = _board_args()
+
+    # 2 queries total: grouped counts + active tab page
+    base_query = _board_query(clinic_id, search, date_filter)
+    counts = _board_counts(base_query)
+    board = _board_page(base_query, tab, cursor, counts[tab])
+
     return render_template(
         "appointments/appointments.html",
         tab=tab,
+        tab_labels=BOARD_TABS,
+        counts=counts,
         search=search,
         date_filter=date_filter,
-        queue=queue,
-        inprogress=inprogress,
-        completed=completed,
-        cancelled=cancelled
+        board=board
     )
 
+
+# ------------------------------------------------
+# BOARD TAB (LAZY JSON PARTIAL)
+# ------------------------------------------------
+@appointments_bp.route("/appointments/board")
+@login_required
+@role_required( "reception", "doctor")
+def appointments_board():
+    """
+    Tab switch / page change → sirf us tab ki rows (HTML partial in JSON).
+    """
+    clinic_id = get_current_clinic_id()
+    tab, search, date_filter, cursor = _board_args()
+
+    base_query = _board_query(clinic_id, search, date_filter)
+
+    total = (
+        base_query
+        .filter(Appointment.status == BOARD_TABS[tab])
+        .with_entities(func.count(Appointment.id))
+        .scalar()
+    )
+    board = _board_page(base_query, tab, cursor, total)
+
+    context = dict(tab=tab, search=search, date_filter=date_filter, board=board)
+
+    return jsonify({
+        "tab": tab,
+        "total": total,
+        "offset": board.offset,
+        "rows": render_template("components/appointment_rows.html", **context),
+        "pager": render_template("components/appointment_pager.html", **context),
+    })
+
+# ------------------------------------------------
+# LIVE BOARD (SERVER-SENT EVENTS)
+# ------------------------------------------------
+def _status_snapshot(clinic_id, day):
+    """
+    {appointment_id: status} for one clinic-day (poll fallback ke liye).
+    """
+    rows = (
+        db.session.query(Appointment.id, Appointment.status)
+        .filter(
+            Appointment.clinic_id == clinic_id,
+            Appointment.date == day,
+            Appointment.is_deleted == False
+        )
+        .all()
+    )
+    return dict(rows)
+
+
+@appointments_bp.route("/appointments/stream")
+@login_required
+@role_required( "reception", "doctor")
+def appointments_stream():
+    """
+    SSE stream of status changes for the current clinic + date.
+
+    - Same worker ke commits → broker se turant
+    - Dusre workers ke commits → har APPOINTMENT_STREAM_POLL seconds
+      local snapshot diff (poll fallback)
+    - APPOINTMENT_STREAM_MAX_SECONDS ke baad stream band, browser
+      EventSource khud reconnect karta hai (worker hamesha ke liye
+      block nahi hota). gthread / gevent workers ke saath chalao.
+    """
+    clinic_id = get_current_clinic_id()
+    _, _, date_filter, _ = _board_args()
+    day = datetime.strptime(date_filter, "%Y-%m-%d").date()
+
+    cfg = current_app.config
+    poll_every = cfg.get("APPOINTMENT_STREAM_POLL", 15)
+    max_seconds = cfg.get("APPOINTMENT_STREAM_MAX_SECONDS", 300)
+    heartbeat = 15
+
+    def events():
+        q = broker.subscribe(clinic_id)
+        try:
+            snapshot = _status_snapshot(clinic_id, day)
+            db.session.remove()   # stream ke dauran DB connection hold mat karo
+
+            yield "retry: 3000\n\n"
+
+            started = time.monotonic()
+            next_poll = started + poll_every
+
+            while time.monotonic() - started < max_seconds:
+                wait = max(min(heartbeat, next_poll - time.monotonic()), 0.05)
+                try:
+                    payload = q.get(timeout=wait)
+                except queue.Empty:
+                    payload = None
+
+                if payload is not None:
+                    if date_filter in (payload["date"], payload["old_date"]):
+                        if payload["date"] == date_filter and payload["status"]:
+                            snapshot[payload["id"]] = payload["status"]
+                        else:
+                            snapshot.pop(payload["id"], None)
+                        yield format_sse(payload)
+                    continue
+
+                if time.monotonic() < next_poll:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                # ---- POLL FALLBACK (cross-worker changes) ----
+                fresh = _status_snapshot(clinic_id, day)
+                db.session.remove()
+                next_poll = time.monotonic() + poll_every
+
+                for appt_id in snapshot.keys() | fresh.keys():
+                    old, new = snapshot.get(appt_id), fresh.get(appt_id)
+                    if old != new:
+                        yield format_sse({
+                            "id": appt_id,
+                            "old_status": old,
+                            "old_date": date_filter,
+                            "status": new,
+                            "date": date_filter,
+                        })
+                snapshot = fresh
+        finally:
+            broker.unsubscribe(clinic_id, q)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",   # nginx buffering off
+        }
+    )
+
+
+@appointments_bp.route("/appointments/row/<int:id>")
+@login_required
+@role_required( "reception", "doctor")
+def appointment_row(id):
+    """
+    Single board row — live update me sirf badla hua row render hota hai.
+    """
+    appt = get_secure_appointment(id)
+    tab = request.args.get("tab", "queue")
+
+    return render_template(
+        "components/appointment_row.html",
+        a=appt,
+        tab=tab if tab in BOARD_TABS else "queue",
+        idx=""
+    )
+
+
 # ------------------------------------------------
 # ADD APPOINTMENT
 # ------------------------------------------------
@@ -123,8 +308,6 @@ def appointments():
 @role_required("reception")
 def add_appointment():
     clinic_id = get_current_clinic_id()
-    patients = Patient.query.filter_by(clinic_id=clinic_id,
-                                       is_deleted=False).all()
 
     if request.method == "POST":
         patient_id = request.form["patient_id"]
@@ -134,9 +317,16 @@ def add_appointment():
 
         patient = Patient.query.filter_by(
             id=patient_id,
-            clinic_id=clinic_id
+            clinic_id=clinic_id,
+            is_deleted=False
         ).first_or_404()
 
+        # slot capacity / working hours (slots configured hon tabhi)
+        error = check_booking(get_current_clinic(), date, time)
+        if error:
+            flash(error, "danger")
+            return redirect(url_for("appointments_bp.add_appointment"))
+
         appt = Appointment(
             clinic_id=clinic_id,
             patient_id=patient.id,
@@ -154,7 +344,48 @@ def add_appointment():
         flash("Appointment booked successfully!")
         return redirect(url_for("appointments_bp.appointments"))
 
-    return render_template("appointments/add_appointment.html", patients=patients)
+    # "Add New Patient" se wapas aaye → wahi patient selected (picker baaki search karta hai)
+    selected_patient = None
+    if request.args.get("patient_id", type=int):
+        selected_patient = Patient.query.filter_by(
+            id=request.args.get("patient_id", type=int),
+            clinic_id=clinic_id,
+            is_deleted=False
+        ).first()
+
+    return render_template("appointments/add_appointment.html", selected_patient=selected_patient)
+
+# ------------------------------------------------
+# SLOT AVAILABILITY (JSON)
+# ------------------------------------------------
+@appointments_bp.route("/appointments/availability")
+@login_required
+@role_required("reception", "doctor")
+def availability():
+    """
+    ?start=YYYY-MM-DD (default aaj) &days=7 → har din ke free slots.
+    """
+    clinic = get_current_clinic()
+    cfg = slot_config(clinic)
+    if cfg is None:
+        return jsonify({"configured": False, "days": []})
+
+    try:
+        start = (
+            datetime.strptime(request.args["start"], "%Y-%m-%d").date()
+            if request.args.get("start") else datetime.now().date()
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid start date"}), 400
+
+    days = min(max(request.args.get("days", 7, type=int), 1), MAX_AVAILABILITY_DAYS)
+
+    return jsonify({
+        "configured": True,
+        "slot_minutes": cfg.minutes,
+        "capacity": cfg.capacity,
+        "days": free_slots(clinic, start, days)
+    })
 
 # ------------------------------------------------
 # DELETE APPOINTMENT
@@ -183,6 +414,7 @@ def edit_appointment(id):
         date_str = request.form.get("date")
         time_str = request.form.get("time")
         status = request.form.get("status")
+        old_date, old_time, old_status = appt.date, appt.time, appt.status
 
         if date_str:
             appt.date = datetime.strptime(date_str, "%Y-%m-%d").date()
@@ -193,6 +425,15 @@ def edit_appointment(id):
         if status in ["Queue", "In Progress", "Completed", "Cancelled"]:
             appt.status = status
 
+        # naya slot le raha hai (move / un-cancel) → capacity check
+        moved = (appt.date, appt.time) != (old_date, old_time) or old_status == "Cancelled"
+        if moved and occupies_slot(appt.status, appt.type, appt.is_deleted):
+            error = check_booking(get_current_clinic(), appt.date, appt.time, exclude_id=appt.id)
+            if error:
+                db.session.rollback()
+                flash(error, "danger")
+                return redirect(url_for("appointments_bp.appointments"))
+
         db.session.commit()
         flash("Appointment updated!")
         return redirect(url_for("appointments_bp.appointments"))
@@ -207,8 +448,6 @@ def edit_appointment(id):
 @role_required("doctor")
 def walkin():
     clinic_id = get_current_clinic_id()
-    patients = Patient.query.filter_by(clinic_id=clinic_id,
-                                       is_deleted=False).all()
 
     if request.method == "POST":
         patient_id = request.form.get("patient_id")
@@ -233,13 +472,7 @@ def walkin():
             age = int(age_raw) if age_raw and age_raw.isdigit() else None
 
             # generate patient number
-            last_patient = (
-                Patient.query
-                .filter_by(clinic_id=clinic_id)
-                .order_by(Patient.patient_no.desc())
-                .first()
-            )
-            patient_no = (last_patient.patient_no + 1) if last_patient else 1
+            patient_no = patient_numbers.next(clinic_id)
 
             patient = Patient(
                 clinic_id=clinic_id,
@@ -262,7 +495,8 @@ def walkin():
         else:
             patient = Patient.query.filter_by(
                 id=int(patient_id),
-                clinic_id=clinic_id
+                clinic_id=clinic_id,
+                is_deleted=False
             ).first_or_404()
 
             patient.last_visit = datetime.now().date()
@@ -287,10 +521,7 @@ def walkin():
 
         return redirect(url_for("appointments_bp.consult", id=appt.id))
 
-    return render_template(
-        "appointments/walkin.html",
-        patients=patients
-    )
+    return render_template("appointments/walkin.html")
 
 # ------------------------------------------------
 # STATUS ACTIONS
@@ -309,6 +540,7 @@ def start(id):
 @role_required("doctor")
 def complete(id):
     appt = get_secure_appointment(id)
+    draft_store.apply(appt)
     appt.prescription_locked = True
     appt.status = "Completed"
     db.session.commit()
@@ -333,7 +565,7 @@ def consult(id):
     appt = get_secure_appointment(id)
     clinic_id = get_current_clinic_id()
 
-    doctor = User.query.get(session["user_id"])
+    doctor = get_current_user()
     speciality = (doctor.speciality or "").strip().lower()
 
     SPECIALITY_VITALS = {
@@ -357,6 +589,9 @@ def consult(id):
         clinic_id=clinic_id
     ).first_or_404()
 
+    # pending autosave draft pehle appointment pe
+    applied = draft_store.apply(appt, drop=request.method == "POST")
+
     if request.method == "POST":
         appt.symptoms = request.form.get("symptoms")
         appt.diagnosis = request.form.get("diagnosis")
@@ -374,6 +609,9 @@ def consult(id):
             datetime.strptime(fu, "%Y-%m-%d").date() if fu else None
         )
 
+        # open autosave tabs ko pata chale ki draft badal gaya
+        appt.draft_revision = (appt.draft_revision or 0) + 1
+
         db.session.commit()
         flash("Consultation saved")
         return redirect(url_for("appointments_bp.consult", id=id))
@@ -394,9 +632,13 @@ def consult(id):
 
     medicines = []
 
+    if applied:
+        db.session.commit()
+
     if prescription:
         for item in prescription.items:
             medicines.append({
+                "id": item.id,
                 "med": item.medicine_name,
                 "dose": item.dose,
                 "days": item.duration_days,
@@ -413,17 +655,30 @@ def consult(id):
 
 
 # ------------------------------------------------
-# AUTOSAVE (SAFE)
+# AUTOSAVE (WRITE-BEHIND, VERSIONED DELTA)
 # ------------------------------------------------
+def _draft_conflict(draft):
+    return jsonify({
+        "status": "conflict",
+        "revision": draft.revision,
+        "fields": draft.fields
+    }), 409
+
+
 @appointments_bp.route("/autosave/<int:id>", methods=["POST"])
 @login_required
 @csrf.exempt   # ✅ VERY IMPORTANT
 def autosave(id):
-    appt = get_secure_appointment(id)
-    if appt.prescription_locked:
-        return jsonify({"status": "locked"}), 200
+    """
+    Payload: {"revision": <base revision>, "fields": {<sirf badle hue fields>}}
+    (purana flat {field: value} payload bhi chalta hai, bina revision check ke)
 
+    Draft draft_store me jaata hai (memory + local journal), appointment
+    row me nahi — DB write flusher / consult / finalize / complete karte hain.
 
+    - kuch bhi nahi badla → koi write nahi
+    - base revision purana → 409 + current draft values
+    """
     if not request.is_json:
         return jsonify({"status": "ignored"}), 200
 
@@ -431,32 +686,55 @@ def autosave(id):
     if not data:
         return jsonify({"status": "ignored"}), 200
 
-    allowed_fields = [
-        "symptoms", "diagnosis", "advice", "lab_tests",
-        "bp", "pulse", "spo2", "temperature", "weight",
-        "follow_up_date"
-    ]
+    base_revision = data.get("revision")
+    fields = data.get("fields", {}) if "fields" in data else data
+
+    # Draft memory me hai to DB touch hi nahi hota
+    draft = draft_store.get(id)
+    if draft is not None and base_revision is not None and base_revision != draft.revision:
+        draft = draft_store.get(id, fresh=True)
+
+    if draft is None or draft.clinic_id != get_current_clinic_id():
+        appt = get_secure_appointment(id)
+        if appt.prescription_locked:
+            return jsonify({"status": "locked"}), 200
+        draft = draft_store.seed(appt)
+
+    if base_revision is not None and base_revision != draft.revision:
+        return _draft_conflict(draft)
 
-    for field in allowed_fields:
-        if field not in data:
+    # ---- NO-OP DETECTION ----
+    changes = {}
+    for field in DRAFT_FIELDS:
+        if field not in fields:
             continue
 
-        value = data[field]
+        value = fields[field]
+        try:
+            parse_draft_value(field, value)
+        except (TypeError, ValueError):
+            continue  #  invalid date ignored
 
-        if field == "follow_up_date":
-            try:
-                appt.follow_up_date = (
-                    datetime.strptime(value, "%Y-%m-%d").date()
-                    if value else None
-                )
-            except Exception:
-                continue  #  invalid date ignored
-        else:
-            setattr(appt, field, value)
+        if draft.fields.get(field) != value:
+            changes[field] = value
 
-    db.session.commit()
-    log_action("CONSULT_AUTOSAVE")  
-    return jsonify({"status": "saved"}), 200
+    if not changes:
+        return jsonify({"status": "unchanged", "revision": draft.revision}), 200
+
+    saved = draft_store.save(draft, changes)
+
+    if saved is None:
+        # journal me kisi aur worker ne save kiya / consult band ho gaya
+        fresh = draft_store.get(id, fresh=True)
+        if fresh is None:
+            appt = get_secure_appointment(id)
+            if appt.prescription_locked:
+                return jsonify({"status": "locked"}), 200
+            fresh = draft_store.seed(appt)
+        return _draft_conflict(fresh)
+
+    log_action("CONSULT_AUTOSAVE")
+    return jsonify({"status": "saved", "revision": saved.revision}), 200
 
 
 # ------------------------------------------------
@@ -470,22 +748,6 @@ def prescription_pdf(id):
     mode = request.args.get("mode", "full")  # lab | full
     appt = get_secure_appointment(id)
 
-    # ---------------- DOCTOR ----------------
-    doctor = User.query.filter_by(
-        id=session.get("user_id"),
-        clinic_id=get_current_clinic_id()
-    ).first()
-
-    doctor_name = (
-        doctor.fullname
-        if doctor and doctor.fullname
-        else doctor.email
-        if doctor
-        else "Doctor"
-    )
-
-    today_str = datetime.now().strftime("%d-%m-%Y")
-
     # ---------------- PRESCRIPTION ----------------
     prescription = Prescription.query.filter_by(
         appointment_id=appt.id
@@ -500,240 +762,32 @@ def prescription_pdf(id):
         flash("Finalize prescription before downloading", "warning")
         return redirect(url_for("appointments_bp.consult", id=id))
 
-    # ---------------- PATIENT ----------------
-    patient = Patient.query.filter_by(
-        id=appt.patient_id,
-        clinic_id=get_current_clinic_id()
-    ).first_or_404()
-
-    # ---------------- PDF SETUP ----------------
-    buffer = BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=A4)
-
-    width, height = A4
-
-    LEFT = 2 * cm
-    RIGHT = width - 2 * cm
-    TOP = height - 2 * cm
-    BOTTOM = 2 * cm
-
-    y = TOP
-    pdf.setFont("Helvetica", 11)
-
-    def new_page():
-        nonlocal y
-        pdf.setFont("Helvetica", 9)
-        pdf.drawRightString(RIGHT, BOTTOM - 10, f"Page {pdf.getPageNumber()}")
-        pdf.showPage()
-        pdf.setFont("Helvetica", 11)
-        y = TOP
-
-    def check_space(space=80):
-        nonlocal y
-        if y < BOTTOM + space:
-            new_page()
-
-    # ---------------- CLINIC HEADER ----------------
-    pdf.setFont("Helvetica-Bold", 18)
-    pdf.drawCentredString(width / 2, y, "YOUR CLINIC NAME")
-    y -= 22
-
-    pdf.setFont("Helvetica", 11)
-    pdf.drawCentredString(width / 2, y, "General Physician | Reg No: XXXXX")
-    y -= 16
-
-    pdf.drawCentredString(
-        width / 2,
-        y,
-        "Address Line 1, City - Pincode | Ph: 9XXXXXXXXX"
-    )
-    y -= 20
-
-    pdf.line(LEFT, y, RIGHT, y)
-    y -= 25
-
-    pdf.setFont("Helvetica-Bold", 11)
-    pdf.drawString(LEFT, y, f"Doctor: {doctor_name}")
-    pdf.drawRightString(RIGHT, y, f"Date: {today_str}")
-    y -= 25
-
-    # ---------------- PATIENT DETAILS ----------------
-    pdf.setFont("Helvetica-Bold", 12)
-    pdf.drawString(LEFT, y, "Patient Details")
-    y -= 14
-
-    pdf.setFont("Helvetica", 11)
-    pdf.drawString(LEFT, y, f"Name: {patient.name}")
-    pdf.drawString(10 * cm, y, f"Age/Gender: {patient.age} / {patient.gender}")
-    y -= 14
-
-    pdf.drawString(LEFT, y, f"Patient ID: {patient.patient_no}")
-    pdf.drawRightString(RIGHT, y, f"Visit Type: {appt.type}")
-    y -= 20
-
-    # ---------------- VITALS ----------------
-    vitals = [
-        ("BP", appt.bp),
-        ("Pulse", appt.pulse),
-        ("SpO2", appt.spo2),
-        ("Temperature", appt.temperature),
-        ("Weight", appt.weight),
-    ]
-
-    if any(v for _, v in vitals):
-        check_space()
-        pdf.setFont("Helvetica-Bold", 12)
-        pdf.drawString(LEFT, y, "Vitals")
-        y -= 16
-
-        pdf.setFont("Helvetica", 11)
-        for label, value in vitals:
-            if value:
-                pdf.drawString(LEFT + 5, y, f"{label}: {value}")
-                y -= 14
-        y -= 10
-
-    # ---------------- SYMPTOMS ----------------
-    if appt.symptoms:
-        check_space()
-        pdf.setFont("Helvetica-Bold", 12)
-        pdf.drawString(LEFT, y, "Symptoms")
-        y -= 16
-
-        pdf.setFont("Helvetica", 11)
-        for s in appt.symptoms.split(","):
-            pdf.drawString(LEFT + 5, y, f"- {s.strip()}")
-            y -= 14
-        y -= 10
-
-    # ---------------- DIAGNOSIS ----------------
-    if appt.diagnosis:
-        check_space()
-        pdf.setFont("Helvetica-Bold", 12)
-        pdf.drawString(LEFT, y, "Diagnosis")
-        y -= 16
-
-        pdf.setFont("Helvetica", 11)
-        for d in appt.diagnosis.split(","):
-            pdf.drawString(LEFT + 5, y, f"- {d.strip()}")
-            y -= 14
-        y -= 10
-
-    # ---------------- LAB TESTS ----------------
-    if appt.lab_tests:
-        check_space()
-        pdf.setFont("Helvetica-Bold", 12)
-        pdf.drawString(LEFT, y, "Lab Tests")
-        y -= 16
-
-        pdf.setFont("Helvetica", 11)
-        for line in appt.lab_tests.split("\n"):
-            pdf.drawString(LEFT + 5, y, f"- {line.strip()}")
-            y -= 14
-        y -= 10
-
-    if mode == "lab":
-        pdf.setPageCompression(0)
-        pdf.save()
-        buffer.seek(0)
-        log_action("LAB_PRINT")
-        return send_file(buffer, mimetype="application/pdf", as_attachment=False)
-
-    # ---------------- RX ----------------
-    check_space()
-    pdf.setFont("Helvetica-Bold", 16)
-    pdf.drawString(LEFT, y, "℞")
-    y -= 18
-
-    # ---------------- MEDICINES ----------------
-    check_space()
-    pdf.setFont("Helvetica-Bold", 11)
-    pdf.drawString(LEFT, y, "Medicine")
-    pdf.drawString(8.5 * cm, y, "Dose")
-    pdf.drawString(11.5 * cm, y, "Duration")
-    pdf.drawString(14 * cm, y, "Instructions")
-    y -= 10
-
-    pdf.line(LEFT, y, RIGHT, y)
-    y -= 10
-
-    pdf.setFont("Helvetica", 11)
-
-    if prescription and prescription.items:
-        for item in prescription.items:
-            check_space()
-            pdf.drawString(LEFT, y, item.medicine_name)
-            pdf.drawString(8.5 * cm, y, item.dose or "-")
-            pdf.drawString(11.5 * cm, y, f"{item.duration_days or '-'} days")
-            pdf.drawString(14 * cm, y, item.instructions or "-")
-            y -= 14
-    else:
-        pdf.drawString(LEFT, y, "No medicines prescribed")
-        y -= 14
-
-    y -= 10
-
-    # ---------------- ADVICE ----------------
-    if appt.advice:
-        check_space()
-        pdf.setFont("Helvetica-Bold", 12)
-        pdf.drawString(LEFT, y, "Advice")
-        y -= 14
-
-        pdf.setFont("Helvetica", 11)
-        for idx, a in enumerate(appt.advice.split(","), start=1):
-            pdf.drawString(LEFT + 5, y, f"{idx}. {a.strip()}")
-            y -= 14
-        y -= 10
-
-    # ---------------- FOLLOW UP ----------------
-    if appt.follow_up_date:
-        check_space()
-        pdf.setFont("Helvetica-Bold", 11)
-        pdf.drawString(LEFT, y, "Follow-up On:")
-        pdf.setFont("Helvetica", 11)
-        pdf.drawString(LEFT + 80, y, appt.follow_up_date.strftime("%d-%m-%Y"))
-        y -= 20
-
-    # ---------------- FOOTER ----------------
-    check_space(60)
-    pdf.line(LEFT, y, RIGHT, y)
-    y -= 12
-
-    pdf.setFont("Helvetica", 9)
-    pdf.drawString(
-        LEFT,
-        y,
-        "This is a computer-generated prescription and is valid without a physical signature."
-    )
-
-    pdf.drawRightString(
-        RIGHT,
-        y,
-        "Powered by Clinic Management System"
-    )
-
-    # ---------------- FINALIZE ----------------
-    pdf.setPageCompression(0)
-    pdf.save()
-    buffer.seek(0)
+    # ---------------- FINALIZED → CACHED FILE ----------------
+    key = prescription_pdf_key(prescription) if mode == "full" else None
+    if key:
+        log_action("PRESCRIPTION_PRINT")
 
-    log_action("PRESCRIPTION_PRINT")
-    return send_file(buffer, mimetype="application/pdf", as_attachment=False)
+        # reprint: browser ke paas same copy hai → render / disk read bhi nahi
+        if key in request.if_none_match:
+            response = Response(status=304)
+        else:
+            path = pdf_cache.path(key)
+            if path is None:
+                try:
+                    path = pdf_cache.put(key, _render_finalized_prescription(appt, prescription))
+                except PdfRenderError:
+                    flash("Prescription PDF is busy, please try again in a moment", "warning")
+                    return redirect(url_for("appointments_bp.consult", id=id))
+            response = send_file(path, mimetype="application/pdf", as_attachment=False)
+
+        response.set_etag(key)
+        # patient data → shared caches me nahi, har baar ETag se revalidate
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
 
-# ------------------------------------------------
-# PRESCRIPTION PDF (FULL & FINAL)
-# ------------------------------------------------
-@appointments_bp.route("/prescription/<int:id>")
-@login_required
-@role_required("reception", "doctor")
-def prescription_pdf(id):
-    mode = request.args.get("mode", "full")  # lab | full
-    appt = get_secure_appointment(id)
-    doctor = User.query.filter_by(
-    id=session.get("user_id"),
-    clinic_id=get_current_clinic_id()
-    ).first()
+    # ---------------- DOCTOR ----------------
+    doctor = get_current_user()
 
     doctor_name = (
         doctor.fullname
@@ -743,244 +797,131 @@ def prescription_pdf(id):
         else "Doctor"
     )
 
+    today_str = datetime.now().strftime("%d-%m-%Y")
 
-    prescription = (
-        Prescription.query
-        .filter_by(appointment_id=appt.id)
-        .first()
-    )
-    
-    # 🔒 Block lab print AFTER finalization
-    if mode == "lab" and appt.prescription_locked:
-        flash("Lab print not allowed after finalization", "warning")
-        return redirect(url_for("appointments_bp.consult", id=id))
+    # ---------------- PATIENT ----------------
+    patient = Patient.query.filter_by(
+        id=appt.patient_id,
+        clinic_id=get_current_clinic_id()
+    ).first_or_404()
 
-    # 🔒 Full print requires finalization
-    if mode == "full" and not appt.prescription_locked:
-        flash("Finalize prescription before downloading", "warning")
+    try:
+        data = pdf_renderer.render(
+            render_prescription,
+            prescription_data(
+                appt, patient, prescription, doctor_name, today_str,
+                get_clinic_letterhead(appt.clinic_id)
+            ),
+            mode
+        )
+    except PdfRenderError:
+        flash("Prescription PDF is busy, please try again in a moment", "warning")
         return redirect(url_for("appointments_bp.consult", id=id))
 
+    log_action("LAB_PRINT" if mode == "lab" else "PRESCRIPTION_PRINT")
+    return send_file(BytesIO(data), mimetype="application/pdf", as_attachment=False)
 
-    clinic_id = get_current_clinic_id()
+
+def _render_finalized_prescription(appt, prescription):
+    """
+    Finalized copy sirf DB data pe depend karta hai (kaun print kar raha
+    hai / aaj ki date pe nahi) → cache ke liye safe.
+    """
     patient = Patient.query.filter_by(
         id=appt.patient_id,
-        clinic_id=clinic_id
+        clinic_id=appt.clinic_id
     ).first_or_404()
 
-    buffer = BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=A4)
-
-    width, height = A4
-    y = height - 2 * cm
-
-    def new_page():
-        nonlocal y
-        pdf.showPage()
-        pdf.setFont("Helvetica", 11)
-        y = height - 2 * cm
-
-    def check_space(space=40):
-        nonlocal y
-        if y < space:
-            new_page()
-
-    # ---------------- CLINIC HEADER ----------------
-    pdf.setFont("Helvetica-Bold", 18)
-    pdf.drawCentredString(width / 2, y, "YOUR CLINIC NAME")
-    y -= 22
-
-    pdf.setFont("Helvetica", 11)
-    pdf.drawCentredString(width / 2, y, "General Physician | Reg No: XXXXX")
-    y -= 16
-
-    pdf.drawCentredString(width / 2, y, "Address Line 1, City - Pincode | Ph: 9XXXXXXXXX")
-    y -= 20
-
-    pdf.line(2 * cm, y, width - 2 * cm, y)
-    y -= 25
-
-    # Doctor + Date row
-    pdf.setFont("Helvetica-Bold", 11)
-    pdf.drawString(2 * cm, y, f"Doctor: {doctor_name}")
-    pdf.drawRightString(
-        width - 2 * cm,
-        y,
-        f"Date: {datetime.now().strftime('%d-%m-%Y')}"
+    # one doctor = one clinic → clinic owner hi prescribing doctor hai
+    doctor = (
+        User.query
+        .join(Clinic, Clinic.owner_id == User.id)
+        .filter(Clinic.id == appt.clinic_id)
+        .first()
     )
-    y -= 25
-
-
-
-    # ---------------- PATIENT INFO ----------------
-    pdf.setFont("Helvetica-Bold", 12)
-    pdf.drawString(2 * cm, y, "Patient Details")
-    y -= 14
-
-    pdf.setFont("Helvetica", 11)
-    pdf.drawString(2 * cm, y, f"Name: {patient.name}")
-    pdf.drawString(10 * cm, y, f"Age/Gender: {patient.age} / {patient.gender}")
-    y -= 14
-
-    pdf.drawString(2 * cm, y, f"Patient ID: {patient.patient_no}")
-    pdf.drawRightString(width - 2 * cm, y, f"Visit Type: {appt.type}")
-    y -= 20
-
-
-    # ---------------- VITALS ----------------
-    vitals = [
-        ("BP", appt.bp),
-        ("Pulse", appt.pulse),
-        ("SpO2", appt.spo2),
-        ("Temperature", appt.temperature),
-        ("Weight", appt.weight),
-    ]
-
-    if any(v for _, v in vitals):
-        check_space()
-        pdf.setFont("Helvetica-Bold", 12)
-        pdf.drawString(2 * cm, y, "Vitals")
-        y -= 18
-
-        pdf.setFont("Helvetica", 11)
-        for label, value in vitals:
-            if value:
-                pdf.drawString(2.2 * cm, y, f"{label}: {value}")
-                y -= 14
-        y -= 10
-
-    # ---------------- SYMPTOMS ----------------
-    if appt.symptoms:
-        check_space()
-        pdf.setFont("Helvetica-Bold", 12)
-        pdf.drawString(2 * cm, y, "Symptoms")
-        y -= 18
-
-        pdf.setFont("Helvetica", 11)
-        for s in appt.symptoms.split(","):
-            pdf.drawString(2.2 * cm, y, f"- {s.strip()}")
-            y -= 14
-        y -= 10
-
-    # ---------------- DIAGNOSIS ----------------
-    if appt.diagnosis:
-        check_space()
-        pdf.setFont("Helvetica-Bold", 12)
-        pdf.drawString(2 * cm, y, "Diagnosis")
-        y -= 18
-
-        pdf.setFont("Helvetica", 11)
-        for d in appt.diagnosis.split(","):
-            pdf.drawString(2.2 * cm, y, f"- {d.strip()}")
-            y -= 14
-        y -= 10
-    # ---------------- LAB TESTS ----------------
-    if hasattr(appt, "lab_tests") and appt.lab_tests:
-        check_space()
-        pdf.setFont("Helvetica-Bold", 12)
-        pdf.drawString(2 * cm, y, "Lab Tests")
-        y -= 18
-
-        pdf.setFont("Helvetica", 11)
-        for line in appt.lab_tests.split("\n"):
-            pdf.drawString(2.2 * cm, y, f"- {line.strip()}")
-            y -= 14
-        y -= 10
-    # 🧪 LAB PRINT → STOP HERE
-    if mode == "lab":
-        pdf.save()
-        buffer.seek(0)
-        log_action("LAB_PRINT")
-        return send_file(
-            buffer,
-            mimetype="application/pdf",
-            as_attachment=False,  # true fordor downaload, false for open in browser
-            # download_name=f"Lab_Request_{patient.name}.pdf"     # use for only  download
-        )
-    # ---------------- RX ----------------
-    pdf.setFont("Helvetica-Bold", 16)
-    pdf.drawString(2 * cm, y, "℞")
-    y -= 18
-
-    # ---------------- MEDICINES ----------------
-    if mode != "lab":
-        check_space()
-        pdf.setFont("Helvetica-Bold", 11)
-        pdf.drawString(2 * cm, y, "Medicine")
-        pdf.drawString(9 * cm, y, "Dose")
-        pdf.drawString(12 * cm, y, "Duration")
-        pdf.drawString(15 * cm, y, "Instructions")
-        y -= 10
-
-        pdf.line(2 * cm, y, width - 2 * cm, y)
-        y -= 10
-
-        pdf.setFont("Helvetica", 11)
+    doctor_name = (doctor.fullname or doctor.email) if doctor else "Doctor"
+
+    data = prescription_data(
+        appt,
+        patient,
+        prescription,
+        doctor_name,
+        prescription.finalized_at.strftime("%d-%m-%Y"),
+        get_clinic_letterhead(appt.clinic_id)
+    )
+    return pdf_renderer.render(render_prescription, data, "full")
 
-        for item in prescription.items:
-            check_space()
-            pdf.drawString(2 * cm, y, item.medicine_name)
-            pdf.drawString(9 * cm, y, item.dose or "-")
-            pdf.drawString(12 * cm, y, f"{item.duration_days or '-'} days")
-            pdf.drawString(15 * cm, y, item.instructions or "-")
-            y -= 14
 
-        y -= 10
+def _prerender_prescription(appointment_id):
+    # background thread → fresh queries, request objects nahi
+    appt = db.session.get(Appointment, appointment_id)
+    prescription = Prescription.query.filter_by(appointment_id=appointment_id).first()
+    if appt is None or prescription_pdf_key(prescription) is None:
+        return None
+    return _render_finalized_prescription(appt, prescription)
 
-    
-    # ---------------- ADVICE ----------------
-    if appt.advice:
-        check_space()
-        pdf.setFont("Helvetica-Bold", 12)
-        pdf.drawString(2 * cm, y, "Advice")
-        y -= 14
-
-        pdf.setFont("Helvetica", 11)
-        for idx, a in enumerate(appt.advice.split(","), start=1):
-            pdf.drawString(2.2 * cm, y, f"{idx}. {a.strip()}")
-            y -= 14
-        y -= 10
-
-
-    # ---------------- FOLLOW UP ----------------
-    if appt.follow_up_date:
-        check_space()
-        pdf.setFont("Helvetica-Bold", 11)
-        pdf.drawString(2 * cm, y, "Follow-up On:")
-        pdf.setFont("Helvetica", 11)
-        pdf.drawString(5 * cm, y, appt.follow_up_date.strftime("%d-%m-%Y"))
-        y -= 20
-
-
-    # ---------------- FOOTER ----------------
-    check_space(60)
-    pdf.line(2 * cm, y, width - 2 * cm, y)
-    y -= 12
-
-    pdf.setFont("Helvetica", 9)
-    pdf.drawString(
-        2 * cm,
-        y,
-        "This is a computer-generated prescription and is valid without a physical signature."
-    )
-    y -= 12
 
-    pdf.drawRightString(
-        width - 2 * cm,
-        y,
-        "Powered by Clinic Management System"
-    )
+# ------------------------------------------------
+# DAY-END PRINT RUN (ALL FINALIZED PRESCRIPTIONS)
+# ------------------------------------------------
+@appointments_bp.route("/prescriptions/print-run")
+@login_required
+@role_required("reception", "doctor")
+def prescription_print_run():
+    """
+    ?start=YYYY-MM-DD&end=YYYY-MM-DD (default: aaj) → ek PDF.
+    Render job temp file khud banata hai (path lautata hai), response
+    wahan se stream hota hai. Timeout pe route file ko chhoota nahi — job
+    baad me poora ho to pdf_service on_abandoned se file hatti hai.
+    """
+    back = redirect(url_for("appointments_bp.appointments", tab="completed"))
+
+    try:
+        start_date, end_date = parse_run_dates(
+            request.args.get("start"),
+            request.args.get("end")
+        )
+    except ValueError as e:
+        flash(str(e), "warning")
+        return back
+
+    items = load_print_run(get_current_clinic_id(), start_date, end_date)
+    if not items:
+        flash("No finalized prescriptions for the selected dates", "info")
+        return back
+
+    try:
+        path, _ = pdf_renderer.render(
+            render_prescription_batch_file, items,
+            timeout=pdf_renderer.batch_timeout,
+            on_abandoned=_discard_print_run
+        )
+    except PdfRenderError:
+        flash("Print run is busy, please try again in a moment", "warning")
+        return back
+
+    log_action("PRESCRIPTION_PRINT_RUN")
 
+    # open handle rakh ke file unlink → response khatam hote hi disk free
+    # (call_on_close file responses pe fire nahi hota)
+    pdf_file = open(path, "rb")
+    os.remove(path)
 
-    # ---------------- FINALIZE ----------------
-    pdf.save()
-    buffer.seek(0)
-    log_action("PRESCRIPTION_PRINT")
-    return send_file(
-        buffer,
+    response = send_file(
+        pdf_file,
         mimetype="application/pdf",
-        as_attachment=False,  # true fordor downaload, false for open in browser
-        # download_name=f"Prescription_{patient.name}.pdf"    # use for only  download
+        as_attachment=False,
+        download_name=f"prescriptions_{start_date}_{end_date}.pdf"
     )
+    response.cache_control.private = True
+    response.cache_control.no_store = True
+    return response
+
+
+def _discard_print_run(result):
+    path, _ = result
+    if os.path.exists(path):
+        os.remove(path)
 
 
 # -----------------------------------------------
@@ -1021,14 +962,19 @@ def finalize_prescription(id):
         )
         lines.append(line)
 
+    draft_store.apply(appt)
+
     prescription.final_text = "\n".join(lines)
     prescription.finalized = True
     prescription.finalized_at = datetime.utcnow()
 
     appt.prescription_locked = True
-    log_action("PRESCRIPTION_FINALIZED")
 
     db.session.commit()
+    log_action("PRESCRIPTION_FINALIZED")
+
+    # pehla download bhi cache se aaye
+    pdf_cache.prerender(prescription_pdf_key(prescription), _prerender_prescription, appt.id)
 
     flash("Prescription finalized successfully.", "success")
     return redirect(url_for("appointments_bp.consult", id=id))
@@ -1037,6 +983,9 @@ def finalize_prescription(id):
 # SAVE PRESCRIPTION (SAFE & FINAL)
 # -----------------------------------------------
 
+PRESCRIPTION_ITEM_FIELDS = ("medicine_name", "dose", "duration_days", "instructions")
+
+
 @appointments_bp.route("/save_prescription/<int:id>", methods=["POST"])
 @login_required
 @role_required("doctor")
@@ -1064,34 +1013,91 @@ def save_prescription(id):
     if not data or "items" not in data:
         return jsonify({"error": "Invalid payload"}), 400
 
+    # ---- PARSE INCOMING ROWS ----
+    incoming = []
+    for item in data.get("items", []):
+        med = (item.get("medicine") or "").strip()
+        if not med:
+            continue
+
+        try:
+            item_id = int(item.get("id")) if item.get("id") else None
+        except (TypeError, ValueError):
+            item_id = None
+
+        incoming.append((item_id, item.get("key"), {
+            "medicine_name": med,
+            "dose": item.get("dose"),
+            "duration_days": int(item["days"]) if str(item.get("days")).isdigit() else None,
+            "instructions": item.get("notes")
+        }))
+
+    # ---- DIFF AGAINST SAVED ROWS ----
+    existing = {}
+    if prescription:
+        existing = {
+            row.id: row._asdict()
+            for row in db.session.execute(
+                db.select(
+                    PrescriptionItem.id,
+                    *(getattr(PrescriptionItem, f) for f in PRESCRIPTION_ITEM_FIELDS)
+                ).where(PrescriptionItem.prescription_id == prescription.id)
+            )
+        }
+
+    to_insert, to_update, keys = [], [], []
+    seen = set()
+
+    for item_id, key, values in incoming:
+        # dusre prescription ki / duplicate id → naya row
+        if item_id in existing and item_id not in seen:
+            seen.add(item_id)
+            old = existing[item_id]
+            if any(old[f] != values[f] for f in PRESCRIPTION_ITEM_FIELDS):
+                to_update.append(dict(values, id=item_id))
+        else:
+            to_insert.append(values)
+            keys.append(key)
+
+    to_delete = [item_id for item_id in existing if item_id not in seen]
+
+    # ---- NO-OP → ZERO WRITES ----
+    if not (to_insert or to_update or to_delete):
+        return jsonify({"status": "unchanged", "ids": {}})
+
     # 🆕 Create prescription if not exists
     if not prescription:
         prescription = Prescription(appointment_id=appt.id)
         db.session.add(prescription)
         db.session.flush()
 
-    # 🔥 Remove old draft items
-    PrescriptionItem.query.filter_by(
-        prescription_id=prescription.id
-    ).delete()
-
-    # ➕ Insert new items
-    for item in data.get("items", []):
-        med = item.get("medicine", "").strip()
-        if not med:
-            continue
-
-        db.session.add(
-            PrescriptionItem(
-                prescription_id=prescription.id,
-                medicine_name=med,
-                dose=item.get("dose"),
-                duration_days=int(item["days"]) if str(item.get("days")).isdigit() else None,
-                instructions=item.get("notes")
+    if to_delete:
+        db.session.execute(
+            db.delete(PrescriptionItem)
+            .where(
+                PrescriptionItem.prescription_id == prescription.id,
+                PrescriptionItem.id.in_(to_delete)
             )
+            .execution_options(synchronize_session=False)
         )
 
+    if to_update:
+        # bulk UPDATE by primary key (executemany)
+        db.session.execute(db.update(PrescriptionItem), to_update)
+
+    new_ids = {}
+    if to_insert:
+        inserted = db.session.scalars(
+            db.insert(PrescriptionItem).returning(
+                PrescriptionItem.id, sort_by_parameter_order=True
+            ),
+            [dict(values, prescription_id=prescription.id) for values in to_insert]
+        ).all()
+
+        # client apne naye rows ko ye ids de de → agla save update banega
+        new_ids = {key: item_id for key, item_id in zip(keys, inserted) if key}
+
     db.session.commit()
     log_action("PRESCRIPTION_DRAFT_SAVE")
 
-    return jsonify({"status": "saved"})
\ No newline at end of file
+    return jsonify({"status": "saved", "ids": new_ids})
\ No newline at end of file
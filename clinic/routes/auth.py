@@ -1,7 +1,8 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app,abort
 from clinic.extensions import db, mail
+from clinic.mail_queue import mail_queue
 from clinic.models import User, PasswordResetToken, Clinic
-from clinic.utils import log_action
+from clinic.utils import log_action, get_current_user
 from flask_mail import Message
 from functools import wraps
 import secrets
@@ -18,7 +19,7 @@ def login_required(f):
         if not user_id:
             return redirect(url_for("auth_bp.login"))
 
-        user = db.session.get(User, user_id)
+        user = get_current_user()   # request me ek hi baar load hota hai
         if not user:
             session.clear()
             return redirect(url_for("auth_bp.login"))
@@ -37,7 +38,7 @@ def role_required(*allowed_roles):
             if not user_id:
                 return redirect(url_for("auth_bp.login"))
 
-            user = db.session.get(User, user_id)
+            user = get_current_user()
             if not user:
                 session.clear()
                 return redirect(url_for("auth_bp.login"))
@@ -76,7 +77,12 @@ def login():
         if not user or not user.check_password(password):
             session["login_attempts"] = session.get("login_attempts", 0) + 1
 
-            log_action("LOGIN_FAILED")
+            # known account → uski clinic ke audit me jaye
+            log_action(
+                "LOGIN_FAILED",
+                user_id=user.id if user else None,
+                clinic_id=user.clinic_id if user else None
+            )
 
             if session["login_attempts"] >= 5:
                 session["login_locked_until"] = now + (15 * 60)
@@ -148,7 +154,7 @@ def signup():
             user.clinic_id = clinic.id
             db.session.commit()
 
-            log_action("SIGNUP")
+            log_action("SIGNUP", user_id=user.id, clinic_id=clinic.id)
 
         except Exception as e:
             db.session.rollback()
@@ -187,28 +193,29 @@ def forgot_password():
             expires_at=datetime.utcnow() + timedelta(minutes=30)
         )
 
-        db.session.add(reset)
-        db.session.commit()
-
         reset_link = url_for(
             "auth_bp.reset_password",
             token=token,
             _external=True
         )
 
-        msg = Message(
+        # SMTP request me nahi — `flask mail-worker` bhejega
+        mail_queue.enqueue(
+            recipient=user.email,
             subject="Reset your password",
-            recipients=[email],
             body=(
                 "Click the link below to reset your password:\n\n"
                 f"{reset_link}\n\n"
                 "This link is valid for 30 minutes."
-            )
+            ),
+            kind="password_reset",
+            clinic_id=user.clinic_id
         )
 
-        mail.send(msg)
+        db.session.add(reset)
+        db.session.commit()
 
-        log_action("PASSWORD_RESET_LINK_SENT")
+        log_action("PASSWORD_RESET_LINK_SENT", user_id=user.id, clinic_id=user.clinic_id)
 
         flash("Password reset link sent to your email.", "success")
         return redirect(url_for("auth_bp.login"))
@@ -244,7 +251,7 @@ def reset_password(token):
         reset.used = True
         db.session.commit()
 
-        log_action("PASSWORD_RESET_SUCCESS")
+        log_action("PASSWORD_RESET_SUCCESS", user_id=user.id, clinic_id=user.clinic_id)
 
         session.clear()
         flash("Password reset successful. Please login.", "success")
@@ -1,16 +1,21 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, send_file
 from clinic.extensions import db
 from clinic.models import Patient, Invoice, InvoiceItem, Payment
-from clinic.utils import generate_invoice_number, get_current_clinic_id
+from clinic.utils import generate_invoice_number, get_clinic_letterhead, get_current_clinic_id
 from datetime import datetime
 from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
+from clinic.pdf_render import invoice_data, render_invoice
+from clinic.pagination import KeysetPaginator, count_mode
+from clinic.patient_search import patient_match_clause
+from clinic.pdf_service import PdfRenderError, pdf_renderer
 from clinic.routes.auth import login_required, role_required
 from sqlalchemy import or_
 
 billing_bp = Blueprint("billing_bp", __name__, url_prefix="/billing")
 
+# newest pehle; idx_invoice_clinic_created
+invoice_pages = KeysetPaginator((Invoice.created_at, Invoice.id), descending=True)
+
 
 # ---------------- SECURE FETCH (CLINIC SAFE) ----------------
 def get_secure_invoice(id):
@@ -44,6 +49,7 @@ def billing():
     Invoice.query
     .join(Patient)
     .filter(
+        Invoice.clinic_id == clinic_id,
         Patient.clinic_id == clinic_id,
         Invoice.is_deleted == False,
         Patient.is_deleted == False
@@ -52,9 +58,10 @@ def billing():
 
 
     if q:
+        # phone=False: 3+ digits yahan aksar invoice number hote hain
         query = query.filter(
             or_(
-                Patient.name.ilike(f"%{q}%"),
+                patient_match_clause(clinic_id, q, phone=False),
                 Invoice.invoice_number.ilike(f"%{q}%")
             )
         )
@@ -62,13 +69,10 @@ def billing():
     if status:
         query = query.filter(Invoice.status == status)
 
-    page = request.args.get("page", 1, type=int)
-    PER_PAGE = 20
-
-    invoices = (
-        query
-        .order_by(Invoice.created_at.desc())
-        .paginate(page=page, per_page=PER_PAGE, error_out=False)
+    invoices = invoice_pages.page(
+        query,
+        cursor=request.args.get("cursor"),
+        count=count_mode(request.args)
     )
 
     due_count = (
@@ -97,8 +101,6 @@ def billing():
 @role_required("reception")
 def create_invoice():
     clinic_id = get_current_clinic_id()
-    patients = Patient.query.filter_by(clinic_id = clinic_id,
-                                    is_deleted=False).all()
 
     if request.method == "POST":
         patient = Patient.query.filter_by(
@@ -110,7 +112,6 @@ def create_invoice():
         invoice = Invoice(
             clinic_id=clinic_id,
             patient_id=patient.id,
-            invoice_number=generate_invoice_number(),
             created_at=datetime.utcnow(),
             description=request.form.get("description", ""),
             total_amount=float(request.form.get("total_amount", 0)),
@@ -118,28 +119,28 @@ def create_invoice():
             is_locked=False
         )
 
-        db.session.add(invoice)
-        db.session.commit()
-
         for name, amt in zip(
             request.form.getlist("item_name[]"),
             request.form.getlist("item_amount[]")
         ):
             if name.strip():
-                db.session.add(
+                invoice.items.append(
                     InvoiceItem(
                         clinic_id=clinic_id,
-                        invoice_id=invoice.id,
                         item_name=name.strip(),
                         amount=float(amt or 0)
                     )
                 )
 
+        # number sabse last (gapless clinic me sequence lock sirf commit tak)
+        invoice.invoice_number = generate_invoice_number()
+
+        db.session.add(invoice)
         db.session.commit()
         flash("Invoice created.", "success")
         return redirect(url_for("billing_bp.billing"))
 
-    return render_template("billing/create_invoice.html", patients=patients)
+    return render_template("billing/create_invoice.html")
 
 
 # ---------------- VIEW ----------------
@@ -171,6 +172,15 @@ def edit_invoice(id):
         return redirect(url_for("billing_bp.view_invoice", id=id))
 
     if request.method == "POST":
+        patient_id = request.form.get("patient_id", type=int)
+        if patient_id and patient_id != inv.patient_id:
+            patient = Patient.query.filter_by(
+                id=patient_id,
+                clinic_id=clinic_id,
+                is_deleted=False
+            ).first_or_404()
+            inv.patient_id = patient.id
+
         inv.description = request.form.get("description", "")
         inv.total_amount = float(request.form.get("total_amount", 0))
 
@@ -194,8 +204,7 @@ def edit_invoice(id):
         flash("Invoice updated.", "success")
         return redirect(url_for("billing_bp.view_invoice", id=id))
 
-    patients = Patient.query.filter_by(clinic_id=clinic_id).all()
-    return render_template("billing/edit_invoice.html", inv=inv, patients=patients)
+    return render_template("billing/edit_invoice.html", inv=inv)
 
 
 # ---------------- DELETE (BLOCKED IF LOCKED) ----------------
@@ -272,37 +281,17 @@ def add_payment(id):
 def download_invoice(id):
     inv = get_secure_invoice(id)
 
-    buffer = BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    y = height - 40
-    pdf.setFont("Helvetica-Bold", 16)
-    pdf.drawString(40, y, "Invoice")
-
-    y -= 25
-    pdf.setFont("Helvetica", 11)
-    pdf.drawString(40, y, f"Invoice No: {inv.invoice_number}")
-    y -= 15
-    pdf.drawString(40, y, f"Patient: {inv.patient.name}")
-
-    y -= 25
-    for item in inv.items:
-        pdf.drawString(40, y, item.item_name)
-        pdf.drawRightString(width - 40, y, f"₹{item.amount:.2f}")
-        y -= 15
-
-    y -= 10
-    pdf.setFont("Helvetica-Bold", 12)
-    pdf.drawString(40, y, "Total")
-    pdf.drawRightString(width - 40, y, f"₹{inv.total_amount:.2f}")
-
-    pdf.showPage()
-    pdf.save()
-    buffer.seek(0)
+    try:
+        data = pdf_renderer.render(
+            render_invoice,
+            invoice_data(inv, get_clinic_letterhead(inv.clinic_id))
+        )
+    except PdfRenderError:
+        flash("Invoice PDF is busy, please try again in a moment", "warning")
+        return redirect(url_for("billing_bp.view_invoice", id=id))
 
     return send_file(
-        buffer,
+        BytesIO(data),
         as_attachment=True,
         download_name=f"Invoice_{inv.invoice_number}.pdf",
         mimetype="application/pdf"
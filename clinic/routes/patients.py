@@ -1,17 +1,28 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, current_app, jsonify
 
 import clinic
 from ..extensions import db
 from ..models import Clinic, Patient, Invoice, Appointment, MedicalRecord ,Prescription
 from clinic.routes.auth import login_required, role_required
-from clinic.utils import get_current_clinic_id,can_add_patient
+from clinic.utils import get_current_clinic_id, get_current_clinic, can_add_patient
+from clinic.sequences import patient_numbers
+from clinic.pagination import KeysetPaginator, count_mode
+from clinic.patient_profile import load_patient_profile, load_visit_page
+from clinic.patient_search import (
+    LOOKUP_DEFAULT_RESULTS, LOOKUP_MAX_RESULTS, SEARCH_MAX_RESULTS, RankedPagination,
+    patient_match_clause, search_patient_ids
+)
 from datetime import datetime
+from sqlalchemy.orm import joinedload
 import os
 from werkzeug.utils import secure_filename
 
 
 patients_bp = Blueprint("patients_bp", __name__)
 
+# newest pehle; (clinic_id, patient_no) unique index
+patient_pages = KeysetPaginator((Patient.patient_no,), descending=True)
+
 
 # =====================================================
 # PATIENT LIST
@@ -25,33 +36,84 @@ def patients():
 
     clinic_id = get_current_clinic_id()
 
-    query = Patient.query.filter_by(
+    # visits / last visit / dues: patient_summary (ek PK join, koi aggregate nahi)
+    query = Patient.query.options(joinedload(Patient.summary)).filter_by(
     clinic_id=clinic_id,
     is_deleted=False
     )
 
 
-    if q:
-        query = query.filter(
-            (Patient.name.ilike(f"%{q}%")) |
-            (Patient.phone.ilike(f"%{q}%"))
-        )
-
     if date_filter:
         date_obj = datetime.strptime(date_filter, "%Y-%m-%d").date()
         query = query.filter(Patient.last_visit == date_obj)
 
-    page = request.args.get("page", 1, type=int)
-
-    patients = (
-        query
-        .order_by(Patient.patient_no.desc())
-        .paginate(page=page, per_page=20, error_out=False)
-    )
+    patients = None
+    if q and "page" not in request.args:
+        # har matching patient (uncapped index subquery), naye pehle
+        query_matched = query.filter(patient_match_clause(clinic_id, q))
+        patients = patient_pages.page(
+            query_matched,
+            cursor=request.args.get("cursor"),
+            count=count_mode(request.args)
+        )
+        if not patients.items and not request.args.get("cursor"):
+            patients = None
+
+    if q and patients is None:
+        # exact match nahi → typo ke liye ranked fuzzy (max SEARCH_MAX_RESULTS)
+        patients = RankedPagination(
+            query=query,
+            ids=search_patient_ids(clinic_id, q, limit=SEARCH_MAX_RESULTS),
+            page=request.args.get("page", 1, type=int), per_page=20, error_out=False
+        )
+    elif patients is None:
+        patients = patient_pages.page(
+            query,
+            cursor=request.args.get("cursor"),
+            count=count_mode(request.args)
+        )
 
     return render_template("patients/patients.html", patients=patients)
 
 
+# =====================================================
+# PATIENT LOOKUP (typeahead JSON → patient picker)
+# =====================================================
+@patients_bp.route("/patients/lookup")
+@login_required
+@role_required("reception", "doctor")
+def patient_lookup():
+    clinic_id = get_current_clinic_id()
+    q = request.args.get("q", "").strip()
+    limit = min(max(request.args.get("limit", LOOKUP_DEFAULT_RESULTS, type=int), 1), LOOKUP_MAX_RESULTS)
+
+    query = db.session.query(Patient.id, Patient.patient_no, Patient.name, Patient.phone)
+
+    if q:
+        ids = search_patient_ids(clinic_id, q, limit=limit)
+        rows = {row.id: row for row in query.filter(Patient.id.in_(ids))} if ids else {}
+        patients = [rows[pid] for pid in ids if pid in rows]
+    else:
+        # khaali query → naye patients pehle (abhi register hua patient top pe)
+        patients = (
+            query
+            .filter(Patient.clinic_id == clinic_id, Patient.is_deleted == False)
+            .order_by(Patient.patient_no.desc())
+            .limit(limit)
+            .all()
+        )
+
+    return jsonify({
+        "results": [
+            {
+                "id": p.id,
+                "text": " • ".join(str(part) for part in (p.patient_no, p.name, p.phone) if part),
+            }
+            for p in patients
+        ]
+    })
+
+
 # =====================================================
 # ADD PATIENT
 # =====================================================
@@ -61,10 +123,9 @@ def patients():
 def add_patient():
     from_page = request.args.get("from_page")
     clinic_id = get_current_clinic_id()
-    clinic = Clinic.query.get(session["clinic_id"])
+    clinic = get_current_clinic()
 
     if request.endpoint == "patients_bp.add_patient":
-        clinic = Clinic.query.get(session.get("clinic_id"))
         if clinic and not can_add_patient(clinic):
             flash("Daily patient limit reached. Upgrade your plan.", "warning")
             return redirect(url_for("settings_bp.settings"))
@@ -74,6 +135,7 @@ def add_patient():
         age = int(request.form.get("age")) if request.form.get("age") else None
         gender = request.form.get("gender")
         phone = request.form.get("phone")
+        email = (request.form.get("email") or "").strip() or None
         disease = request.form.get("disease")
 
         last_visit = (
@@ -88,13 +150,7 @@ def add_patient():
         state = request.form.get("state")
 
         # -------- PATIENT NUMBER (CLINIC WISE) --------
-        last_patient = (
-            Patient.query
-            .filter_by(clinic_id=clinic_id)
-            .order_by(Patient.patient_no.desc())
-            .first()
-        )
-        patient_no = (last_patient.patient_no + 1) if last_patient else 1
+        patient_no = patient_numbers.next(clinic_id)
         # ---------------------------------------------
 
         # PHOTO UPLOAD
@@ -116,6 +172,7 @@ def add_patient():
             age=age,
             gender=gender,
             phone=phone,
+            email=email,
             disease=disease,
             last_visit=last_visit,
             status=status,
@@ -132,7 +189,7 @@ def add_patient():
         flash("Patient added successfully!", "success")
 
         if request.form.get("from_page") == "add_appointment":
-            return redirect(url_for("appointments_bp.add_appointment"))
+            return redirect(url_for("appointments_bp.add_appointment", patient_id=new_patient.id))
 
         return redirect(url_for("patients_bp.patients"))
 
@@ -202,46 +259,50 @@ def edit_patient(id):
 def patient_profile(id):
     clinic_id = get_current_clinic_id()
 
-    patient = Patient.query.filter_by(
-        id=id,
-        clinic_id=clinic_id,
-        is_deleted=False
-    ).first_or_404()
-
-    # All appointments (non-deleted)
-    apps = (
-        Appointment.query
-        .filter_by(
-            patient_id=patient.id,
-            is_deleted=False
-        )
-        .order_by(Appointment.date.desc())
-        .all()
-    )
-
-    # ✅ FINALIZED PRESCRIPTIONS ONLY
-    prescriptions = (
-        Prescription.query
-        .join(Appointment)
-        .join(Patient)
-        .filter(
-            Patient.id == patient.id,
-            Patient.clinic_id == clinic_id,
-            Appointment.is_deleted == False,
-            Prescription.finalized == True
-        )
-        .order_by(Appointment.date.desc())
-        .all()
+    profile = load_patient_profile(
+        clinic_id, id, request.args.get("visits"), count_mode(request.args)
     )
 
     return render_template(
         "patients/patient_profile.html",
-        patient=patient,
-        apps=apps,
-        prescriptions=prescriptions,
+        patient=profile.patient,
+        visits=profile.visits,
+        prescriptions=profile.prescriptions,
+        more_prescriptions=profile.more_prescriptions,
         from_patient_profile=True
     )
 
+
+# -----------------------------------------------------
+# PROFILE VISITS PAGE (LAZY JSON PARTIAL)
+# -----------------------------------------------------
+@patients_bp.route("/patient/<int:id>/visits")
+@login_required
+@role_required("reception", "doctor")
+def patient_profile_visits(id):
+    """
+    Profile ke Past Appointments ka agla / pichla page (rows + pager HTML).
+    """
+    clinic_id = get_current_clinic_id()
+
+    patient = (
+        db.session.query(Patient.id)
+        .filter_by(id=id, clinic_id=clinic_id, is_deleted=False)
+        .first_or_404()
+    )
+    visits = load_visit_page(
+        clinic_id, patient.id, request.args.get("visits"), count_mode(request.args)
+    )
+
+    context = dict(patient=patient, visits=visits)
+
+    return jsonify({
+        "total": visits.total,
+        "offset": visits.offset,
+        "rows": render_template("components/patient_visit_rows.html", **context),
+        "pager": render_template("components/patient_visit_pager.html", **context),
+    })
+
 # =====================================================
 # UPLOAD MEDICAL RECORD
 # =====================================================
@@ -1,7 +1,8 @@
-from flask import Blueprint, request, redirect, url_for, flash, session
+from flask import Blueprint, request, redirect, url_for, flash, session, abort
 import razorpay
 from clinic.extensions import db
 from clinic.models import Clinic, Subscription
+from clinic.utils import get_current_clinic
 from datetime import datetime, timedelta
 import os
 try:
@@ -27,7 +28,7 @@ def get_razorpay_client():
 
 @payments_bp.route("/create/<plan>", methods=["POST"])
 def create_payment(plan):
-    clinic = Clinic.query.get_or_404(session["clinic_id"])
+    clinic = get_current_clinic() or abort(404)
 
     prices = {
         "basic": 199,
@@ -3,9 +3,11 @@ from io import StringIO
 import clinic
 from clinic.models import Patient, Appointment, Prescription, Invoice,User,Clinic
 from clinic.subscription_plans import PLANS
-from clinic.utils import can_add_staff, get_current_clinic_id, log_action
+from clinic.utils import can_add_staff, get_current_clinic_id, get_current_clinic, get_current_user, log_action
 from flask import Blueprint, abort, render_template, request, redirect, url_for, flash, session, current_app, Response
 from clinic.extensions import db
+from clinic.audit import browse_audit_log
+from clinic.slots import MAX_SLOT_CAPACITY
 from clinic.routes.auth import login_required, role_required
 from werkzeug.utils import secure_filename
 import os
@@ -24,9 +26,8 @@ def allowed(filename):
 @role_required("doctor")
 def settings():
 
-    user = User.query.get_or_404(session["user_id"])
-    clinic_id = session.get("clinic_id")
-    clinic = Clinic.query.get_or_404(clinic_id)
+    user = get_current_user() or abort(404)
+    clinic = get_current_clinic() or abort(404)
     trial_days_left = None
     if clinic.subscription_status == "trial" and clinic.trial_ends_at:
         delta = clinic.trial_ends_at - datetime.utcnow()
@@ -114,13 +115,39 @@ def settings():
         # -------- CLINIC SETTINGS ----------
         if "clinic_save" in request.form:
 
-            clinic_id = session.get("clinic_id")
-
-            clinic = Clinic.query.get_or_404(clinic_id)
-
             clinic.name = request.form["clinic_name"]
             clinic.phone = request.form["clinic_phone"]
             clinic.address = request.form["clinic_address"]
+            clinic.gapless_invoice_numbers = "gapless_invoice_numbers" in request.form
+
+            # appointment slots (slot length khaali = slots off)
+            try:
+                opens_at = request.form.get("opens_at")
+                closes_at = request.form.get("closes_at")
+                slot_minutes = request.form.get("slot_minutes", "").strip()
+
+                clinic.opens_at = datetime.strptime(opens_at, "%H:%M").time() if opens_at else None
+                clinic.closes_at = datetime.strptime(closes_at, "%H:%M").time() if closes_at else None
+                clinic.slot_minutes = int(slot_minutes) if slot_minutes else None
+                clinic.slot_capacity = int(request.form.get("slot_capacity") or 1)
+            except ValueError:
+                db.session.rollback()
+                flash("Invalid slot settings.", "danger")
+                return redirect(url_for("settings_bp.settings"))
+
+            if not 1 <= clinic.slot_capacity <= MAX_SLOT_CAPACITY:
+                db.session.rollback()
+                flash(f"Capacity per slot must be between 1 and {MAX_SLOT_CAPACITY}.", "danger")
+                return redirect(url_for("settings_bp.settings"))
+
+            if clinic.slot_minutes is not None and (
+                not clinic.opens_at or not clinic.closes_at
+                or clinic.closes_at <= clinic.opens_at
+                or not 5 <= clinic.slot_minutes <= 240
+            ):
+                db.session.rollback()
+                flash("Slots need opening / closing hours and 5–240 minute slots.", "danger")
+                return redirect(url_for("settings_bp.settings"))
 
             # doctor-specific field stays in User
             user.speciality = request.form.get("speciality")
@@ -144,7 +171,7 @@ def add_staff():
     email = request.form["email"].strip().lower()
     role = request.form["role"]
 
-    clinic = Clinic.query.get_or_404(clinic_id)
+    clinic = get_current_clinic() or abort(404)
 
     # 🚫 1. STAFF LIMIT CHECK (FIRST)
     if not can_add_staff(clinic):
@@ -287,16 +314,50 @@ def export_invoices():
 @login_required
 @role_required("doctor")
 def change_plan():
-    clinic = Clinic.query.get_or_404(session["clinic_id"])
+    clinic = get_current_clinic() or abort(404)
     plan = request.form.get("plan")
 
     if plan not in PLANS:
         abort(400, "Invalid plan")
     clinic.plan = plan  
     clinic.trial_ends_at = None
+    clinic.subscription_ends_at = None
     clinic.subscription_status = "active"
     db.session.commit()
     log_action(f"PLAN_CHANGED_TO_{plan.upper()}")
 
     flash("Plan activated successfully.", "success")
     return redirect(url_for("settings_bp.settings"))
+
+
+# --------- AUDIT / ACTIVITY LOG ----------
+@settings_bp.route("/audit-log")
+@login_required
+@role_required("doctor")
+def audit_log():
+    clinic_id = get_current_clinic_id()
+    cursor = request.args.get("cursor")
+    action = request.args.get("action", "").strip().upper() or None
+
+    # keyset page → deep pages bhi page 1 jitne fast
+    rows, next_cursor = browse_audit_log(
+        clinic_id,
+        cursor=cursor,
+        limit=50,
+        action=action
+    )
+
+    users = dict(
+        db.session.query(User.id, User.fullname)
+        .filter(User.clinic_id == clinic_id)
+        .all()
+    )
+
+    return render_template(
+        "dashboard/audit_log.html",
+        rows=rows,
+        users=users,
+        cursor=cursor,
+        next_cursor=next_cursor,
+        action=action
+    )
@@ -0,0 +1,183 @@
+import os
+import threading
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from clinic.extensions import db
+from clinic.models import Invoice, InvoiceSequence, Patient, PatientSequence
+
+"""
+PER-CLINIC NUMBER SEQUENCES
+
+patient_no pehle MAX(patient_no) + 1 se banta tha → do parallel requests
+same number padh leti thi aur ek unique constraint pe fail hoti thi.
+
+Ab har clinic ki ek sequence row hai:
+
+- UPDATE ... SET last_number = last_number + n RETURNING last_number
+  → ek atomic statement, row lock sirf us chhote transaction tak
+  (request ka transaction lock hold nahi karta)
+- hi-lo: block size > 1 ho to har worker process n numbers ek saath
+  reserve karta hai aur memory se deta hai (DB round trip har n me ek).
+  Numbers unique rehte hain, par workers ke beech order / gaps ho sakte hain.
+- gapless: next_in_transaction() → UPDATE caller ke transaction me, row
+  lock commit tak; rollback pe number wapas. Isliye caller ise commit se
+  theek pehle bulaye.
+
+Sequence row na ho (naya clinic, ya purana data bina row ke) to seed
+existing MAX se hota hai — patient_no aur invoice_number dono.
+"""
+
+# generate_invoice_number ka format: INV-0001
+INVOICE_PREFIX = "INV-"
+
+
+class SequenceAllocator:
+    """
+    Config:
+        <config_key>  hi-lo block size per worker process, default 1
+                      (1 = har number ek UPDATE, koi gap nahi)
+    """
+
+    def __init__(self, model, config_key, seed=None, app=None):
+        self.model = model
+        self.config_key = config_key
+        # seed(conn, clinic_id) → current max, jab clinic ki sequence row na ho
+        self.seed = seed
+        self.block_size = 1
+        self._blocks = {}
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.block_size = max(1, int(app.config.setdefault(self.config_key, 1)))
+        app.extensions[self.model.__tablename__] = self
+
+    # -----------------------------
+    # PUBLIC
+    # -----------------------------
+    def next(self, clinic_id):
+        """
+        Clinic ka agla number. Caller ke db.session se independent hai →
+        request rollback ho jaaye to number skip hota hai (reuse nahi).
+        """
+        if self.block_size == 1:
+            return self.reserve(clinic_id, 1)
+
+        with self._lock:
+            # fork ke baad parent ke bache numbers child me duplicate na hon
+            if self._pid != os.getpid():
+                self._blocks = {}
+                self._pid = os.getpid()
+
+            block = self._blocks.get(clinic_id)
+            if block is None or block[0] > block[1]:
+                hi = self.reserve(clinic_id, self.block_size)
+                block = [hi - self.block_size + 1, hi]
+                self._blocks[clinic_id] = block
+
+            number = block[0]
+            block[0] += 1
+            return number
+
+    def next_in_transaction(self, clinic_id):
+        """
+        Gapless number: caller ke db.session transaction me allocate hota hai.
+        Commit tak dusre workers is clinic ke liye wait karte hain.
+        """
+        # session.execute nahi → autoflush nahi (pending rows abhi bina number ke hain)
+        conn = db.session.connection()
+        number = conn.execute(self._bump(clinic_id, 1)).scalar()
+        if number is not None:
+            return number
+
+        # row nahi hai → isi connection pe savepoint me banao
+        # (alag connection SQLite pe hamare hi write lock pe atak jaata)
+        table = self.model.__table__
+        try:
+            with conn.begin_nested():
+                start = self.seed(conn, clinic_id) if self.seed else 0
+                conn.execute(insert(table).values(clinic_id=clinic_id, last_number=start + 1))
+            return start + 1
+        except IntegrityError:
+            return conn.execute(self._bump(clinic_id, 1)).scalar()
+
+    def reserve(self, clinic_id, count):
+        """
+        count numbers atomically reserve karo → returns the highest one.
+        """
+        table = self.model.__table__
+        bump = self._bump(clinic_id, count)
+
+        # row nahi hai → banao; do workers saath banaye to loser UPDATE retry karta hai
+        for _ in range(3):
+            with db.engine.begin() as conn:
+                hi = conn.execute(bump).scalar()
+            if hi is not None:
+                return hi
+
+            try:
+                with db.engine.begin() as conn:
+                    start = self.seed(conn, clinic_id) if self.seed else 0
+                    conn.execute(
+                        insert(table).values(clinic_id=clinic_id, last_number=start + count)
+                    )
+                return start + count
+            except IntegrityError:
+                continue
+
+        raise RuntimeError(f"Could not allocate {table.name} number for clinic {clinic_id}")
+
+    def _bump(self, clinic_id, count):
+        table = self.model.__table__
+        return (
+            update(table)
+            .where(table.c.clinic_id == clinic_id)
+            .values(last_number=func.coalesce(table.c.last_number, 0) + count)
+            .returning(table.c.last_number)
+        )
+
+
+def _max_patient_no(conn, clinic_id):
+    return conn.execute(
+        select(func.coalesce(func.max(Patient.patient_no), 0))
+        .where(Patient.clinic_id == clinic_id)
+    ).scalar()
+
+
+patient_numbers = SequenceAllocator(
+    PatientSequence,
+    "PATIENT_NO_BLOCK_SIZE",
+    seed=_max_patient_no
+)
+
+def _max_invoice_number(conn, clinic_id):
+    """
+    invoice_number string hai (INV-0001, 10000 ke baad INV-10000) → SQL MAX
+    string order me galat → numeric part Python me. Sirf seed pe, clinic ki
+    sequence row bante waqt ek baar chalta hai.
+    """
+    numbers = conn.execute(
+        select(Invoice.invoice_number)
+        .where(
+            Invoice.clinic_id == clinic_id,
+            Invoice.invoice_number.like(INVOICE_PREFIX + "%")
+        )
+    ).scalars()
+
+    highest = 0
+    for value in numbers:
+        digits = value[len(INVOICE_PREFIX):]
+        if digits.isdigit():
+            highest = max(highest, int(digits))
+    return highest
+
+
+invoice_numbers = SequenceAllocator(
+    InvoiceSequence,
+    "INVOICE_NO_BLOCK_SIZE",
+    seed=_max_invoice_number
+)
@@ -0,0 +1,317 @@
+import threading
+import time as _time
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import event, func, inspect, or_
+from sqlalchemy.orm import Session
+
+from clinic.extensions import db
+from clinic.models import Appointment
+
+"""
+APPOINTMENT SLOTS + AVAILABILITY
+
+Clinic settings me working hours, slot length aur capacity per slot.
+slot_minutes khaali = slots band (purana behaviour, koi check nahi).
+
+- check_booking(): add / edit pe DB se exact count (authoritative)
+- slot_occupancy: har clinic-day ka chhota counts array memory me
+  (index = slot number). Miss pe ek grouped query (idx_appt_clinic_date)
+  poore date range ke liye, phir commit hooks booking / edit / cancel pe
+  counts update karte hain → availability API DB tak nahi jaati.
+
+Dusre workers ke commits is worker ke cache me SLOT_CACHE_TTL ke baad
+dikhte hain; booking ka final check hamesha DB pe hota hai.
+"""
+
+SlotConfig = namedtuple("SlotConfig", ("opens_at", "closes_at", "minutes", "capacity"))
+
+MAX_AVAILABILITY_DAYS = 31
+
+# counts cache bytearray hai (0–255) → capacity isse zyada nahi
+# (settings form validate karta hai)
+MAX_SLOT_CAPACITY = 255
+
+
+def slot_config(clinic):
+    """
+    Clinic ki slot settings, None agar slots configured nahi.
+    """
+    if clinic is None or not clinic.slot_minutes or not clinic.opens_at or not clinic.closes_at:
+        return None
+    # purani rows jo limit se pehle save hui thi
+    capacity = min(clinic.slot_capacity or 1, MAX_SLOT_CAPACITY)
+    return SlotConfig(clinic.opens_at, clinic.closes_at, clinic.slot_minutes, capacity)
+
+
+def _minutes(t):
+    return t.hour * 60 + t.minute
+
+
+def slot_count(cfg):
+    return max((_minutes(cfg.closes_at) - _minutes(cfg.opens_at)) // cfg.minutes, 0)
+
+
+def slot_index(cfg, t):
+    """
+    Time → slot number, None agar working hours ke bahar.
+    """
+    offset = _minutes(t) - _minutes(cfg.opens_at)
+    if offset < 0:
+        return None
+    idx = offset // cfg.minutes
+    return idx if idx < slot_count(cfg) else None
+
+
+def slot_time(cfg, idx):
+    start = _minutes(cfg.opens_at) + idx * cfg.minutes
+    return time(start // 60, start % 60)
+
+
+def occupies_slot(status, visit_type, is_deleted):
+    # walk-in booked slot nahi hai (aur uska time UTC me save hota hai)
+    return not is_deleted and status != "Cancelled" and visit_type != "Walk-in"
+
+
+def _occupying(query):
+    return query.filter(
+        Appointment.is_deleted == False,
+        Appointment.status != "Cancelled",
+        or_(Appointment.type.is_(None), Appointment.type != "Walk-in")
+    )
+
+
+# -----------------------------
+# BOOKING CHECK (DB, EXACT)
+# -----------------------------
+def check_booking(clinic, day, t, exclude_id=None):
+    """
+    Error message agar day / t pe booking nahi ho sakti, warna None.
+    """
+    cfg = slot_config(clinic)
+    if cfg is None:
+        return None
+
+    idx = slot_index(cfg, t)
+    if idx is None:
+        return (
+            f"Clinic hours are {cfg.opens_at.strftime('%H:%M')} to "
+            f"{cfg.closes_at.strftime('%H:%M')}."
+        )
+
+    start = slot_time(cfg, idx)
+    end = (datetime.combine(day, start) + timedelta(minutes=cfg.minutes)).time()
+
+    query = _occupying(
+        db.session.query(func.count(Appointment.id))
+        .filter(
+            Appointment.clinic_id == clinic.id,
+            Appointment.date == day,
+            Appointment.time >= start
+        )
+    )
+    # last slot midnight tak jaaye to end 00:00 ho jaata hai
+    if end > start:
+        query = query.filter(Appointment.time < end)
+    if exclude_id:
+        query = query.filter(Appointment.id != exclude_id)
+
+    if query.scalar() >= cfg.capacity:
+        return f"The {start.strftime('%H:%M')} slot is full."
+
+    return None
+
+
+# -----------------------------
+# OCCUPANCY CACHE
+# -----------------------------
+class _Day:
+    __slots__ = ("cfg", "expires", "counts")
+
+    def __init__(self, cfg, expires, counts):
+        self.cfg = cfg
+        self.expires = expires
+        self.counts = counts
+
+
+class SlotOccupancy:
+    """
+    Config:
+        SLOT_CACHE_TTL  seconds, default 300
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 300
+        self._days = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.setdefault("SLOT_CACHE_TTL", 300)
+        app.extensions["slot_occupancy"] = self
+
+    # -----------------------------
+    # PUBLIC
+    # -----------------------------
+    def counts(self, clinic_id, cfg, start, days):
+        """
+        [(date, counts)] start se days din; counts[i] = slot i ki bookings.
+        Sirf missing / expired days ke liye DB query (ek hi).
+        """
+        dates = [start + timedelta(days=i) for i in range(days)]
+        now = _time.monotonic()
+
+        with self._lock:
+            found = {}
+            for day in dates:
+                entry = self._days.get((clinic_id, day))
+                if entry and entry.cfg == cfg and entry.expires > now:
+                    found[day] = bytes(entry.counts)
+
+        missing = [day for day in dates if day not in found]
+        if missing:
+            loaded = self._load(clinic_id, cfg, missing[0], missing[-1])
+            expires = _time.monotonic() + self.ttl
+            with self._lock:
+                for day in missing:
+                    counts = loaded.get(day) or bytearray(slot_count(cfg))
+                    self._days[(clinic_id, day)] = _Day(cfg, expires, counts)
+                    found[day] = bytes(counts)
+
+        return [(day, found[day]) for day in dates]
+
+    def adjust(self, clinic_id, day, t, delta):
+        with self._lock:
+            entry = self._days.get((clinic_id, day))
+            if entry is None:
+                return
+            idx = slot_index(entry.cfg, t)
+            if idx is not None:
+                entry.counts[idx] = min(max(entry.counts[idx] + delta, 0), MAX_SLOT_CAPACITY)
+
+    def clear(self):
+        with self._lock:
+            self._days.clear()
+
+    # -----------------------------
+    # INTERNALS
+    # -----------------------------
+    def _load(self, clinic_id, cfg, first, last):
+        rows = _occupying(
+            db.session.query(Appointment.date, Appointment.time, func.count(Appointment.id))
+            .filter(
+                Appointment.clinic_id == clinic_id,
+                Appointment.date >= first,
+                Appointment.date <= last
+            )
+        ).group_by(Appointment.date, Appointment.time).all()
+
+        size = slot_count(cfg)
+        loaded = {}
+        for day, t, n in rows:
+            idx = slot_index(cfg, t)
+            if idx is None:
+                continue
+            counts = loaded.setdefault(day, bytearray(size))
+            counts[idx] = min(counts[idx] + n, MAX_SLOT_CAPACITY)
+
+        # purane days hata do (memory bounded)
+        today = datetime.now().date()
+        with self._lock:
+            for key in [k for k in self._days if k[1] < today]:
+                del self._days[key]
+
+        return loaded
+
+
+slot_occupancy = SlotOccupancy()
+
+
+def free_slots(clinic, start, days):
+    """
+    Availability API ka data: har din ke free slots (aaj ke beete hue slots nahi).
+    """
+    cfg = slot_config(clinic)
+    if cfg is None:
+        return None
+
+    now = datetime.now()
+    result = []
+    for day, counts in slot_occupancy.counts(clinic.id, cfg, start, days):
+        slots = []
+        for idx, taken in enumerate(counts):
+            t = slot_time(cfg, idx)
+            if day == now.date() and t <= now.time():
+                continue
+            if taken < cfg.capacity:
+                slots.append({"time": t.strftime("%H:%M"), "free": cfg.capacity - taken})
+        result.append({"date": day.isoformat(), "slots": slots})
+
+    return result
+
+
+# -----------------------------
+# COMMIT HOOKS
+# -----------------------------
+_PENDING_KEY = "slot_occupancy_pending"
+WATCHED_FIELDS = ("date", "time", "status", "type", "is_deleted")
+
+
+def _slot_state(obj, old=None):
+    state = inspect(obj)
+
+    def value(field):
+        if old:
+            hist = state.attrs[field].history
+            if hist.deleted:
+                return hist.deleted[0]
+        return getattr(obj, field)
+
+    if not occupies_slot(value("status"), value("type"), value("is_deleted")):
+        return None
+    return value("date"), value("time")
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_slot_changes(session, flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, {})
+
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Appointment):
+            continue
+
+        is_new = obj in session.new
+        if not is_new and not any(
+            inspect(obj).attrs[f].history.has_changes() for f in WATCHED_FIELDS
+        ):
+            continue
+
+        # ek transaction me kai flush → pehla "old" hi sahi hai
+        if obj.id in pending:
+            old = pending[obj.id][1]
+        else:
+            old = None if is_new else _slot_state(obj, old=True)
+
+        pending[obj.id] = (obj.clinic_id, old, _slot_state(obj))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_slots(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    for clinic_id, old, new in pending.values():
+        if old == new:
+            continue
+        if old:
+            slot_occupancy.adjust(clinic_id, old[0], old[1], -1)
+        if new:
+            slot_occupancy.adjust(clinic_id, new[0], new[1], 1)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
@@ -35,49 +35,99 @@ function autoSave() {
 }
 
 /* ===============================
-   BUILD & SEND PAYLOAD
+   DRAFT STATE (DELTA AUTOSAVE)
 ================================ */
-function sendSaveRequest() {
-    // 🔒 Do nothing if finalized
-    if (window.prescriptionLocked === "true") return;
-    if (!window.autosaveUrl) return;
+let lastSaved = null;        // server pe jo values hain
+let saveInFlight = false;    // ek time pe ek hi request
+let savePending = false;
 
-    const payload = {};
+function collectDraft() {
+    const draft = {};
 
     /* ---------- TEXT FIELDS ---------- */
     ["symptoms", "diagnosis", "advice", "lab_tests"].forEach(id => {
         const el = document.getElementById(id);
-        if (el && el.value.trim()) {
-            payload[id] = el.value.trim();
-        }
+        if (el) draft[id] = el.value.trim();
     });
 
     /* ---------- FOLLOW UP DATE ---------- */
     const followUp = document.getElementById("follow_up_date");
-    if (followUp && followUp.value) {
-        payload["follow_up_date"] = followUp.value;
-    }
+    if (followUp) draft["follow_up_date"] = followUp.value;
 
     /* ---------- DYNAMIC VITALS ---------- */
     document.querySelectorAll(".vital-row input").forEach(el => {
         if (!el.id) return;
-        if (!el.value.trim()) return;
+        draft[el.id] = el.value.trim();
+    });
 
-        payload[el.id] = el.value.trim();
+    return draft;
+}
+
+function changedFields(draft) {
+    const changed = {};
+    Object.keys(draft).forEach(key => {
+        if (draft[key] !== lastSaved[key]) changed[key] = draft[key];
     });
+    return changed;
+}
+
+document.addEventListener("DOMContentLoaded", () => {
+    // page load values = already saved
+    lastSaved = collectDraft();
+});
+
+/* ===============================
+   BUILD & SEND PAYLOAD
+================================ */
+function sendSaveRequest() {
+    // 🔒 Do nothing if finalized
+    if (window.prescriptionLocked === "true") return;
+    if (!window.autosaveUrl) return;
+    if (lastSaved === null) lastSaved = collectDraft();
+
+    if (saveInFlight) {
+        savePending = true;
+        return;
+    }
+
+    const draft = collectDraft();
+    const fields = changedFields(draft);
 
     // nothing to save
-    if (Object.keys(payload).length === 0) return;
+    if (Object.keys(fields).length === 0) {
+        showSaved();
+        return;
+    }
 
     /* ---------- SEND ---------- */
+    saveInFlight = true;
+
     fetch(window.autosaveUrl, {
         method: "POST",
         headers: {
             "Content-Type": "application/json"
         },
-        body: JSON.stringify(payload)
+        keepalive: true,
+        body: JSON.stringify({
+            revision: Number(window.draftRevision || 0),
+            fields: fields
+        })
     })
-    .then(() => {
+    .then(res => res.json().then(data => ({ status: res.status, data })))
+    .then(({ status, data }) => {
+        if (status === 409) {
+            // kisi aur tab / window ne save kiya → uski revision pe aa jao,
+            // agla keystroke apne badlav us par bhejega
+            window.draftRevision = data.revision;
+            lastSaved = Object.assign({}, lastSaved, data.fields || {});
+            const el = document.getElementById("autosaveStatus");
+            if (el) el.textContent = "Updated in another window — your next edit will save over it";
+            return;
+        }
+
+        if (data.revision !== undefined) window.draftRevision = data.revision;
+        Object.assign(lastSaved, fields);
+
         showSaved();
         if (typeof showToast === "function") {
             showToast();
@@ -85,5 +135,12 @@ function sendSaveRequest() {
     })
     .catch(() => {
         // silent fail (doctor should never panic)
+    })
+    .finally(() => {
+        saveInFlight = false;
+        if (savePending) {
+            savePending = false;
+            sendSaveRequest();
+        }
     });
 }
@@ -2,6 +2,14 @@
 /* ======================================
    BUILD PRESCRIPTION ITEMS (SOURCE OF TRUTH)
 ====================================== */
+let rowKeySeq = 0;
+
+// har row ki stable identity: saved row → data-item-id, naya row → data-key
+function rowKey(row) {
+    if (!row.dataset.key) row.dataset.key = `new-${++rowKeySeq}`;
+    return row.dataset.key;
+}
+
 function collectPrescriptionItems() {
     const rows = document.querySelectorAll("#medBody tr");
     const items = [];
@@ -18,6 +26,8 @@ function collectPrescriptionItems() {
         if (!med) return;
 
         items.push({
+            id: row.dataset.itemId || null,
+            key: rowKey(row),
             medicine: med,
             dose: dose,
             days: days,
@@ -81,6 +91,18 @@ document.addEventListener("click", e => {
 });
 
 
+/* ======================================
+   SERVER IDS FOR NEW ROWS
+====================================== */
+function applySavedItemIds(ids) {
+    if (!ids) return;
+
+    document.querySelectorAll("#medBody tr").forEach(row => {
+        const id = ids[row.dataset.key];
+        if (id) row.dataset.itemId = id;
+    });
+}
+
 /* ======================================
    FINALIZE + SAVE + DOWNLOAD (FIXED FLOW)
 ====================================== */
@@ -109,6 +131,8 @@ async function finalizeAndPrint(e) {
     } else if (!saveRes.ok) {
         alert("Failed to save medicines");
         return false;
+    } else {
+        applySavedItemIds((await saveRes.json()).ids);
     }
 
     // 2️⃣ FINALIZE (backend locks prescription)
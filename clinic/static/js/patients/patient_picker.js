@@ -0,0 +1,44 @@
+/*
+ * PATIENT PICKER
+ * Select2 + /patients/lookup (indexed search, limited results) —
+ * page me poori patient list render nahi hoti, type karte hi server se.
+ *
+ *   <select name="patient_id" data-patient-picker
+ *           data-url="{{ url_for('patients_bp.patient_lookup') }}"
+ *           data-allow-new="1">          walk-in: "+ New Patient" option
+ *       <option value=""></option>       placeholder
+ *       <option value="7" selected>…</option>   edit form: current patient
+ *   </select>
+ *
+ * jQuery / Select2 base.html ke end me load hote hain → DOMContentLoaded pe init.
+ */
+function initPatientPicker(select) {
+    const $ = window.jQuery;
+    if (!select || !$ || !$.fn.select2) return;
+
+    const $select = $(select);
+    if ($select.hasClass("select2-hidden-accessible")) return;   // pehle se init
+
+    const allowNew = select.dataset.allowNew === "1";
+
+    $select.select2({
+        width: "100%",
+        allowClear: true,
+        placeholder: select.dataset.placeholder || "Search patient by name or phone",
+        ajax: {
+            url: select.dataset.url,
+            dataType: "json",
+            delay: 250,
+            data: params => ({ q: params.term || "" }),
+            processResults: data => {
+                const results = data.results || [];
+                if (allowNew) results.push({ id: "new", text: "+ New Patient" });
+                return { results };
+            }
+        }
+    });
+}
+
+document.addEventListener("DOMContentLoaded", () => {
+    document.querySelectorAll("select[data-patient-picker]").forEach(initPatientPicker);
+});
@@ -0,0 +1,292 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+
+from flask import current_app, g, has_request_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from clinic.extensions import db
+from clinic.models import Clinic
+
+"""
+SUBSCRIPTION SNAPSHOT CACHE
+
+Plan / status sirf mahine me 2-3 baar badalta hai, lekin gate har request
+pe chalta hai. Isliye clinic ka chhota sa snapshot cache me rakhte hain.
+
+- TTL ke baad apne aap refresh
+- Clinic.plan / status / end dates commit hote hi invalidate (after_commit)
+- Backend pluggable: "memory" (per worker LRU) | "sqlite" (shared file,
+  sab gunicorn workers ek hi cache dekhte hain)
+"""
+
+# Gate ko sirf yahi fields chahiye
+SNAPSHOT_FIELDS = (
+    "plan",
+    "subscription_status",
+    "trial_ends_at",
+    "subscription_ends_at",
+)
+
+SubscriptionSnapshot = namedtuple(
+    "SubscriptionSnapshot",
+    ("clinic_id",) + SNAPSHOT_FIELDS
+)
+
+
+def _dump_snapshot(snap):
+    data = snap._asdict()
+    for key in ("trial_ends_at", "subscription_ends_at"):
+        if data[key] is not None:
+            data[key] = data[key].isoformat()
+    return json.dumps(data)
+
+
+def _load_snapshot(raw):
+    data = json.loads(raw)
+    for key in ("trial_ends_at", "subscription_ends_at"):
+        if data.get(key):
+            data[key] = datetime.fromisoformat(data[key])
+    return SubscriptionSnapshot(**data)
+
+
+# -----------------------------
+# BACKEND: IN-PROCESS LRU
+# -----------------------------
+class MemoryBackend:
+    """
+    Per-worker LRU with TTL. Fastest, but har worker ka apna copy hota hai.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+
+            expires_at, raw = item
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return raw
+
+    def set(self, key, raw, ttl):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, raw)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# -----------------------------
+# BACKEND: LOCAL SQLITE FILE
+# -----------------------------
+class SQLiteBackend:
+    """
+    Shared cache file on local disk (WAL mode).
+    Same machine ke sab workers ek hi file padhte / invalidate karte hain.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, raw, ttl):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, raw, time.time() + ttl)
+        )
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        self._conn().execute("DELETE FROM cache")
+
+
+# -----------------------------
+# CACHE FACADE
+# -----------------------------
+class SubscriptionCache:
+    """
+    Flask extension style object (db / mail jaisa): init_app(app) me
+    backend configure hota hai.
+
+    Config:
+        SUBSCRIPTION_CACHE_BACKEND  "sqlite" (default) | "memory"
+        SUBSCRIPTION_CACHE_TTL      seconds, default 300
+        SUBSCRIPTION_CACHE_PATH     sqlite file (default instance folder)
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.ttl = 300
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        kind = app.config.setdefault("SUBSCRIPTION_CACHE_BACKEND", "sqlite")
+        self.ttl = app.config.setdefault("SUBSCRIPTION_CACHE_TTL", 300)
+
+        if kind == "memory":
+            self.backend = MemoryBackend()
+        elif kind == "sqlite":
+            path = app.config.setdefault(
+                "SUBSCRIPTION_CACHE_PATH",
+                os.path.join(app.instance_path, "subscription_cache.db")
+            )
+            self.backend = SQLiteBackend(path)
+        else:
+            raise RuntimeError(f"Unknown SUBSCRIPTION_CACHE_BACKEND: {kind}")
+
+        app.extensions["subscription_cache"] = self
+
+    @staticmethod
+    def _key(clinic_id):
+        return f"clinic:{clinic_id}"
+
+    def get(self, clinic_id):
+        """
+        Snapshot for clinic_id. Cache hit = zero DB round trips.
+        Returns None if clinic does not exist.
+        """
+
+        if self.backend is not None:
+            try:
+                raw = self.backend.get(self._key(clinic_id))
+                if raw is not None:
+                    return _load_snapshot(raw)
+            except Exception:
+                # cache kabhi request nahi todega → DB fallback
+                current_app.logger.warning("subscription cache read failed", exc_info=True)
+
+        snap = self._load_from_db(clinic_id)
+
+        if snap is not None and self.backend is not None:
+            try:
+                self.backend.set(self._key(clinic_id), _dump_snapshot(snap), self.ttl)
+            except Exception:
+                current_app.logger.warning("subscription cache write failed", exc_info=True)
+
+        return snap
+
+    def _load_from_db(self, clinic_id):
+        # Request me Clinic row pehle se load hai to wahi use karo
+        clinic = g.get("clinic") if has_request_context() else None
+        if clinic is not None and clinic.id == clinic_id:
+            return SubscriptionSnapshot(
+                clinic_id,
+                *(getattr(clinic, f) for f in SNAPSHOT_FIELDS)
+            )
+
+        row = (
+            db.session.query(
+                *(getattr(Clinic, f) for f in SNAPSHOT_FIELDS)
+            )
+            .filter(Clinic.id == clinic_id)
+            .first()
+        )
+        if row is None:
+            return None
+
+        return SubscriptionSnapshot(clinic_id, *row)
+
+    def invalidate(self, *clinic_ids):
+        if self.backend is None:
+            return
+
+        for clinic_id in clinic_ids:
+            try:
+                self.backend.delete(self._key(clinic_id))
+            except Exception:
+                # TTL will still expire the stale entry
+                pass
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+
+subscription_cache = SubscriptionCache()
+
+
+def get_subscription_snapshot(clinic_id):
+    return subscription_cache.get(clinic_id)
+
+
+# -----------------------------
+# COMMIT DRIVEN INVALIDATION
+# -----------------------------
+_PENDING_KEY = "subscription_cache_pending"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_clinics(session, flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, set())
+
+    for obj in session.deleted:
+        if isinstance(obj, Clinic):
+            pending.add(obj.id)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Clinic):
+            continue
+
+        state = inspect(obj)
+        if any(state.attrs[f].history.has_changes() for f in SNAPSHOT_FIELDS):
+            pending.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        subscription_cache.invalidate(*pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
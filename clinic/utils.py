@@ -1,28 +1,44 @@
 from datetime import date, datetime, time
-from flask import request, session, abort, redirect, url_for, flash
+from flask import request, session, abort, redirect, url_for, flash, g, has_request_context
 from clinic.extensions import db
 from clinic.models import (
     User,
+    Clinic,
     Patient,
-    Invoice,
-    AuditLog,
-    InvoiceSequence
+    Invoice
 )
 from clinic.subscription_plans import PLANS
+from clinic.audit import audit_writer, SYNC_ACTIONS
+from clinic.pdf_render import letterhead_data
+from clinic.sequences import INVOICE_PREFIX, invoice_numbers
 
 # ---------------------------
 #  Check clinic Is Active
 # ----------------------------
-def is_clinic_active(clinic):
-    if clinic.subscription_status == "active":
-        return True
-    
-    # trial ka end date exist karta ho,  aur aaj ki date se aage ho
-    if clinic.subscription_status == "trial":
-        if clinic.trial_ends_at and clinic.trial_ends_at >= datetime.utcnow():
-            return True
+def effective_subscription_status(clinic, now=None):
+    """
+    Status as of *now*, read-only.
+    DB me "expired" likhna `flask expire-subscriptions` job ka kaam hai,
+    request path sirf dates dekh ke decide karta hai.
+    """
+    now = now or datetime.utcnow()
+    status = clinic.subscription_status
+
+    # trial ka end date nikal gaya → expired
+    if status == "trial":
+        if not clinic.trial_ends_at or clinic.trial_ends_at < now:
+            return "expired"
 
-    return False
+    # paid plan ki validity khatam → expired
+    if status == "active":
+        if clinic.subscription_ends_at and clinic.subscription_ends_at < now:
+            return "expired"
+
+    return status
+
+
+def is_clinic_active(clinic):
+    return effective_subscription_status(clinic) in ("active", "trial")
 
 # -----------------------------
 # ROLE LABELS (UI USE)
@@ -37,6 +53,51 @@ ROLE_LABELS = {
     "pharmacy": "Pharmacy Staff"
 }
 
+# -----------------------------
+# REQUEST IDENTITY (USER + CLINIC)
+# -----------------------------
+def load_request_identity():
+    """
+    Load logged in User ONCE per request into flask.g.
+    Decorators, context processor and views sab yahi use karte hain.
+    Clinic row lazy hai: subscription gate snapshot cache se chalta hai,
+    full Clinic sirf un views ke liye load hota hai jinko chahiye.
+    """
+
+    g.user = None
+
+    user_id = session.get("user_id")
+    if user_id:
+        g.user = db.session.get(User, user_id)
+
+
+def get_current_user():
+    """
+    Logged in user for this request (None if not logged in).
+    """
+    if not has_request_context():
+        return None
+
+    if "user" not in g:
+        load_request_identity()
+
+    return g.user
+
+
+def get_current_clinic():
+    """
+    Current tenant clinic for this request (None if missing).
+    Loaded at most once per request.
+    """
+    if not has_request_context():
+        return None
+
+    if "clinic" not in g:
+        clinic_id = session.get("clinic_id")
+        g.clinic = db.session.get(Clinic, clinic_id) if clinic_id else None
+
+    return g.clinic
+
 # -----------------------------
 # CLINIC OWNER RESOLUTION
 # -----------------------------
@@ -57,60 +118,76 @@ def get_current_clinic_id():
 
     return clinic_id
 
+# -----------------------------
+# CLINIC LETTERHEAD (PDF)
+# -----------------------------
+def get_clinic_letterhead(clinic_id):
+    """
+    Letterhead fields for PDFs: clinic name / address / phone
+    + owner doctor ki speciality (one query).
+    """
+    row = (
+        db.session.query(Clinic, User.speciality)
+        .outerjoin(User, User.id == Clinic.owner_id)
+        .filter(Clinic.id == clinic_id)
+        .first()
+    )
+    if row is None:
+        return letterhead_data(None)
+
+    return letterhead_data(row[0], row[1])
+
 # -----------------------------
 # SAFE INVOICE NUMBER GENERATION
 # -----------------------------
-def generate_invoice_number():
+def generate_invoice_number(clinic=None):
     """
     Generate invoice number safely (NO race condition).
-    Uses per-clinic sequence.
-    """
+    Uses per-clinic sequence (clinic.sequences.invoice_numbers).
 
-    clinic_id = get_current_clinic_id()   # Invoice clinic-wise unique hona chahiye
+    Gapless clinic → number caller ke transaction me, sequence row commit
+    tak locked → invoice ka baaki kaam pehle karo, ye commit se theek pehle.
+    Baaki clinics → alag chhota transaction (INVOICE_NO_BLOCK_SIZE > 1 ho to
+    hi-lo block), request koi lock hold nahi karta; rollback = number skip.
+    """
 
-    seq = (
-        InvoiceSequence.query
-        .filter_by(clinic_id=clinic_id)
-        .with_for_update()
-        .first()
-    )
+    clinic = clinic or get_current_clinic()   # Invoice clinic-wise unique hona chahiye
 
-    if not seq:
-        seq = InvoiceSequence(
-            clinic_id=clinic_id,
-            last_number=0
-        )
-        db.session.add(seq)
-        db.session.flush()  # flush() → ID mil jaye bina commit ke
+    if clinic.gapless_invoice_numbers:
+        number = invoice_numbers.next_in_transaction(clinic.id)
+    else:
+        number = invoice_numbers.next(clinic.id)
 
-    seq.last_number += 1
-    return f"INV-{seq.last_number:04d}"  # eg:- INV-0001
+    return f"{INVOICE_PREFIX}{number:04d}"  # eg:- INV-0001
 
 # -----------------------------
 # AUDIT LOGGING (LEGAL SAFE)
 # -----------------------------
-def log_action(action, user_id=None):
+def log_action(action, user_id=None, clinic_id=None):
     """
     Log security / business actions.
     Always include clinic context.
+
+    Caller ki db.session ko touch nahi karta: row audit_writer ko
+    jaati hai (buffered, background batch insert). SYNC_ACTIONS turant
+    likhe jaate hain.
     """
 
     try:
-        log = AuditLog(
-            clinic_id=session.get("clinic_id"),  # Kis clinic ne kiya
+        row = dict(
+            clinic_id=clinic_id or session.get("clinic_id"),  # Kis clinic ne kiya
             user_id=user_id or session.get("user_id"),   # Kis user ne kiya
             action=action,
             ip_address=request.remote_addr if request else None,    # IP address
             user_agent=request.headers.get("User-Agent", "")[:250]  # Browser info
-            if request else None
+            if request else None,
+            created_at=datetime.utcnow()   # queue me wait kare to bhi asli time
         )
 
-        db.session.add(log)
-        db.session.commit()
-        # Log save ho gaya
+        audit_writer.write(row, sync=action in SYNC_ACTIONS)
 
     except Exception:
-        db.session.rollback()  # silently ignore if fail without disturb anny  feature
+        pass  # silently ignore if fail without disturb anny  feature
 
 # ----------------------------
 # Daily patient limit check
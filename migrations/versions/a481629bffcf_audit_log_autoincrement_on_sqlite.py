@@ -0,0 +1,62 @@
+"""audit_log AUTOINCREMENT on SQLite (no id reuse after rotation)
+
+Revision ID: a481629bffcf
+Revises: c5f2a8d61e07
+Create Date: 2026-10-19 11:42:08.310276
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a481629bffcf'
+down_revision = 'c5f2a8d61e07'
+branch_labels = None
+depends_on = None
+
+
+MONTH_TABLE = re.compile(r"^audit_log_y\d{4}m\d{2}$")
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # PostgreSQL: audit_log_id_seq kabhi peeche nahi jaata, kuch nahi karna
+    if bind.dialect.name != "sqlite":
+        return
+
+    # rowid = MAX(id) + 1 → rotation ke baad khaali hot table phir 1 se
+    # AUTOINCREMENT → sqlite_sequence me high-water mark, delete ke baad bhi
+    with op.batch_alter_table('audit_log', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+        pass
+
+    # month tables me moved ids bhi count → agla id sabse bade ke baad
+    tables = ['audit_log'] + [
+        name for name in sa.inspect(bind).get_table_names() if MONTH_TABLE.match(name)
+    ]
+    top = max(
+        bind.execute(sa.text(f"SELECT COALESCE(MAX(id), 0) FROM {name}")).scalar()
+        for name in tables
+    )
+    current = bind.execute(sa.text(
+        "SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'audit_log'"
+    )).scalar()
+
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'audit_log'")
+    op.execute(sa.text(
+        "INSERT INTO sqlite_sequence (name, seq) VALUES ('audit_log', :seq)"
+    ).bindparams(seq=max(top, current)))
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+
+    with op.batch_alter_table('audit_log', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': False}) as batch_op:
+        pass
@@ -0,0 +1,109 @@
+"""partition audit_log by month
+
+Revision ID: d4c732959154
+Revises: 45734616fedb
+Create Date: 2026-10-18 09:12:40.118203
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4c732959154'
+down_revision = '45734616fedb'
+branch_labels = None
+depends_on = None
+
+
+def _add_months(d, n):
+    month = d.month - 1 + n
+    return datetime(d.year + month // 12, month % 12 + 1, 1)
+
+
+def _partition_name(month):
+    return f"audit_log_y{month.year:04d}m{month.month:02d}"
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name != "postgresql":
+        # SQLite: hot table + monthly tables (flask audit-log maintain)
+        with op.batch_alter_table('audit_log', schema=None) as batch_op:
+            batch_op.create_index('idx_audit_clinic_created', ['clinic_id', 'created_at'], unique=False)
+        return
+
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_legacy")
+    op.execute("ALTER INDEX IF EXISTS ix_audit_log_clinic_id RENAME TO ix_audit_log_legacy_clinic_id")
+
+    # partition key PK me hona zaroori hai → (id, created_at)
+    op.execute("""
+        CREATE TABLE audit_log (
+            id INTEGER NOT NULL DEFAULT nextval('audit_log_id_seq'),
+            clinic_id INTEGER NOT NULL REFERENCES clinic (id),
+            user_id INTEGER REFERENCES "user" (id) ON DELETE SET NULL,
+            action VARCHAR(100) NOT NULL,
+            ip_address VARCHAR(45),
+            user_agent VARCHAR(255),
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() at time zone 'utc'),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE INDEX ix_audit_log_clinic_id ON audit_log (clinic_id)")
+    op.execute("CREATE INDEX idx_audit_clinic_created ON audit_log (clinic_id, created_at)")
+    op.execute("CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT")
+
+    # existing data ke mahine + 3 aage
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM audit_log_legacy")).scalar()
+    now = datetime.utcnow()
+    month = datetime((oldest or now).year, (oldest or now).month, 1)
+    last = _add_months(datetime(now.year, now.month, 1), 3)
+
+    while month <= last:
+        end = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE {_partition_name(month)} PARTITION OF audit_log "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        )
+        month = end
+
+    op.execute("""
+        INSERT INTO audit_log (id, clinic_id, user_id, action, ip_address, user_agent, created_at)
+        SELECT id, clinic_id, user_id, action, ip_address, user_agent,
+               COALESCE(created_at, TIMESTAMP '1970-01-01')
+        FROM audit_log_legacy
+    """)
+
+    # sequence legacy table ke saath drop na ho
+    op.execute("ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log.id")
+    op.execute("DROP TABLE audit_log_legacy")
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name != "postgresql":
+        with op.batch_alter_table('audit_log', schema=None) as batch_op:
+            batch_op.drop_index('idx_audit_clinic_created')
+        return
+
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_partitioned")
+    op.execute("ALTER INDEX ix_audit_log_clinic_id RENAME TO ix_audit_log_partitioned_clinic_id")
+    op.execute("""
+        CREATE TABLE audit_log (
+            id INTEGER NOT NULL DEFAULT nextval('audit_log_id_seq') PRIMARY KEY,
+            clinic_id INTEGER NOT NULL REFERENCES clinic (id),
+            user_id INTEGER REFERENCES "user" (id) ON DELETE SET NULL,
+            action VARCHAR(100) NOT NULL,
+            ip_address VARCHAR(45),
+            user_agent VARCHAR(255),
+            created_at TIMESTAMP WITHOUT TIME ZONE
+        )
+    """)
+    op.execute("CREATE INDEX ix_audit_log_clinic_id ON audit_log (clinic_id)")
+    op.execute("INSERT INTO audit_log SELECT * FROM audit_log_partitioned")
+    op.execute("ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log.id")
+    op.execute("DROP TABLE audit_log_partitioned CASCADE")
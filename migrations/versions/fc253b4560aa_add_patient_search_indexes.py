@@ -0,0 +1,100 @@
+"""add patient search indexes (pg_trgm / FTS5)
+
+Revision ID: fc253b4560aa
+Revises: d4d8c0864480
+Create Date: 2026-10-18 21:05:13.774018
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fc253b4560aa'
+down_revision = 'd4d8c0864480'
+branch_labels = None
+depends_on = None
+
+
+def _backfill_sqlite(bind):
+    last_id = 0
+    while True:
+        rows = bind.execute(sa.text(
+            "SELECT id, clinic_id, name, phone FROM patient "
+            "WHERE id > :last AND (is_deleted IS NULL OR is_deleted = 0) "
+            "ORDER BY id LIMIT 2000"
+        ), {"last": last_id}).all()
+        if not rows:
+            break
+
+        bind.execute(
+            sa.text(
+                "INSERT INTO patient_fts (rowid, clinic, name, phone_rev) "
+                "VALUES (:id, :clinic, :name, :phone_rev)"
+            ),
+            [
+                {
+                    "id": r.id,
+                    "clinic": f"c{r.clinic_id}",
+                    "name": r.name or "",
+                    "phone_rev": re.sub(r"\D", "", r.phone or "")[::-1],
+                }
+                for r in rows
+            ]
+        )
+        bind.execute(
+            sa.text("INSERT INTO patient_trgm (rowid, clinic, name) VALUES (:id, :clinic, :name)"),
+            [{"id": r.id, "clinic": f"#{r.clinic_id}#", "name": (r.name or "").lower()} for r in rows]
+        )
+        last_id = rows[-1].id
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name != "postgresql":
+        # SQLite: FTS5 shadow tables (clinic/patient_search.py model events se sync)
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS patient_fts USING fts5("
+            "clinic, name, phone_rev, tokenize='unicode61 remove_diacritics 2', prefix='1 2 3')"
+        )
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS patient_trgm USING fts5("
+            "clinic, name, tokenize='trigram')"
+        )
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS patient_trgm_vocab USING fts5vocab("
+            "patient_trgm, 'row')"
+        )
+        _backfill_sqlite(bind)
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_patient_name_trgm "
+        "ON patient USING gin (lower(name) gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_patient_phone_digits_trgm "
+        "ON patient USING gin ((regexp_replace(coalesce(phone, ''), '\\D', '', 'g')) gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_patient_clinic_lower_name "
+        "ON patient (clinic_id, lower(name) text_pattern_ops)"
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name != "postgresql":
+        op.execute("DROP TABLE IF EXISTS patient_trgm_vocab")
+        op.execute("DROP TABLE IF EXISTS patient_trgm")
+        op.execute("DROP TABLE IF EXISTS patient_fts")
+        return
+
+    op.execute("DROP INDEX IF EXISTS idx_patient_clinic_lower_name")
+    op.execute("DROP INDEX IF EXISTS idx_patient_phone_digits_trgm")
+    op.execute("DROP INDEX IF EXISTS idx_patient_name_trgm")
@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+os.environ.setdefault("SECRET_KEY", "test")
+
+from clinic import create_app
+from clinic.extensions import db
+from clinic.models import Clinic
+
+
+@pytest.fixture
+def app(tmp_path):
+    # file-backed SQLite → har thread / connection same DB dekhe (:memory: nahi)
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'clinic.db'}",
+        "WTF_CSRF_ENABLED": False,
+        "DRAFT_STORE_PATH": str(tmp_path / "consult_drafts.db"),
+        "PDF_CACHE_DIR": str(tmp_path / "pdf_cache"),
+        "AUDIT_SPOOL_PATH": str(tmp_path / "audit_spool.jsonl"),
+    })
+
+    with app.app_context():
+        db.create_all()
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def clinic_id(app):
+    with app.app_context():
+        clinic = Clinic(name="Test Clinic")
+        db.session.add(clinic)
+        db.session.commit()
+        return clinic.id
+
+
+@pytest.fixture
+def doctor(app):
+    """
+    Signup (naya clinic) + login → doctor ka test client.
+    """
+    client = app.test_client()
+    client.post("/signup", data=dict(
+        fullname="Doc", email="doc@example.com",
+        password="secret1", confirm_password="secret1"
+    ))
+    response = client.post("/login", data=dict(email="doc@example.com", password="secret1"))
+    assert response.status_code in (200, 302)
+    return client
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from clinic.extensions import db
+from clinic.models import Invoice, Patient
+from clinic.routes.billing import invoice_pages
+
+
+def test_invoice_pages_reach_every_invoice(app, clinic_id):
+    with app.app_context():
+        db.session.execute(insert(Patient), [
+            {"id": 1, "clinic_id": clinic_id, "patient_no": 1, "name": "P", "disease": "x"}
+        ])
+        # migration 2a09ff72ed40 purane NULL created_at ko epoch deta hai → kai rows same key
+        db.session.execute(insert(Invoice), [
+            {
+                "clinic_id": clinic_id, "patient_id": 1, "invoice_number": f"INV-{n:04d}",
+                "created_at": datetime(1970, 1, 1) if n % 3 == 0 else datetime(2026, 1, n, 10),
+            }
+            for n in range(1, 26)
+        ])
+        db.session.commit()
+
+        seen, cursor = [], None
+        for _ in range(10):
+            page = invoice_pages.page(Invoice.query, cursor, per_page=7)
+            seen += [invoice.id for invoice in page]
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+    assert sorted(seen) == list(range(1, 26))
+    assert Invoice.__table__.c.created_at.nullable is False
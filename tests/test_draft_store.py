@@ -0,0 +1,23 @@
+from clinic.draft_store import draft_store
+from clinic.models import Appointment
+
+
+def test_flusher_starts_on_first_save_only(app, clinic_id):
+    draft_store.enabled = True
+    try:
+        # CLI commands (db upgrade, mail-worker, ...) save nahi karte → thread nahi
+        result = app.test_cli_runner().invoke(args=["audit-log", "maintain"])
+        assert result.exit_code == 0, result.output
+        assert draft_store._thread is None
+
+        draft = draft_store.seed(Appointment(id=1, clinic_id=clinic_id, draft_revision=0))
+        assert draft_store._thread is None
+
+        assert draft_store.save(draft, {"symptoms": "fever"}).revision == 1
+        assert draft_store._thread is not None and draft_store._thread.is_alive()
+    finally:
+        draft_store.enabled = False
+        draft_store.shutdown()
+        thread, draft_store._thread, draft_store._writer_pid = draft_store._thread, None, None
+
+    assert not thread.is_alive()
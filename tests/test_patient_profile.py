@@ -0,0 +1,78 @@
+from contextlib import contextmanager
+from datetime import date, time, timedelta
+
+from sqlalchemy import event
+
+from clinic.extensions import db
+from clinic.models import Appointment, Patient, Prescription, User
+
+
+def add_patient(clinic_id, patient_no, visits):
+    """
+    visits completed appointments, har ek pe finalized prescription.
+    """
+    patient = Patient(clinic_id=clinic_id, patient_no=patient_no, name=f"P{patient_no}", disease="x")
+    db.session.add(patient)
+    db.session.flush()
+
+    for i in range(visits):
+        appt = Appointment(
+            clinic_id=clinic_id, patient_id=patient.id, type="Walk-in",
+            date=date(2026, 1, 1) + timedelta(days=i), time=time(10, 0),
+            status="Completed", diagnosis="flu"
+        )
+        db.session.add(appt)
+        db.session.flush()
+        db.session.add(Prescription(appointment_id=appt.id, finalized=True))
+
+    db.session.commit()
+    return patient.id
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_profile_query_count_independent_of_visits(app, doctor):
+    with app.app_context():
+        clinic_id = User.query.filter_by(email="doc@example.com").one().clinic_id
+        few = add_patient(clinic_id, 1, visits=1)
+        many = add_patient(clinic_id, 2, visits=50)
+
+        # warm-up: subscription / identity caches bhar jaayein
+        assert doctor.get(f"/patient/{few}").status_code == 200
+
+        with count_queries() as one_visit:
+            assert doctor.get(f"/patient/{few}").status_code == 200
+        with count_queries() as fifty_visits:
+            assert doctor.get(f"/patient/{many}").status_code == 200
+
+    assert len(one_visit) == len(fifty_visits), fifty_visits
+
+
+def test_visit_pages_query_count_independent_of_visits(app, doctor):
+    with app.app_context():
+        clinic_id = User.query.filter_by(email="doc@example.com").one().clinic_id
+        few = add_patient(clinic_id, 1, visits=1)
+        many = add_patient(clinic_id, 2, visits=50)
+
+        assert doctor.get(f"/patient/{few}/visits").status_code == 200
+
+        with count_queries() as one_visit:
+            first = doctor.get(f"/patient/{few}/visits").get_json()
+        with count_queries() as fifty_visits:
+            page = doctor.get(f"/patient/{many}/visits").get_json()
+
+    assert len(one_visit) == len(fifty_visits), fifty_visits
+    assert first["total"] == 1
+    assert page["total"] == 50
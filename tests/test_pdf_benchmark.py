@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.mark.parametrize("flag", [[], ["--baseline"]])
+def test_benchmark_runs_both_renderers(app, flag):
+    result = app.test_cli_runner().invoke(
+        args=["pdf-benchmark", "--docs", "2", "--medicines", "40", *flag]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "2 docs, 4 pages" in result.output
+    assert result.output.startswith("baseline" if flag else "current")
@@ -0,0 +1,61 @@
+import os
+import time
+
+from clinic.pdf_cache import PRUNE_GRACE, pdf_cache
+
+DAY = 86400
+
+
+def put_aged(key, size, age):
+    path = pdf_cache.put(key, b"x" * size)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def test_prune_drops_old_files_then_least_recently_used(app):
+    old = put_aged("old", 100, 200 * DAY)
+    lru = put_aged("lru", 100, 5 * DAY)
+    mid = put_aged("mid", 100, 2 * DAY)
+    fresh = put_aged("fresh", 100, 0)
+
+    result = pdf_cache.prune(max_bytes=250, max_age_days=180)
+
+    assert result["removed"] == 2
+    assert not os.path.exists(old)
+    assert not os.path.exists(lru)
+    assert os.path.exists(mid) and os.path.exists(fresh)
+    assert (result["kept"], result["kept_bytes"]) == (2, 200)
+
+
+def test_cache_hit_refreshes_lru_position(app):
+    put_aged("a", 100, 5 * DAY)
+    put_aged("b", 100, 2 * DAY)
+
+    assert pdf_cache.path("a")   # hit → ab "a" sabse naya
+
+    pdf_cache.prune(max_bytes=150, max_age_days=0)
+
+    assert pdf_cache.path("a") is not None
+    assert pdf_cache.path("b") is None
+
+
+def test_prune_keeps_files_inside_grace_window(app):
+    put_aged("recent", 100, PRUNE_GRACE / 2)
+
+    result = pdf_cache.prune(max_bytes=1, max_age_days=0)
+
+    assert result["removed"] == 0
+    assert pdf_cache.path("recent") is not None
+
+
+def test_prune_cli_reports_usage(app):
+    put_aged("old", 100, 400 * DAY)
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=["pdf-cache", "prune", "--max-age-days", "30"])
+    assert result.exit_code == 0, result.output
+    assert "Removed 1 file(s)" in result.output
+
+    result = runner.invoke(args=["pdf-cache", "status"])
+    assert result.output.startswith("0 file(s)")
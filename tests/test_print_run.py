@@ -0,0 +1,64 @@
+import os
+import time
+
+import pytest
+
+from clinic.commands.pdf_benchmark import _sample_prescription
+from clinic.pdf_render import render_prescription_batch_file
+from clinic.pdf_service import PdfRenderService, PdfRenderTimeout
+
+
+def slow_file_job(directory, delay):
+    """
+    Pool job (module-level → spawn me import ho sake): der se file banata hai.
+    """
+    time.sleep(delay)
+    path = os.path.join(directory, "print_run_slow.pdf")
+    with open(path, "wb") as f:
+        f.write(b"%PDF")
+    return path, 1
+
+
+def test_batch_file_job_renames_into_place(tmp_path):
+    path, pages = render_prescription_batch_file([_sample_prescription(5)] * 3, str(tmp_path))
+
+    assert pages == 3
+    assert path.endswith(".pdf") and os.path.dirname(path) == str(tmp_path)
+    with open(path, "rb") as f:
+        assert f.read(4) == b"%PDF"
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+
+def test_batch_file_job_removes_partial_file_on_failure(tmp_path):
+    with pytest.raises(Exception):
+        render_prescription_batch_file([{"broken": True}], str(tmp_path))
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_timed_out_job_output_is_discarded(app, tmp_path):
+    service = PdfRenderService()
+    service.init_app(app)
+    service.processes = 1
+
+    out = tmp_path / "print_runs"
+    out.mkdir()
+    discarded = []
+
+    def discard(result):
+        os.remove(result[0])
+        discarded.append(result[0])
+
+    try:
+        with pytest.raises(PdfRenderTimeout):
+            service.render(slow_file_job, str(out), 3, timeout=0.5, on_abandoned=discard)
+
+        # job chalta raha, file bani, phir callback ne hata di
+        deadline = time.monotonic() + 60
+        while not discarded and time.monotonic() < deadline:
+            time.sleep(0.1)
+    finally:
+        service._reset_pool()
+
+    assert discarded
+    assert os.listdir(out) == []
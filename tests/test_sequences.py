@@ -0,0 +1,119 @@
+import threading
+
+import pytest
+from sqlalchemy import insert
+
+from clinic.extensions import db
+from clinic.models import Invoice, InvoiceSequence, Patient, PatientSequence
+from clinic.sequences import invoice_numbers, patient_numbers
+
+THREADS = 16
+PER_THREAD = 25
+
+
+def hammer(app, allocate):
+    """
+    THREADS threads × PER_THREAD allocations → sab numbers (aur errors).
+    """
+    numbers, errors = [], []
+    lock = threading.Lock()
+    start = threading.Barrier(THREADS)
+
+    def worker():
+        with app.app_context():
+            start.wait()
+            try:
+                for _ in range(PER_THREAD):
+                    number = allocate()
+                    with lock:
+                        numbers.append(number)
+            except Exception as e:
+                errors.append(repr(e))
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return numbers, errors
+
+
+def seed_patients(clinic_id, count):
+    db.session.execute(insert(Patient), [
+        {"clinic_id": clinic_id, "patient_no": n, "name": f"P{n}", "disease": "x"}
+        for n in range(1, count + 1)
+    ])
+    db.session.commit()
+
+
+@pytest.fixture
+def block_size(request):
+    """
+    patient_numbers.block_size test ke liye, baad me wapas.
+    """
+    old = patient_numbers.block_size
+    patient_numbers.block_size = request.param
+    patient_numbers._blocks = {}
+    yield request.param
+    patient_numbers.block_size = old
+    patient_numbers._blocks = {}
+
+
+@pytest.mark.parametrize("block_size", [1, 7], indirect=True)
+def test_patient_numbers_unique_under_concurrency(app, clinic_id, block_size):
+    with app.app_context():
+        seed_patients(clinic_id, 5)   # sequence row nahi → MAX(patient_no) se seed
+
+    numbers, errors = hammer(app, lambda: patient_numbers.next(clinic_id))
+
+    assert errors == []
+    assert len(numbers) == THREADS * PER_THREAD
+    assert len(set(numbers)) == len(numbers)
+    assert min(numbers) == 6
+
+    if block_size == 1:
+        assert sorted(numbers) == list(range(6, 6 + len(numbers)))
+
+    with app.app_context():
+        last = db.session.query(PatientSequence.last_number).filter_by(clinic_id=clinic_id).scalar()
+    assert last >= max(numbers)
+
+
+def test_gapless_invoice_numbers_contiguous_under_concurrency(app, clinic_id):
+    with app.app_context():
+        seed_patients(clinic_id, 1)
+        db.session.execute(insert(Invoice), [
+            {"clinic_id": clinic_id, "patient_id": 1, "invoice_number": number}
+            for number in ("INV-0009", "INV-0012", "INV-0003", "manual-99")
+        ])
+        db.session.commit()
+
+    def allocate():
+        number = invoice_numbers.next_in_transaction(clinic_id)
+        db.session.commit()
+        return number
+
+    numbers, errors = hammer(app, allocate)
+
+    assert errors == []
+    # seed = MAX numeric INV-xxxx (string MAX nahi), phir bina gap ke
+    assert sorted(numbers) == list(range(13, 13 + THREADS * PER_THREAD))
+
+    with app.app_context():
+        last = db.session.query(InvoiceSequence.last_number).filter_by(clinic_id=clinic_id).scalar()
+    assert last == 12 + THREADS * PER_THREAD
+
+
+def test_invoice_numbers_seed_past_four_digits(app, clinic_id):
+    with app.app_context():
+        seed_patients(clinic_id, 1)
+        db.session.execute(insert(Invoice), [
+            {"clinic_id": clinic_id, "patient_id": 1, "invoice_number": number}
+            for number in ("INV-9999", "INV-10000")
+        ])
+        db.session.commit()
+
+        assert invoice_numbers.next(clinic_id) == 10001
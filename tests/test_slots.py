@@ -0,0 +1,47 @@
+from datetime import time
+
+import pytest
+
+from clinic.extensions import db
+from clinic.models import Clinic, User
+from clinic.slots import MAX_SLOT_CAPACITY, slot_config
+
+
+def save_slots(client, capacity):
+    return client.post("/settings/", data=dict(
+        clinic_save="", clinic_name="C", clinic_phone="1", clinic_address="a",
+        opens_at="09:00", closes_at="12:00", slot_minutes="30", slot_capacity=str(capacity)
+    ))
+
+
+def flashed(client):
+    with client.session_transaction() as session:
+        return [message for _, message in session.get("_flashes", [])]
+
+
+def current_clinic():
+    return db.session.get(Clinic, User.query.filter_by(email="doc@example.com").one().clinic_id)
+
+
+@pytest.mark.parametrize("capacity", [0, MAX_SLOT_CAPACITY + 1, 1000])
+def test_settings_reject_capacity_outside_occupancy_range(app, doctor, capacity):
+    save_slots(doctor, capacity)
+
+    assert "Capacity per slot must be between 1 and 255." in flashed(doctor)
+    with app.app_context():
+        assert current_clinic().slot_minutes is None
+
+
+def test_settings_accept_max_capacity(app, doctor):
+    save_slots(doctor, MAX_SLOT_CAPACITY)
+
+    with app.app_context():
+        clinic = current_clinic()
+        assert clinic.slot_capacity == MAX_SLOT_CAPACITY
+        assert slot_config(clinic).capacity == MAX_SLOT_CAPACITY
+
+
+def test_slot_config_clamps_legacy_capacity():
+    clinic = Clinic(name="C", opens_at=time(9), closes_at=time(12), slot_minutes=30, slot_capacity=1000)
+
+    assert slot_config(clinic).capacity == MAX_SLOT_CAPACITY